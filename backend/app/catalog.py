@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+NUMERIC_COLS = ["price_min", "price_max", "longevity", "sillage", "rating_value", "rating_count"]
+STR_COLS = ["brand", "name", "gender", "main_accords", "description", "url", "top_notes", "middle_notes", "base_notes"]
+# low-cardinality text, dictionary-encoded as pandas categoricals
+CATEGORY_COLS = ["brand", "gender", "main_accords"]
+# long per-perfume text, kept out of the frame in a StringPool
+POOLED_COLS = ["description", "url", "top_notes", "middle_notes", "base_notes"]
+# Bump when the binary catalog layout changes, so old directories are rewritten.
+CATALOG_FORMAT = 2
+
+
+class StringPool:
+    """Immutable strings stored as one utf-8 byte buffer plus an offsets array (int32 below 2 GiB of text)."""
+
+    def __init__(self, buffer: np.ndarray, offsets: np.ndarray):
+        self.buffer = buffer
+        self.offsets = offsets
+        self._view = memoryview(buffer)  # slicing it is cheaper than slicing the array
+
+    @classmethod
+    def from_strings(cls, values: Iterable[str]) -> "StringPool":
+        encoded = [str(v).encode("utf-8") for v in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+        if offsets[-1] < 2**31:
+            offsets = offsets.astype(np.int32)
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return str(self._view[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def tolist(self) -> List[str]:
+        data, offsets = self.buffer.tobytes(), self.offsets.tolist()  # one copy, not a view per string
+        return [data[a:b].decode("utf-8") for a, b in zip(offsets, offsets[1:])]
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.buffer.nbytes + self.offsets.nbytes)
+
+
+class Catalog:
+    """
+    The loaded perfume catalog: a frame of compact columns plus pooled long text.
+    `get()` mirrors `DataFrame.get()` so index builders can read either kind
+    of column; pooled text is only materialized when asked for.
+    """
+
+    def __init__(self, df: pd.DataFrame, text: Optional[Dict[str, StringPool]] = None):
+        self.df = df
+        self.text = text or {}
+        # plain NumPy views for per-row reads (pandas column access costs microseconds each)
+        self._arrays = {}
+        for col in df.columns:
+            values = df[col]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                cats = values.cat.categories.to_numpy(dtype=object)
+                # .array.codes is the stored codes array (a memory-mapped one stays shared)
+                self._arrays[col] = (values.array.codes, np.append(cats, np.nan))
+            elif values.dtype.kind in "biuf":
+                self._arrays[col] = (values.to_numpy(), None)
+            else:
+                self._arrays[col] = (values.to_numpy(dtype=object), None)
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def get(self, col: str, default=None):
+        if col in self.text:
+            return pd.Series(self.text[col].tolist())
+        return self.df.get(col, default)
+
+    def row(self, i: int, cols: Optional[Iterable[str]] = None) -> Dict[str, object]:
+        """
+        Row at position `i` (only the existing `cols`, if given) as plain Python
+        values (float32 read back at its shortest decimal).
+        """
+        out: Dict[str, object] = {}
+        for col in (cols if cols is not None else [*self._arrays, *self.text]):
+            if col in self.text:
+                out[col] = self.text[col][i]
+            elif col in self._arrays:
+                values, cats = self._arrays[col]
+                # categorical code -1 (missing) picks the trailing NaN
+                out[col] = _py(values[i] if cats is None else cats[values[i]])
+        return out
+
+    def column(self, col: str) -> Optional[List[object]]:
+        """Whole column as the plain Python values `row()` gives (None if there is no such column)."""
+        if col in self.text:
+            return self.text[col].tolist()
+        if col not in self._arrays:
+            return None
+        values, cats = self._arrays[col]
+        if cats is not None:
+            return cats[values].tolist()
+        if values.dtype == np.float32:
+            return [float(v) for v in values.astype(str)]  # shortest decimal, as in `_py`
+        return values.tolist()
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.df.memory_usage(deep=True).sum()) + sum(p.nbytes for p in self.text.values())
+
+    # --- Flat arrays, for the shared (memory-mapped) snapshot ---
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], dict]:
+        """
+        Every column as plain arrays: numbers as is, categoricals as codes (the
+        categories go to the metadata) and all other text as string pools.
+        Text columns of the frame ("object") also get a missing-value mask when they have NaNs.
+        """
+        arrays: Dict[str, np.ndarray] = {}
+        columns = []
+        for col, (values, cats) in self._arrays.items():
+            if cats is not None:
+                arrays[f"{col}.codes"] = values
+                columns.append([col, "category", [str(c) for c in cats[:-1]]])
+            elif values.dtype != object:
+                arrays[col] = values
+                columns.append([col, "numeric", None])
+            else:
+                pool = StringPool.from_strings(values)
+                arrays[f"{col}.buffer"], arrays[f"{col}.offsets"] = pool.buffer, pool.offsets
+                missing = pd.isna(values)
+                if missing.any():
+                    arrays[f"{col}.missing"] = missing
+                columns.append([col, "object", str(self.df[col].dtype)])
+        for col, pool in self.text.items():
+            arrays[f"{col}.buffer"], arrays[f"{col}.offsets"] = pool.buffer, pool.offsets
+            columns.append([col, "text", None])
+        return arrays, {"n": len(self), "columns": columns}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], meta: dict, frame_text: bool = False) -> "Catalog":
+        """
+        Inverse of `to_arrays`; the frame and pools wrap `arrays` without copying
+        them. Text columns that were in the frame stay pooled too, unless
+        `frame_text` decodes them back into the frame (indexes built from the
+        frame need e.g. `name` there).
+        """
+        frame, text = {}, {}
+        for col, kind, extra in meta["columns"]:
+            if kind == "category":
+                frame[col] = pd.Categorical.from_codes(arrays[f"{col}.codes"], categories=extra, validate=False)
+            elif kind == "numeric":
+                frame[col] = arrays[col]
+            elif kind == "object" and frame_text:
+                values = pd.Series(StringPool(arrays[f"{col}.buffer"], arrays[f"{col}.offsets"]).tolist(), dtype=extra)
+                if f"{col}.missing" in arrays:
+                    values[np.asarray(arrays[f"{col}.missing"], dtype=bool)] = np.nan
+                frame[col] = values
+            else:
+                text[col] = StringPool(arrays[f"{col}.buffer"], arrays[f"{col}.offsets"])
+        return cls(pd.DataFrame(frame, index=pd.RangeIndex(meta["n"]), copy=False), text)
+
+
+def _py(v):
+    if isinstance(v, np.float32):
+        return float(str(v))
+    if isinstance(v, np.generic):
+        return v.item()
+    return v
+
+
+def _downcast(values: pd.Series) -> pd.Series:
+    """Smallest integer dtype when every value is a whole number, float32 otherwise."""
+    v = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    if len(v) and not np.isnan(v).any() and np.array_equal(v, np.round(v)) and np.abs(v).max() < 2**31:
+        return pd.to_numeric(values, downcast="integer")
+    return values.astype(np.float32)
+
+
+# --- Binary catalog: <csv stem>.catalog/ next to the csv ---
+#   one .npy per `Catalog.to_arrays` array (final dtypes, string pools for text)
+#   and catalog.json (format, size / mtime / sha256 of the csv it was parsed from; written last).
+
+def write_arrays(directory: Path, arrays: Dict[str, np.ndarray], meta: dict, meta_name: str) -> None:
+    """`<name>.npy` per array plus the `meta_name` json, built in a temp dir and renamed into place."""
+    tmp = directory.with_name(f"{directory.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for name, arr in arrays.items():
+        np.save(tmp / f"{name}.npy", np.asarray(arr))
+    with open(tmp / meta_name, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp, directory)
+
+
+def binary_catalog_dir(path: Path) -> Path:
+    return path.with_suffix(".catalog")
+
+
+def _source(path: Path) -> dict:
+    st = os.stat(path)
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": h.hexdigest()}
+
+
+def save_catalog(catalog: Catalog, path: Path, source: Optional[dict] = None) -> Path:
+    """Write `catalog` (compact, parsed from csv `path`, whose `_source` was `source`) as its binary catalog."""
+    arrays, meta = catalog.to_arrays()
+    directory = binary_catalog_dir(path)
+    write_arrays(directory, arrays, {"format": CATALOG_FORMAT, "source": source or _source(path),
+                                     "arrays": list(arrays), "catalog": meta}, "catalog.json")
+    return directory
+
+
+def open_catalog(path: Path) -> Optional[Catalog]:
+    """
+    Memory-map the binary catalog of csv `path`: no parsing, and pooled text
+    (description, url, notes) is only paged in for the rows that are read.
+    None if it is missing, of another format or not parsed from this csv
+    (same size and mtime, or else the same sha256).
+    """
+    directory = binary_catalog_dir(path)
+    try:
+        with open(directory / "catalog.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    src = meta.get("source") or {}
+    if meta.get("format") != CATALOG_FORMAT or src.get("size") != st.st_size:
+        return None
+    if src.get("mtime_ns") != st.st_mtime_ns and src.get("sha256") != _source(path)["sha256"]:
+        return None
+    try:
+        arrays = {a: np.load(directory / f"{a}.npy", mmap_mode="r") for a in meta["arrays"]}
+    except (OSError, ValueError):
+        return None
+    return Catalog.from_arrays(arrays, meta["catalog"], frame_text=True)
+
+
+def load_catalog(path: Path, compact: bool = True, max_rows: int = 0, binary: bool = True) -> Catalog:
+    """
+    Read perfumes.csv. In compact mode numeric columns are downcast, brand /
+    gender / accords become categoricals and description / url go to string
+    pools. `max_rows` > 0 keeps a deterministic random sample (0 = full catalog).
+    With `binary` (compact, full catalog only) the binary catalog is memory-mapped
+    when it matches the csv; otherwise the csv is parsed and the binary catalog rewritten.
+    """
+    if not path.exists():
+        return Catalog(pd.DataFrame())
+    binary = binary and compact and not max_rows
+    source = None
+    if binary:
+        catalog = open_catalog(path)
+        if catalog is not None:
+            return catalog
+        source = _source(path)  # before parsing, so a concurrent rewrite of the csv reads as stale
+    try:
+        df = pd.read_csv(path)
+    except Exception as e:
+        print("⚠️ Failed to load perfumes.csv:", e)
+        return Catalog(pd.DataFrame())
+
+    for c in NUMERIC_COLS:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+    for c in STR_COLS:
+        if c in df.columns:
+            df[c] = df[c].fillna("")
+
+    if max_rows and len(df) > max_rows:
+        df = df.sample(max_rows, random_state=42).reset_index(drop=True)
+
+    if not compact:
+        return Catalog(df)
+
+    for c in NUMERIC_COLS:
+        if c in df.columns:
+            df[c] = _downcast(df[c])
+    for c in CATEGORY_COLS:
+        if c in df.columns:
+            df[c] = df[c].astype(str).astype("category")
+    text = {}
+    for c in POOLED_COLS:
+        if c in df.columns:
+            text[c] = StringPool.from_strings(df[c].astype(str))
+            df = df.drop(columns=c)
+    catalog = Catalog(df, text)
+    if binary and len(catalog):
+        try:
+            print(f"ℹ️ Binary catalog missing or stale, wrote {save_catalog(catalog, path, source)}")
+        except OSError as e:
+            print("⚠️ Could not save binary catalog:", e)
+    return catalog
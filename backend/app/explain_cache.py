@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from .cache import LRUCache
+
+# budgets are compared in buckets of this many PLN, so 200–1200 and 210–1190 share entries
+BUDGET_BUCKET = 100
+
+
+def _bucket(v) -> Optional[int]:
+    try:
+        return int(round(float(v) / BUDGET_BUCKET)) * BUDGET_BUCKET if v else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _norm_list(values) -> List[str]:
+    return sorted({str(v).strip().lower() for v in (values or []) if str(v).strip()})
+
+
+def explain_key(context: Dict[str, Any], candidate: Dict[str, Any], model: str = "") -> str:
+    """Stable key for one candidate's explanation under a normalized user context."""
+    ctx = {
+        "liked": _norm_list(context.get("liked")),
+        "use_cases": _norm_list(context.get("use_cases")),
+        "notes": _norm_list(context.get("preferred_notes")),
+        "budget": [_bucket(context.get("price_min")), _bucket(context.get("price_max"))],
+        "model": model,
+    }
+    item = [str(candidate.get("brand", "")).strip().lower(), str(candidate.get("name", "")).strip().lower()]
+    raw = json.dumps([ctx, item], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class ExplanationCache:
+    """
+    Two-tier cache of LLM explanations: an in-memory LRUCache in front of a
+    SQLite table that survives restarts. `path=None` keeps only the memory tier.
+    The table is pruned on open and every `prune_every` written rows: entries
+    older than `ttl` go, then the oldest beyond `max_rows`.
+    """
+
+    def __init__(self, path: Optional[Path], max_bytes: int, ttl: Optional[float] = None,
+                 max_rows: int = 200_000, prune_every: int = 1000):
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self.memory = LRUCache(max_bytes, ttl=self.ttl)
+        self.max_rows = max(1, int(max_rows))
+        self.prune_every = max(1, int(prune_every))
+        self.disk_hits = 0
+        self.pruned = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS explanations (key TEXT PRIMARY KEY, text TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS explanations_created ON explanations (created)")
+            with self._lock:
+                self._prune(time.time())
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[str]]:
+        """Cached text per key (None for misses); disk hits are promoted to memory."""
+        out = [self.memory.get(k) for k in keys]
+        missing = [k for k, v in zip(keys, out) if v is None]
+        if self._db is None or not missing:
+            return out
+        oldest = time.time() - self.ttl if self.ttl else 0.0
+        marks = ",".join("?" * len(missing))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT key, text FROM explanations WHERE key IN ({marks}) AND created >= ?", (*missing, oldest)
+            ).fetchall()
+        found = dict(rows)
+        for i, k in enumerate(keys):
+            if out[i] is None and k in found:
+                out[i] = found[k]
+                self.memory.put(k, found[k], _size(k, found[k]))
+                self.disk_hits += 1
+        return out
+
+    def put_many(self, items: Dict[str, str]) -> None:
+        items = {k: v for k, v in items.items() if v}
+        for k, v in items.items():
+            self.memory.put(k, v, _size(k, v))
+        if self._db is None or not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO explanations (key, text, created) VALUES (?, ?, ?)",
+                [(k, v, now) for k, v in items.items()],
+            )
+            before = self._writes
+            self._writes += len(items)
+            if self._writes // self.prune_every > before // self.prune_every:
+                self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        if self.ttl:
+            self.pruned += self._db.execute("DELETE FROM explanations WHERE created < ?", (now - self.ttl,)).rowcount
+        self.pruned += self._db.execute(
+            "DELETE FROM explanations WHERE key IN (SELECT key FROM explanations ORDER BY created "
+            "LIMIT max(0, (SELECT count(*) FROM explanations) - ?))",
+            (self.max_rows,),
+        ).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        out = self.memory.stats()
+        out["disk"] = self._db is not None
+        out["disk_hits"] = self.disk_hits
+        out["disk_pruned"] = self.pruned
+        return out
+
+
+def _size(key: str, text: str) -> int:
+    return len(key) + len(text.encode("utf-8")) + 100
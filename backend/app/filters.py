@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import bisect
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+from .catalog import StringPool
+
+NUMERIC_COLS = ("price_min", "price_max", "rating_value", "rating_count", "longevity", "sillage")
+
+# (column, lower bound or None, upper bound or None), both bounds inclusive
+Range = Tuple[str, Optional[float], Optional[float]]
+
+
+class FilterIndex:
+    """
+    Read-only filter index built once per catalog load.
+
+    Every numeric column is kept as a sorted copy (NaN last) plus each row's
+    rank in that order, so a `lo <= value <= hi` predicate becomes a rank
+    window found with two binary searches. Gender is dictionary-encoded with a
+    row-id list per value, names are sorted keys with a row range each.
+    `select()` returns the surviving row ids directly, without materializing
+    an intermediate frame per predicate. All state lives in flat arrays
+    (`to_arrays`), so a saved index can be memory-mapped and shared.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        n = len(df)
+        arrays: Dict[str, np.ndarray] = {}
+        columns = []
+        for col in NUMERIC_COLS:
+            if col not in df.columns:
+                continue
+            # float32 columns stay float32 so bounds are compared at the stored precision
+            dtype = np.float32 if df[col].dtype == np.float32 else np.float64
+            values = df[col].to_numpy(dtype=dtype, na_value=np.nan)
+            order = np.argsort(values, kind="stable")  # NaN sorts last
+            valid = int(np.count_nonzero(~np.isnan(values)))
+            rank = np.empty(n, dtype=np.int32)
+            rank[order] = np.arange(n, dtype=np.int32)
+            arrays[f"order.{col}"] = order.astype(np.int32)
+            arrays[f"sorted.{col}"] = values[order[:valid]]
+            arrays[f"rank.{col}"] = rank
+            columns.append(col)
+
+        genders = df["gender"].astype(str).str.lower() if "gender" in df.columns else pd.Series([""] * n)
+        codes, uniques = pd.factorize(genders, sort=True)
+        arrays["gender_codes"] = codes.astype(np.int16)
+        arrays["gender_rows"], arrays["gender_ptr"] = _group_rows(codes, len(uniques))
+
+        # exact lowercase name -> rows, as sorted keys with a row range each
+        names = df["name"].astype(str).str.lower() if "name" in df.columns else pd.Series([], dtype=object)
+        codes, keys = pd.factorize(names, sort=True)
+        pool = StringPool.from_strings(keys)
+        arrays["name_keys.buffer"], arrays["name_keys.offsets"] = pool.buffer, pool.offsets
+        arrays["name_rows"], arrays["name_ptr"] = _group_rows(codes, len(keys))
+        self._load(arrays, {"n": n, "columns": columns, "genders": [str(g) for g in uniques]})
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], meta: dict) -> "FilterIndex":
+        """Index over arrays saved by `to_arrays` (used as is, e.g. memory-mapped)."""
+        self = cls.__new__(cls)
+        self._load(arrays, meta)
+        return self
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], dict]:
+        return self._arrays, self._meta
+
+    def _load(self, arrays: Dict[str, np.ndarray], meta: dict) -> None:
+        self._arrays, self._meta = arrays, meta
+        self.n = meta["n"]
+        self._order = {col: arrays[f"order.{col}"] for col in meta["columns"]}
+        self._sorted = {col: arrays[f"sorted.{col}"] for col in meta["columns"]}
+        self._rank = {col: arrays[f"rank.{col}"] for col in meta["columns"]}
+        self._gender_codes = arrays["gender_codes"]
+        self._gender_code = {g: i for i, g in enumerate(meta["genders"])}
+        rows, ptr = arrays["gender_rows"], arrays["gender_ptr"]
+        self._gender_ids = [rows[ptr[i]:ptr[i + 1]] for i in range(len(meta["genders"]))]
+        self._name_keys = StringPool(arrays["name_keys.buffer"], arrays["name_keys.offsets"])
+
+    def _name_ids(self, name: str) -> Optional[np.ndarray]:
+        """Rows whose lowercase name is `name`, or None."""
+        i = bisect.bisect_left(self._name_keys, name)
+        if i == len(self._name_keys) or self._name_keys[i] != name:
+            return None
+        ptr = self._arrays["name_ptr"]
+        return self._arrays["name_rows"][ptr[i]:ptr[i + 1]]
+
+    def window(self, col: str, lo: Optional[float], hi: Optional[float]) -> Tuple[int, int]:
+        """Rank window [start, stop) of rows with lo <= col <= hi (NaN never matches)."""
+        values = self._sorted.get(col)
+        if values is None:
+            return 0, 0
+        start = 0 if lo is None else int(np.searchsorted(values, values.dtype.type(lo), side="left"))
+        stop = len(values) if hi is None else int(np.searchsorted(values, values.dtype.type(hi), side="right"))
+        return start, max(start, stop)
+
+    def select(self,
+               ranges: Sequence[Range] = (),
+               gender: Optional[str] = None,
+               exclude_names: Iterable[str] = (),
+               within: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Sorted row ids that satisfy every range and the gender, are not excluded
+        by name and, if `within` (sorted ids, e.g. a retrieval pool) is given, are in it.
+        """
+        windows = [(col,) + self.window(col, lo, hi) for col, lo, hi in ranges]
+        code = None
+        if gender is not None:
+            code = self._gender_code.get(gender.lower())
+            if code is None:
+                return np.empty(0, dtype=np.int32)
+
+        # start from the smallest candidate set, then check the rest per id
+        sizes: List[Tuple[int, int]] = [(stop - start, i) for i, (_, start, stop) in enumerate(windows)]
+        if code is not None:
+            sizes.append((len(self._gender_ids[code]), -1))
+        if within is not None:
+            sizes.append((len(within), -2))
+        if not sizes:
+            ids = np.arange(self.n, dtype=np.int32)
+        else:
+            _, seed = min(sizes)
+            if seed == -1:
+                ids = self._gender_ids[code]
+            elif seed == -2:
+                ids = within.astype(np.int32)
+            else:
+                col, start, stop = windows[seed]
+                ids = self._order[col][start:stop]
+            for i, (col, start, stop) in enumerate(windows):
+                if i == seed or not len(ids):
+                    continue
+                r = self._rank[col][ids]
+                ids = ids[(r >= start) & (r < stop)]
+            if code is not None and seed != -1:
+                ids = ids[self._gender_codes[ids] == code]
+            if within is not None and seed != -2 and len(ids):
+                pos = np.minimum(np.searchsorted(within, ids), max(len(within) - 1, 0))
+                ids = ids[within[pos] == ids] if len(within) else ids[:0]
+
+        excluded = [ids for ids in (self._name_ids(s.lower()) for s in exclude_names) if ids is not None]
+        if excluded and len(ids):
+            ids = ids[~np.isin(ids, np.concatenate(excluded))]
+        return np.sort(ids)
+
+
+def _group_rows(codes: np.ndarray, groups: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Row ids grouped by code (ascending within a group) and each group's [start, stop) offsets."""
+    rows = np.argsort(codes, kind="stable").astype(np.int32)
+    ptr = np.zeros(groups + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes[codes >= 0], minlength=groups), out=ptr[1:])
+    return rows[len(codes) - int(ptr[-1]):], ptr
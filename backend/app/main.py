@@ -1,46 +1,126 @@
+from __future__ import annotations
+
 from pathlib import Path
 from dotenv import load_dotenv
-from datetime import datetime, timedelta, timezone
 load_dotenv(Path(__file__).resolve().parents[1] / ".env")
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from typing import List, Optional
-import pandas as pd
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional, Tuple
+import ctypes
+import gc
+import json
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+import numpy as np
 import os
 
 #Security
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
 
 
 
+# Local modules. The catalog side (snapshot, vectorstore, recommender: pandas, SciPy,
+# scikit-learn) is imported where it is used, after startup, so the port binds first.
+from .explain_cache import ExplanationCache, explain_key
+from .quota import QuotaStore, open_quota_store
+from .metrics import CONTENT_TYPE, Counter, MetricsMiddleware, family, register, render, stage
+from .payloads import JSONBytesResponse, Result, dumps, response_json, results_json
 
-# Local modules
-from .vectorstore import SimpleStore
-from .recommender import accords_set, usecase_score
+if TYPE_CHECKING:
+    from .snapshot import Snapshot
+    from .vectorstore import Hits
 
 # Optional: GenAI LLM explanations
 try:
-    from .providers import llm_available, llm_explain
+    from .providers import MODEL as LLM_MODEL
+    from .providers import llm_available, llm_explain_stream, llm_stats
+    from .providers import open_client, close_client
 except Exception:
+    LLM_MODEL = ""
     def llm_available() -> bool: return False
-    def llm_explain(*args, **kwargs): return []
+    async def llm_explain_stream(*args, **kwargs):
+        return
+        yield
+    def llm_stats(): return None
+    async def open_client() -> None: return None
+    async def close_client() -> None: return None
 
 # --- Safety caps (prevent overuse) ---
 MAX_K = int(os.getenv("MAX_K", "10"))
 MAX_LLM_EXPLAINS = int(os.getenv("MAX_LLM_EXPLAINS", "5"))
 LLM_DAILY_LIMIT = int(os.getenv("LLM_DAILY_LIMIT", "10"))
-# in-memory usage tracker : ip[ -> {"count":int, "reset_at" : datetime}
-_LLM_USAGE = {}
+
+# --- Query cache (sparse query vector + sparse search result per normalized query) ---
+QUERY_CACHE_MB = float(os.getenv("QUERY_CACHE_MB", "64"))   # 0 disables the cache
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "3600"))
+QUERY_CACHE_SIMS = os.getenv("QUERY_CACHE_SIMS", "1") != "0"
+# --- Explanation cache (memory LRU + SQLite file; EXPLAIN_CACHE_PATH="" keeps it in memory only) ---
+EXPLAIN_CACHE_MB = float(os.getenv("EXPLAIN_CACHE_MB", "16"))
+EXPLAIN_CACHE_TTL = float(os.getenv("EXPLAIN_CACHE_TTL", str(30 * 24 * 3600)))
+# rows kept in the SQLite tier (oldest pruned first, along with anything past the TTL)
+EXPLAIN_CACHE_MAX_ROWS = int(os.getenv("EXPLAIN_CACHE_MAX_ROWS", "200000"))
+# --- Autocomplete (/api/suggest) ---
+SUGGEST_LIMIT = int(os.getenv("SUGGEST_LIMIT", "8"))
+# --- Batch endpoint ---
+MAX_BATCH = int(os.getenv("MAX_BATCH", "1000"))
+BATCH_CHUNK = int(os.getenv("BATCH_CHUNK", "64"))              # requests per vectorized pass
+BATCH_PROCESSES = int(os.getenv("BATCH_PROCESSES", "0"))       # >1 enables the process pool (needs SHARED_SNAPSHOT=1)
+BATCH_PROCESS_MIN = int(os.getenv("BATCH_PROCESS_MIN", "500"))  # smallest batch worth sending to the pool
+
+# >0: only the RETRIEVAL_TOP_N best text matches (max-score pruned) are filtered and scored
+RETRIEVAL_TOP_N = int(os.getenv("RETRIEVAL_TOP_N", "0"))
+# Text retrieval: "sparse" (exact TF-IDF cosine over the inverted index) or "dense" (approximate:
+# cosine between DENSE_DIMS-wide truncated-SVD embeddings, one matrix-vector product per query)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "sparse")
+DENSE_DIMS = int(os.getenv("DENSE_DIMS", "128"))
+RETRIEVAL_DIMS = DENSE_DIMS if RETRIEVAL_MODE == "dense" else 0  # 0 = sparse
+# Liked perfumes: precomputed top-N neighbors per perfume (0 disables); catalogs larger than
+# NEIGHBORS_BUILD_MAX rows only use a table built offline, never one built at startup
+NEIGHBORS_TOP_N = int(os.getenv("NEIGHBORS_TOP_N", "50"))
+NEIGHBORS_BUILD_MAX = int(os.getenv("NEIGHBORS_BUILD_MAX", "10000"))
+# The server fits the TF-IDF index itself only for catalogs up to INDEX_FIT_MAX_ROWS rows (fitting
+# 50k peaks near 500 MiB); larger ones fail to load until `python -m app.vectorstore` built it (0 = no limit)
+INDEX_FIT_MAX_ROWS = int(os.getenv("INDEX_FIT_MAX_ROWS", "20000"))
+# Daily LLM quota per client IP: "memory" (per process; bounded, expiring) or "sqlite"
+# (one budget shared by every worker using LLM_QUOTA_PATH)
+LLM_QUOTA_STORE = os.getenv("LLM_QUOTA_STORE", "memory")
+LLM_QUOTA_MAX_KEYS = int(os.getenv("LLM_QUOTA_MAX_KEYS", "100000"))
+# Server-Timing header with per-stage milliseconds on every response (SERVER_TIMING=0 hides it)
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1") != "0"
+# Sampling profiler: requests sending `X-Profile: <PROFILE_TOKEN>` (unset = disabled) are
+# sampled every PROFILE_INTERVAL_MS and written to PROFILE_DIR as folded stacks
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+# Seconds sent as Retry-After by the 503s answered while the catalog is still loading
+WARMUP_RETRY_AFTER = int(os.getenv("WARMUP_RETRY_AFTER", "5"))
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    # the catalog loads on a thread: uvicorn binds the port (and /api/health answers) right away
+    await _llm_startup()
+    _batch_pool_startup()
+    threading.Thread(target=_warmup, name="catalog-warmup", daemon=True).start()
+    yield
+    _batch_pool_shutdown()
+    await _llm_shutdown()
+
 
 # --- FastAPI setup ---
-app = FastAPI(title="Perfume Recommender", version="0.5.1")
+app = FastAPI(title="Perfume Recommender", version="0.5.1", lifespan=_lifespan)
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
@@ -63,6 +143,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
+)
+# outermost: times the whole request, CORS included
+app.add_middleware(
+    MetricsMiddleware,
+    server_timing=SERVER_TIMING,
+    profile_token=PROFILE_TOKEN,
+    profile_dir=Path(os.getenv("PROFILE_DIR", str(BASE_DIR / "data" / "profiles"))),
+    profile_interval=PROFILE_INTERVAL_MS / 1000,
 )
 
 def _client_ip(request: Request) -> str:
@@ -75,68 +164,36 @@ def _client_ip(request: Request) -> str:
         return xri.strip()
     return request.client.host if request.client else "unknown"
 
-def _llm_reset_if_needed(rec: dict, now: datetime) -> None:
-    if now >= rec["reset_at"]:
-        rec["count"] = 0
-        rec["reset_at"] = now + timedelta(hours=24)
-
-def _llm_take(ip: str, tokens: int, now: datetime) -> tuple[bool, int]:
-    """
-    Attempt to consume `tokens` from the user's daily budget.
-    Returns (allowed: bool, remaining_after: int).
-    """
-    if tokens <= 0:
-        rec = _LLM_USAGE.get(ip)
-        if not rec:
-            _LLM_USAGE[ip] = {"count": 0, "reset_at": now + timedelta(hours=24)}
-            return True, LLM_DAILY_LIMIT
-        _llm_reset_if_needed(rec, now)
-        return True, max(0, LLM_DAILY_LIMIT - rec["count"])
-
-    rec = _LLM_USAGE.get(ip)
-    if not rec:
-        rec = {"count": 0, "reset_at": now + timedelta(hours=24)}
-        _LLM_USAGE[ip] = rec
-    _llm_reset_if_needed(rec, now)
-
-    if rec["count"] + tokens <= LLM_DAILY_LIMIT:
-        rec["count"] += tokens
-        return True, LLM_DAILY_LIMIT - rec["count"]
-    else:
-        # Not enough budget to take all tokens
-        return False, max(0, LLM_DAILY_LIMIT - rec["count"])
-
-DATA_PATH = BASE_DIR / "data" / "perfumes.csv"
-
-DF: pd.DataFrame = pd.DataFrame()
-STORE: Optional[SimpleStore] = None
-
-
-# === Load dataset ===
-def load_df() -> pd.DataFrame:
-    if DATA_PATH.exists():
-        try:
-            df = pd.read_csv(DATA_PATH)
-            numeric_cols = [
-                "price_min", "price_max",
-                "longevity", "sillage",
-                "rating_value", "rating_count"
-            ]
-            for c in numeric_cols:
-                if c in df.columns:
-                    df[c] = pd.to_numeric(df[c], errors="coerce")
-            for c in ["brand", "name", "gender", "main_accords", "description", "url"]:
-                if c in df.columns:
-                    df[c] = df[c].fillna("")
-
-            #  NEW: limit dataset to 5000 random samples for memory safety
-            if len(df) > 5000:
-                df = df.sample(5000, random_state=42).reset_index(drop=True)
-
-            return df
-        except Exception as e:
-            print("⚠️ Failed to load perfumes.csv:", e)
-    return pd.DataFrame()
+DATA_PATH = Path(os.getenv("CATALOG_PATH", str(BASE_DIR / "data" / "perfumes.csv")))
+# Persisted TF-IDF index (build offline with `python -m app.vectorstore`)
+INDEX_DIR = Path(os.getenv("TFIDF_INDEX_DIR", str(BASE_DIR / "data" / "index")))
+
+EXPLAIN_CACHE_PATH = os.getenv("EXPLAIN_CACHE_PATH", str(BASE_DIR / "data" / "explain_cache.sqlite3"))
+LLM_QUOTA_PATH = Path(os.getenv("LLM_QUOTA_PATH", str(BASE_DIR / "data" / "llm_quota.sqlite3")))
+
+# Set CATALOG_COMPACT=0 to keep plain pandas columns; CATALOG_MAX_ROWS>0 samples the catalog.
+CATALOG_COMPACT = os.getenv("CATALOG_COMPACT", "1") != "0"
+CATALOG_MAX_ROWS = int(os.getenv("CATALOG_MAX_ROWS", "0"))
+# Hot reload: POST /api/admin/reload with X-Admin-Token (unset = disabled);
+# CATALOG_WATCH_SECONDS>0 also polls perfumes.csv and reloads when it changes
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+CATALOG_WATCH_SECONDS = float(os.getenv("CATALOG_WATCH_SECONDS", "0"))
+# With ADMIN_TOKEN set, every worker checks TFIDF_INDEX_DIR/reload.json this often, so an
+# admin reload answered by one worker reaches the others (used when CATALOG_WATCH_SECONDS is 0)
+RELOAD_SIGNAL_SECONDS = float(os.getenv("RELOAD_SIGNAL_SECONDS", "2"))
+# Several uvicorn workers: SHARED_SNAPSHOT=1 lets one worker build the catalog arrays and
+# indexes into TFIDF_INDEX_DIR/snapshot; every worker memory-maps them instead of its own copy
+SHARED_SNAPSHOT = os.getenv("SHARED_SNAPSHOT", "0") == "1"
+
+# The current catalog + indexes; None until the warmup thread has loaded them,
+# then replaced as a whole by reloads, never mutated
+SNAPSHOT: Optional[Snapshot] = None
+WARMUP_STATUS = {"state": "starting", "seconds": None, "error": None}
+EXPLAIN_CACHE: Optional[ExplanationCache] = None
+QUOTA: Optional[QuotaStore] = None
+BATCH_POOL: Optional[ProcessPoolExecutor] = None
+_RELOAD_LOCK = threading.Lock()
+RELOAD_STATUS = {"state": "idle", "mode": None, "started_at": None, "seconds": None, "error": None}
 
 
 # === Request schema ===
@@ -155,13 +212,212 @@ class RecommendRequest(BaseModel):
     explain: Optional[bool] = False
 
 
-# === Startup event ===
-@app.on_event("startup")
-def _startup():
-    global DF, STORE
-    DF = load_df()
-    STORE = SimpleStore(DF) if len(DF) else None
-    print(f"✅ Loaded catalog: {len(DF)} perfumes")
+# === Startup (warmup thread) ===
+def _warmup() -> None:
+    """Load or build the first snapshot; until it is installed, catalog routes answer 503."""
+    global _SIGNAL_SEEN
+    t0 = time.perf_counter()
+    try:
+        from .snapshot import build_snapshot
+        snap = _load(lambda: build_snapshot(DATA_PATH, INDEX_DIR, CATALOG_COMPACT, CATALOG_MAX_ROWS,
+                                            NEIGHBORS_TOP_N, NEIGHBORS_BUILD_MAX, version=1,
+                                            dense_dims=RETRIEVAL_DIMS, fit_max_rows=INDEX_FIT_MAX_ROWS),
+                     version=1, full=True)
+    except Exception as e:
+        print("⚠️ Catalog warmup failed:", repr(e))
+        WARMUP_STATUS.update(state="failed", error=repr(e), seconds=round(time.perf_counter() - t0, 3))
+        return
+    WARMUP_STATUS.update(state="ready", seconds=round(time.perf_counter() - t0, 3))
+    _install(snap)
+    if CATALOG_WATCH_SECONDS > 0 or ADMIN_TOKEN:
+        _SIGNAL_SEEN = _read_reload_signal().get("generation")  # signals older than this worker are done
+        threading.Thread(target=_watch_catalog, name="catalog-watch", daemon=True).start()
+
+
+def _check_ready() -> None:
+    if SNAPSHOT is None:
+        raise HTTPException(status_code=503, detail="Catalog is loading, please retry shortly.",
+                            headers={"Retry-After": str(WARMUP_RETRY_AFTER)})
+
+
+def _load(build, version: int, full: bool = False) -> Snapshot:
+    """
+    `build()`, or with SHARED_SNAPSHOT the snapshot saved by whichever worker built it first
+    (unless `full` and that one was only appended to).
+    """
+    if not SHARED_SNAPSHOT:
+        return build()
+    from .snapshot import shared_snapshot
+    return shared_snapshot(DATA_PATH, INDEX_DIR, build, CATALOG_COMPACT, CATALOG_MAX_ROWS, version, RETRIEVAL_DIMS,
+                           full)
+
+
+def _install(snap: Snapshot) -> None:
+    """Make `snap` the current snapshot (one reference assignment; in-flight requests keep theirs)."""
+    global SNAPSHOT
+    if snap.store is not None and QUERY_CACHE_MB > 0:
+        snap.store.enable_cache(int(QUERY_CACHE_MB * 2**20), QUERY_CACHE_TTL, QUERY_CACHE_SIMS)
+    SNAPSHOT = snap
+    if BATCH_POOL is not None and snap.directory is not None:
+        # start (or re-point) the batch workers now rather than on the first large batch
+        for _ in range(BATCH_PROCESSES):
+            BATCH_POOL.submit(_attach, str(snap.directory), snap.source, snap.version)
+    print(f"✅ Loaded catalog: {len(snap)} perfumes ({snap.catalog.nbytes / 2**20:.1f} MiB"
+          f"{', shared' if snap.shared else ''}), version {snap.version}")
+    _trim_heap()
+
+
+def _trim_heap() -> None:
+    """Hand the heap freed by a load (CSV parsing, index build, the replaced snapshot) back to the OS."""
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)  # glibc keeps freed arenas mapped otherwise
+    except (OSError, AttributeError):  # not glibc: nothing to do
+        pass
+
+
+# === Hot reload ===
+def _reload(mode: str = "auto", signal: bool = False) -> None:
+    """
+    Build a new snapshot off the request path and swap it in. "append" only
+    vectorizes rows added at the end of perfumes.csv, "full" reloads everything,
+    "auto" tries append first. With `signal`, the other workers are told to reload too.
+    """
+    if not _RELOAD_LOCK.acquire(blocking=False):
+        return
+    from .snapshot import append_snapshot, build_snapshot
+    t0 = time.perf_counter()
+    RELOAD_STATUS.update(state="running", mode=mode, started_at=time.time(), seconds=None, error=None)
+    try:
+        old = SNAPSHOT
+
+        def build() -> Snapshot:
+            nonlocal mode
+            snap = None
+            if mode in ("auto", "append") and not CATALOG_MAX_ROWS:
+                snap = append_snapshot(old, DATA_PATH, INDEX_DIR, CATALOG_COMPACT, version=old.version + 1)
+                if snap is None and mode == "append":
+                    raise ValueError("perfumes.csv is not an append of the loaded catalog")
+                if snap is not None:
+                    mode = "append"
+            if snap is None:
+                mode = "full"
+                if old.store is not None:
+                    # the old snapshot's indexes are mapped; its query cache (up to QUERY_CACHE_MB) is the
+                    # private memory it would hold next to a refit, and the new snapshot starts a cache anyway
+                    old.store.disable_cache()
+                snap = build_snapshot(DATA_PATH, INDEX_DIR, CATALOG_COMPACT, CATALOG_MAX_ROWS,
+                                      NEIGHBORS_TOP_N, NEIGHBORS_BUILD_MAX, version=old.version + 1,
+                                      dense_dims=RETRIEVAL_DIMS, fit_max_rows=INDEX_FIT_MAX_ROWS)
+            return snap
+
+        # with SHARED_SNAPSHOT another worker may have built it already (mode stays as requested)
+        snap = _load(build, version=old.version + 1, full=mode == "full")
+        _install(snap)
+        RELOAD_STATUS.update(state="idle", mode=mode)
+        if signal:
+            _write_reload_signal(mode)
+    except Exception as e:
+        print("⚠️ Catalog reload failed:", repr(e))
+        RELOAD_STATUS.update(state="failed", error=repr(e))
+    finally:
+        RELOAD_STATUS["seconds"] = round(time.perf_counter() - t0, 3)
+        _RELOAD_LOCK.release()
+
+
+def _watch_catalog() -> None:
+    """Reload when perfumes.csv changes (CATALOG_WATCH_SECONDS>0) or another worker signals an admin reload."""
+    global _SIGNAL_SEEN
+    from .snapshot import file_signature
+    while True:
+        time.sleep(CATALOG_WATCH_SECONDS if CATALOG_WATCH_SECONDS > 0 else RELOAD_SIGNAL_SECONDS)
+        if _RELOAD_LOCK.locked():
+            continue
+        signal = _read_reload_signal()
+        if signal.get("generation") != _SIGNAL_SEEN:
+            _SIGNAL_SEEN = signal.get("generation")
+            print(f"ℹ️ Reload ({signal.get('mode')}) requested through another worker, reloading")
+            _reload(signal.get("mode") or "auto")
+        elif CATALOG_WATCH_SECONDS > 0 and file_signature(DATA_PATH) != SNAPSHOT.source:
+            print("ℹ️ perfumes.csv changed, reloading")
+            _reload("auto")
+
+
+# --- Reload signal: INDEX_DIR/reload.json, rewritten by the worker that ran an admin reload ---
+_SIGNAL_SEEN: Optional[int] = None  # generation of the last signal this worker acted on (or wrote)
+
+
+def _read_reload_signal() -> dict:
+    try:
+        with open(INDEX_DIR / "reload.json", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_reload_signal(mode: str) -> None:
+    global _SIGNAL_SEEN
+    _SIGNAL_SEEN = time.time_ns()
+    path = INDEX_DIR / "reload.json"
+    tmp = path.with_name(f"reload.json.tmp-{os.getpid()}")
+    try:
+        INDEX_DIR.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"generation": _SIGNAL_SEEN, "mode": mode, "pid": os.getpid()}, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        print("⚠️ Could not write the reload signal:", e)
+
+
+def _check_admin(token: Optional[str]) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Reload is disabled (ADMIN_TOKEN not set).")
+    if token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+
+@app.post("/api/admin/reload", status_code=202)
+def admin_reload(mode: str = "auto", x_admin_token: Optional[str] = Header(None)):
+    """
+    Start a background reload of perfumes.csv (mode: auto | append | full). Once it is
+    installed, the other workers follow within RELOAD_SIGNAL_SECONDS (see `_watch_catalog`).
+    """
+    _check_admin(x_admin_token)
+    _check_ready()
+    if mode not in ("auto", "append", "full"):
+        raise HTTPException(status_code=400, detail="mode must be auto, append or full.")
+    if _RELOAD_LOCK.locked():
+        raise HTTPException(status_code=409, detail="A reload is already running.")
+    threading.Thread(target=_reload, args=(mode, True), name="catalog-reload", daemon=True).start()
+    return {"accepted": True, "mode": mode, "version": SNAPSHOT.version}
+
+
+@app.get("/api/admin/reload")
+def admin_reload_status(x_admin_token: Optional[str] = Header(None)):
+    _check_admin(x_admin_token)
+    snap = SNAPSHOT
+    return {**RELOAD_STATUS, "version": snap.version if snap else 0, "catalog_size": len(snap) if snap else 0}
+
+
+async def _llm_startup():
+    global EXPLAIN_CACHE, QUOTA
+    await open_client()
+    if QUOTA is None:
+        QUOTA = open_quota_store(LLM_QUOTA_STORE, LLM_DAILY_LIMIT, LLM_QUOTA_PATH, LLM_QUOTA_MAX_KEYS)
+    if EXPLAIN_CACHE is None and EXPLAIN_CACHE_MB > 0:
+        EXPLAIN_CACHE = ExplanationCache(Path(EXPLAIN_CACHE_PATH) if EXPLAIN_CACHE_PATH else None,
+                                         int(EXPLAIN_CACHE_MB * 2**20), EXPLAIN_CACHE_TTL, EXPLAIN_CACHE_MAX_ROWS)
+
+
+async def _llm_shutdown():
+    global EXPLAIN_CACHE, QUOTA
+    await close_client()
+    if QUOTA is not None:
+        QUOTA.close()
+        QUOTA = None
+    if EXPLAIN_CACHE is not None:
+        EXPLAIN_CACHE.close()
+        EXPLAIN_CACHE = None
 
 
 @app.get("/")
@@ -178,167 +434,495 @@ def about(request: Request):
 
 @app.get("/api/health")
 def health():
-    return {"ok": True, "catalog_size": int(len(DF))}
+    """Liveness: answers as soon as the port is bound, also while the catalog loads (see /api/ready)."""
+    snap = SNAPSHOT
+    query_cache = snap.store.cache if snap is not None and snap.store is not None else None
+    return {
+        "ok": True,
+        "ready": snap is not None,
+        "catalog_size": int(len(snap)) if snap else 0,
+        "catalog_version": snap.version if snap else 0,
+        "retrieval": ("dense" if snap.store.dense is not None else "sparse") if snap and snap.store is not None else None,
+        "query_cache": query_cache.stats() if query_cache is not None else None,
+        "explain_cache": EXPLAIN_CACHE.stats() if EXPLAIN_CACHE is not None else None,
+        "llm_quota": QUOTA.stats() if QUOTA is not None else None,
+        "llm": llm_stats() if llm_available() else None,
+    }
+
+
+@app.get("/api/ready")
+async def ready():
+    """Readiness: 200 once the catalog and indexes are loaded, else 503 with Retry-After."""
+    snap = SNAPSHOT
+    body = {"ready": snap is not None, **WARMUP_STATUS, "catalog_size": len(snap) if snap else 0}
+    if snap is None:
+        return JSONResponse(body, status_code=503, headers={"Retry-After": str(WARMUP_RETRY_AFTER)})
+    return body
+
+
+# === Prometheus metrics (per worker process; scrape each worker or aggregate by instance) ===
+LLM_EXPLANATIONS = register(Counter("perfume_llm_explanations_total",
+                                    "AI explanations returned, by source (cache or model).", ("source",)))
+LLM_REQUESTS = register(Counter("perfume_llm_requests_total",
+                                "Requests that needed the model, by outcome (sent or quota_limited).", ("outcome",)))
+
+
+def _metric_families():
+    """Gauges and counters read at scrape time from the snapshot, caches, quota and LLM client."""
+    snap = SNAPSHOT
+    yield family("perfume_ready", "1 once the catalog and indexes are loaded.", "gauge", [({}, snap is not None)])
+    yield family("perfume_catalog_size", "Perfumes in the served catalog.", "gauge", [({}, len(snap) if snap else 0)])
+    yield family("perfume_catalog_version", "Catalog version, bumped by every reload.", "gauge",
+                 [({}, snap.version if snap else 0)])
+    caches = {}
+    query_cache = snap.store.cache if snap is not None and snap.store is not None else None
+    if query_cache is not None:
+        caches["query"] = query_cache.stats()
+    if EXPLAIN_CACHE is not None:
+        caches["explain"] = EXPLAIN_CACHE.stats()
+    for kind in ("hits", "misses", "evictions"):
+        yield family(f"perfume_cache_{kind}_total", f"Cache {kind} (reset when the query cache is rebuilt).",
+                     "counter", [({"cache": name}, st[kind]) for name, st in caches.items()])
+    yield family("perfume_cache_hit_ratio", "Hits / lookups since the cache was created.", "gauge",
+                 [({"cache": name}, st["hit_ratio"]) for name, st in caches.items()])
+    yield family("perfume_cache_bytes", "Bytes held by the in-memory cache.", "gauge",
+                 [({"cache": name}, st["bytes"]) for name, st in caches.items()])
+    if QUOTA is not None:
+        yield family("perfume_llm_quota_keys", "Client IPs tracked by the LLM quota store.", "gauge",
+                     [({}, QUOTA.stats().get("keys", 0))])
+    stats = llm_stats() if llm_available() else None
+    if stats:
+        chunks = stats["chunks"]
+        yield family("perfume_llm_chunks_total", "LLM calls (one per chunk) by chunk size and outcome.", "counter",
+                     [({"size": size, "outcome": outcome}, rec[outcome])
+                      for size, rec in chunks.items() for outcome in ("ok", "failed", "timeout", "cancelled")])
+        yield family("perfume_llm_hedged_total", "LLM calls that fired a hedged duplicate.", "counter",
+                     [({"size": size}, rec["hedged"]) for size, rec in chunks.items()])
+
+
+@app.get("/api/metrics")
+def metrics():
+    return PlainTextResponse(render(_metric_families()), media_type=CONTENT_TYPE)
 
 
 # === Scoring helper ===
-def _final_score(content_sim: float,
-                 usecase: float,
-                 longevity: float,
-                 rating_value: float,
-                 rating_count: float) -> float:
-    """Composite weighted score."""
-    rating_norm = max(min(rating_value / 5.0, 1.0), 0.0)
-    count_norm = min(max(rating_count, 0.0) / 2000.0, 1.0)
-    longevity_norm = max(min(longevity / 5.0, 1.0), 0.0)
+def _final_scores(content_sim: np.ndarray,
+                  usecase: np.ndarray,
+                  longevity: np.ndarray,
+                  rating_value: np.ndarray,
+                  rating_count: np.ndarray) -> np.ndarray:
+    """
+    Composite weighted score over whole candidate arrays (tests/test_scoring.py
+    checks it against the original per-row formula).
+    """
+    rating_norm = np.clip(rating_value / 5.0, 0.0, 1.0)
+    count_norm = np.minimum(np.maximum(rating_count, 0.0) / 2000.0, 1.0)
+    longevity_norm = np.clip(longevity / 5.0, 0.0, 1.0)
     return (
-        0.40 * float(content_sim)
-        + 0.15 * float(usecase)
-        + 0.15 * float(longevity_norm)
-        + 0.20 * float(rating_norm)
-        + 0.10 * float(count_norm)
+        0.40 * content_sim
+        + 0.15 * usecase
+        + 0.15 * longevity_norm
+        + 0.20 * rating_norm
+        + 0.10 * count_norm
     )
 
 
-# === Main recommendation route ===
-@app.post("/api/recommend")
-
-
-def recommend(req: RecommendRequest, request: Request):
-    if STORE is None or DF.empty:
-        return {"results": [], "message": "Catalog is empty.", "llm_used": False}
+# === Recommendation pipeline (shared by single and batch routes) ===
+DEFAULT_QUERY = "fresh versatile office citrus"
 
-    # --- Apply safety limits (do NOT disable explain; just cap how many we explain) ---
-    k = min(int(req.k or 8), MAX_K)
-    explain_n = min(MAX_LLM_EXPLAINS, k)
 
+def _liked_rows(snap: Snapshot, req: RecommendRequest) -> Tuple[np.ndarray, List[str]]:
+    """Liked perfumes found in the catalog (sorted row ids) and the names that were not."""
     liked = req.liked or []
-    preferred_notes = req.preferred_notes or []
-    use_cases = req.use_cases or []
-
-    # --- Build semantic query ---
-    query_text = " ".join(liked + preferred_notes).strip() or "fresh versatile office citrus"
-    sims = STORE.query_text(query_text)
-
-    candidates = DF.copy()
-
-    # --- Apply filters ---
+    if snap.neighbors is None:
+        return np.empty(0, dtype=np.int32), liked
+    rows = [snap.names.lookup(name) for name in liked]
+    found = sorted({r for r in rows if r is not None})
+    return np.array(found, dtype=np.int32), [name for name, r in zip(liked, rows) if r is None]
+
+
+def _query_text(req: RecommendRequest, unresolved: Optional[List[str]] = None) -> str:
+    """Notes plus liked names as text; with `unresolved`, only the liked names not matched to a row."""
+    from .vectorstore import normalize_query
+    liked = (req.liked or []) if unresolved is None else unresolved
+    return normalize_query(liked + (req.preferred_notes or []))
+
+
+def _with_neighbors(snap: Snapshot, text_hits: Optional[Hits], liked: np.ndarray) -> Hits:
+    """Blend the liked perfumes' neighbor lists with the text hits (equal weight when both exist)."""
+    if not len(liked):
+        return text_hits
+    from .vectorstore import Hits
+    hits = snap.neighbors.merge(liked)
+    if text_hits is None:
+        return hits
+    ids = np.union1d(text_hits.ids, hits.ids).astype(np.int32)
+    return Hits(ids, (text_hits.lookup(ids) + hits.lookup(ids)) / 2)
+
+
+def _retrieve(snap: Snapshot, req: RecommendRequest) -> Tuple[Hits, np.ndarray]:
+    """Content similarity hits for the request, plus the liked rows resolved by name."""
+    with stage("liked"):
+        liked, unresolved = _liked_rows(snap, req)
+    text = _query_text(req, unresolved)
+    text_hits = None
+    if text or not len(liked):
+        text_hits = snap.store.search(text or DEFAULT_QUERY, top_n=RETRIEVAL_TOP_N or None)
+    with stage("liked"):
+        return _with_neighbors(snap, text_hits, liked), liked
+
+
+def _candidate_ids(snap: Snapshot, req: RecommendRequest, hits: Hits,
+                   liked: Optional[np.ndarray] = None) -> np.ndarray:
+    """Row ids that pass the request's filters (row ids straight from the prebuilt index)."""
+    ranges = []
     if req.price_min is not None:
-        candidates = candidates[candidates["price_min"] >= req.price_min]
+        ranges.append(("price_min", req.price_min, None))
     if req.price_max is not None:
-        candidates = candidates[candidates["price_max"] <= req.price_max]
+        ranges.append(("price_max", None, req.price_max))
     if req.rating_min:
-        candidates = candidates[candidates["rating_value"] >= req.rating_min]
+        ranges.append(("rating_value", req.rating_min, None))
     if req.rating_count_min:
-        candidates = candidates[candidates["rating_count"] >= req.rating_count_min]
+        ranges.append(("rating_count", req.rating_count_min, None))
     if req.longevity_min:
-        candidates = candidates[candidates["longevity"] >= req.longevity_min]
+        ranges.append(("longevity", req.longevity_min, None))
     if req.sillage_min:
-        candidates = candidates[candidates["sillage"] >= req.sillage_min]
-    if req.gender and req.gender.lower() not in ("any", "all", "none"):
-        candidates = candidates[candidates["gender"].str.lower() == req.gender.lower()]
-    if liked:
-        candidates = candidates[~candidates["name"].str.lower().isin([s.lower() for s in liked])]
-
-    if candidates.empty:
-        return {"results": [], "message": "No matches after filters.", "llm_used": False}
-
-    # --- Compute scores ---
-    uc_scores = []
-    for _, row in candidates.iterrows():
-        uc_scores.append(usecase_score(accords_set(row), use_cases))
-    content_sim = sims[candidates.index]
-
-    scores = []
-    for (idx, row), uc, cs in zip(candidates.iterrows(), uc_scores, content_sim):
-        scores.append(_final_score(
-            content_sim=cs,
-            usecase=uc,
-            longevity=float(row.get("longevity", 3) or 3),
-            rating_value=float(row.get("rating_value", 0) or 0),
-            rating_count=float(row.get("rating_count", 0) or 0),
-        ))
-
-    candidates = candidates.assign(
-        content_sim=content_sim,
-        usecase=uc_scores,
-        score=scores
-    )
+        ranges.append(("sillage", req.sillage_min, None))
+    gender = req.gender if req.gender and req.gender.lower() not in ("any", "all", "none") else None
+    # pool mode only when the query matched something; otherwise fall back to the whole catalog
+    pool = hits.ids if RETRIEVAL_TOP_N and len(hits.ids) else None
+    ids = snap.filters.select(ranges, gender=gender, exclude_names=req.liked or [], within=pool)
+    # liked perfumes matched by normalized / fuzzy name are excluded too
+    if liked is not None and len(liked) and len(ids):
+        ids = ids[~np.isin(ids, liked)]
+    return ids
+
+
+def _baseline_why(content_sim: float, usecase: float, longevity: float,
+                  rating_value: float, rating_count: float) -> str:
+    bits = []
+    if content_sim > 0.3: bits.append("matches your scent profile")
+    if usecase > 0.6: bits.append("fits your use-cases")
+    if longevity >= 4: bits.append("long-lasting performance")
+    if rating_value >= 4.2 and rating_count >= 200:
+        bits.append("strong community ratings")
+    return "; ".join(bits) or "balanced match"
+
+
+def _result_items(snap: Snapshot, ids: np.ndarray, content_sim: np.ndarray,
+                  uc_scores: np.ndarray, scores: np.ndarray) -> List[Result]:
+    """Results for the already-ranked rows `ids`: prebuilt payload plus score and `why`."""
+    # score columns: missing or 0 longevity reads as 3 there, which is < 4 like the raw value
+    cols = snap.score_cols
+    return [
+        Result(snap.payloads[i], round(float(sc), 3), _baseline_why(cs, uc, lon, rv, rc))
+        for i, cs, uc, sc, lon, rv, rc in zip(ids.tolist(), content_sim.tolist(), uc_scores.tolist(),
+                                              scores.tolist(), cols["longevity"][ids].tolist(),
+                                              cols["rating_value"][ids].tolist(), cols["rating_count"][ids].tolist())
+    ]
+
+
+def _rank(req: RecommendRequest):
+    """CPU part of /api/recommend: (results, None) or (None, message) when nothing can be returned."""
+    from .recommender import top_k
+    snap = SNAPSHOT  # one snapshot for the whole request, even if a reload swaps it meanwhile
+    if snap.store is None or snap.catalog.df.empty:
+        return None, "Catalog is empty."
 
-    topk = candidates.sort_values("score", ascending=False).head(k)
+    k = min(int(req.k or 8), MAX_K)
+    use_cases = req.use_cases or []
 
-    # --- Baseline reasoning ---
-    def baseline_why(row) -> str:
-        bits = []
-        if row["content_sim"] > 0.3: bits.append("matches your scent profile")
-        if row["usecase"] > 0.6: bits.append("fits your use-cases")
-        try:
-            if float(row.get("longevity", 0)) >= 4: bits.append("long-lasting performance")
-        except Exception:
-            pass
-        try:
-            if float(row.get("rating_value", 0)) >= 4.2 and float(row.get("rating_count", 0)) >= 200:
-                bits.append("strong community ratings")
-        except Exception:
-            pass
-        return "; ".join(bits) or "balanced match"
-
-    results = []
-    for _, row in topk.iterrows():
-        results.append({
-            "brand": row["brand"],
-            "name": row["name"],
-            "gender": row.get("gender", ""),
-            "price_range": [int(row.get("price_min", 0) or 0), int(row.get("price_max", 0) or 0)],
-            "accords": (row.get("main_accords") or "").split("|"),
-            "longevity": float(row.get("longevity", 0) or 0),
-            "sillage": float(row.get("sillage", 0) or 0),
-            "rating_value": float(row.get("rating_value", 0) or 0),
-            "rating_count": int(row.get("rating_count", 0) or 0),
-            "url": row.get("url", ""),
-            "description": row.get("description", ""),
-            "score": round(float(row["score"]), 3),
-            "why": baseline_why(row),
-        })
+    # --- Build semantic query (text + precomputed neighbors of liked perfumes) ---
+    hits, liked = _retrieve(snap, req)
+
+    # --- Apply filters ---
+    with stage("filter"):
+        ids = _candidate_ids(snap, req, hits, liked)
+
+    if not len(ids):
+        return None, "No matches after filters."
+
+    # --- Compute scores (columnar, gathering only the surviving rows) ---
+    with stage("score"):
+        content_sim = hits.lookup(ids)
+        uc_scores = snap.accords.usecase_scores(ids, use_cases)
+        scores = _final_scores(
+            content_sim=content_sim,
+            usecase=uc_scores,
+            longevity=snap.score_cols["longevity"][ids],
+            rating_value=snap.score_cols["rating_value"][ids],
+            rating_count=snap.score_cols["rating_count"][ids],
+        )
+
+    # --- Top-k on the flat score array; only these k rows are materialized ---
+    with stage("topk"):
+        order = top_k(scores, k)
+    with stage("serialize"):
+        return _result_items(snap, ids[order], content_sim[order], uc_scores[order], scores[order]), None
+
+
+def _explain_count(req: RecommendRequest, results: List[Result]) -> int:
+    """How many of the top results get an LLM explanation attempt (0 when explain is off)."""
+    if not (getattr(req, "explain", False) and llm_available() and results):
+        return 0
+    # --- Apply safety limits (do NOT disable explain; just cap how many we explain) ---
+    k = min(int(req.k or 8), MAX_K)
+    return min(MAX_LLM_EXPLAINS, k, len(results))
+
+
+async def _explanations(req: RecommendRequest, request: Request,
+                        results: List[Result], status: dict) -> AsyncIterator[Tuple[int, str]]:
+    """
+    Yield (result index, ai_why) as explanations become available: cached ones
+    first, then the model's answers. Fills `status` with llm_used / llm_limited / llm_remaining.
+    """
+    explain_n = _explain_count(req, results)
+    if not explain_n:
+        return
 
     # --- LLM reasoning (up to explain_n items) with DAILY IP QUOTA ---
-    llm_used = False
-    llm_limited = False
-    llm_remaining = None  # optional to show in UI
-
-    if getattr(req, "explain", False) and llm_available() and results:
-        now = datetime.now(timezone.utc)
-        ip = _client_ip(request)
-
-        # We charge "tokens" equal to how many items we'll explain this request
-        tokens = min(explain_n, len(results))
-
-        allowed, remaining = _llm_take(ip, tokens, now)
-        llm_remaining = remaining
-
-        if allowed:
-            explain_slice = results[:tokens]
-            context = {
-                "liked": liked,
-                "use_cases": use_cases,
-                "preferred_notes": preferred_notes,
-                "budget": f"{req.price_min}–{req.price_max} PLN"
-                           if (req.price_min or req.price_max) else "unspecified",
-            }
-            ai_texts = llm_explain(context, explain_slice)
-            if any(ai_texts):
-                for i, txt in enumerate(ai_texts):
-                    if txt and i < len(results):
-                        results[i]["ai_why"] = txt
-                llm_used = True
-        else:
-            llm_limited = True
-    print("llm_used" , llm_used)
-    print("llm_limited" , llm_limited)
-    print("llm_remaining" , llm_remaining)
-    return {
-        "results": results,
-        "llm_used": llm_used,
-        "llm_limited": llm_limited,
-        "llm_remaining": llm_remaining,  # optional for UI
-    }
\ No newline at end of file
+    ip = _client_ip(request)
+
+    explain_slice = [r.to_dict() for r in results[:explain_n]]
+    context = {
+        "liked": req.liked or [],
+        "use_cases": req.use_cases or [],
+        "preferred_notes": req.preferred_notes or [],
+        "budget": f"{req.price_min}–{req.price_max} PLN"
+                   if (req.price_min or req.price_max) else "unspecified",
+        "price_min": req.price_min,
+        "price_max": req.price_max,
+    }
+
+    # Cached explanations are free; only the misses go to the model (and to the quota)
+    keys = [explain_key(context, c, LLM_MODEL) for c in explain_slice]
+    # the disk tier is SQLite I/O: run it in the threadpool, like the quota take below
+    cached = await run_in_threadpool(EXPLAIN_CACHE.get_many, keys) if EXPLAIN_CACHE is not None else [None] * len(keys)
+    for i, txt in enumerate(cached):
+        if txt:
+            status["llm_used"] = True
+            LLM_EXPLANATIONS.inc("cache")
+            yield i, txt
+    misses = [i for i, txt in enumerate(cached) if not txt]
+
+    # We charge "tokens" equal to how many items we'll send to the model this request
+    tokens = len(misses)
+
+    # the SQLite store waits on a cross-process write lock: keep it off the event loop
+    allowed, remaining = await run_in_threadpool(QUOTA.take, ip, tokens)
+    status["llm_remaining"] = remaining
+
+    if allowed and misses:
+        LLM_REQUESTS.inc("sent")
+        # chunked concurrent prompts: items arrive per chunk, unfinished ones are dropped at the deadline
+        async for j, txt in llm_explain_stream(context, [explain_slice[i] for i in misses]):
+            i = misses[j]
+            if EXPLAIN_CACHE is not None:
+                await run_in_threadpool(EXPLAIN_CACHE.put_many, {keys[i]: txt})
+            status["llm_used"] = True
+            LLM_EXPLANATIONS.inc("model")
+            yield i, txt
+    elif not allowed:
+        LLM_REQUESTS.inc("quota_limited")
+        status["llm_limited"] = True
+
+
+def _llm_status() -> dict:
+    return {"llm_used": False, "llm_limited": False, "llm_remaining": None}  # remaining: optional to show in UI
+
+
+# === Autocomplete for the liked-perfumes field ===
+@app.get("/api/suggest")
+async def suggest(q: str = Query("", max_length=100), limit: int = Query(SUGGEST_LIMIT, ge=1, le=20)):
+    """Perfumes whose name or "brand name" starts with `q` (or nearly, for typos), most rated first."""
+    _check_ready()
+    snap = SNAPSHOT
+    # sub-millisecond index lookup: answered on the event loop, no threadpool hop
+    suggestions = []
+    for i in snap.suggest.suggest(q, limit):
+        row = snap.catalog.row(i, ("brand", "name"))
+        suggestions.append({"brand": row.get("brand"), "name": row.get("name"),
+                            "rating_count": int(np.nan_to_num(snap.score_cols["rating_count"][i]))})
+    return JSONBytesResponse(dumps({"q": q, "suggestions": suggestions}))
+
+
+# === Main recommendation route ===
+@app.post("/api/recommend")
+async def recommend(req: RecommendRequest, request: Request):
+    _check_ready()
+    # Ranking is CPU-bound: run it on the threadpool, keep the event loop free for LLM I/O
+    results, message = await run_in_threadpool(_rank, req)
+    if results is None:
+        return {"results": [], "message": message, "llm_used": False}
+
+    status = _llm_status()
+    with stage("llm"):
+        async for i, txt in _explanations(req, request, results, status):
+            results[i].ai_why = txt
+    # rendered here rather than by FastAPI so the JSON encoding shows up as a timed stage
+    with stage("serialize"):
+        return JSONBytesResponse(response_json(results, **status))
+
+
+# === Streaming variant (NDJSON: ranked results first, then one event per explanation) ===
+def _ndjson(event: dict) -> bytes:
+    return dumps(event) + b"\n"
+
+
+@app.post("/api/recommend/stream")
+async def recommend_stream(req: RecommendRequest, request: Request):
+    """
+    Events, one JSON object per line:
+      {"type": "results", "results": [...], "explaining": n}   baseline ranking with `why`
+      {"type": "ai_why", "index": i, "ai_why": "..."}           one per explained result
+      {"type": "done", "llm_used": ..., "llm_limited": ..., "llm_remaining": ...}
+    """
+    _check_ready()
+    async def events():
+        results, message = await run_in_threadpool(_rank, req)
+        if results is None:
+            yield _ndjson({"type": "results", "results": [], "message": message, "explaining": 0})
+            yield _ndjson({"type": "done", **_llm_status()})
+            return
+        # sent before any LLM work starts, so time-to-first-result is ranking time only
+        yield (b'{"type":"results","results":' + results_json(results)
+               + b',"explaining":' + dumps(_explain_count(req, results)) + b"}\n")
+        status = _llm_status()
+        with stage("llm"):
+            async for i, txt in _explanations(req, request, results, status):
+                yield _ndjson({"type": "ai_why", "index": i, "ai_why": txt})
+        yield _ndjson({"type": "done", **status})
+
+    # no-transform / X-Accel-Buffering keep proxies from buffering the stream
+    return StreamingResponse(events(), media_type="application/x-ndjson",
+                             headers={"Cache-Control": "no-transform", "X-Accel-Buffering": "no"})
+
+
+# === Batch recommendation route (downstream jobs; no LLM explanations) ===
+def _recommend_chunk(snap: Snapshot, reqs: List[RecommendRequest]) -> List[bytes]:
+    """One vectorized pass: batched retrieval, per-request filters, flat scoring, per-request top-k."""
+    import pandas as pd
+    from .recommender import top_k
+    resolved = [_liked_rows(snap, r) for r in reqs]
+    texts = [_query_text(r, unresolved) for r, (_, unresolved) in zip(reqs, resolved)]
+    queries = [t or DEFAULT_QUERY for t in texts]
+    if RETRIEVAL_TOP_N:
+        hits_list = [snap.store.search(q, top_n=RETRIEVAL_TOP_N) for q in queries]
+    else:
+        hits_list = snap.store.search_many(queries)
+    # same blend as the single route: text hits only when there is text (or nothing was liked)
+    hits_list = [_with_neighbors(snap, h if t or not len(liked) else None, liked)
+                 for h, t, (liked, _) in zip(hits_list, texts, resolved)]
+    with stage("filter"):
+        ids_list = [_candidate_ids(snap, r, h, liked) for r, h, (liked, _) in zip(reqs, hits_list, resolved)]
+
+    # flatten every (request, candidate) pair and score them in one pass
+    with stage("score"):
+        lens = np.array([len(ids) for ids in ids_list], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(lens)])
+        flat = np.concatenate(ids_list) if len(ids_list) else np.empty(0, dtype=np.int32)
+        seg = np.repeat(np.arange(len(reqs)), lens)
+        content_sim = np.concatenate([h.lookup(ids) for h, ids in zip(hits_list, ids_list)]) if len(flat) else np.empty(0)
+
+        uc_scores = np.empty(len(flat))
+        combos = [tuple(r.use_cases or []) for r in reqs]
+        combo_codes, uniques = pd.factorize(pd.Series(combos, dtype=object))
+        for c, combo in enumerate(uniques):
+            sel = combo_codes[seg] == c
+            uc_scores[sel] = snap.accords.usecase_scores(flat[sel], list(combo))
+
+        scores = _final_scores(
+            content_sim=content_sim,
+            usecase=uc_scores,
+            longevity=snap.score_cols["longevity"][flat],
+            rating_value=snap.score_cols["rating_value"][flat],
+            rating_count=snap.score_cols["rating_count"][flat],
+        )
+
+    out = []
+    for r, req in enumerate(reqs):
+        start, stop = offsets[r], offsets[r + 1]
+        if start == stop:
+            out.append(response_json([], message="No matches after filters."))
+            continue
+        k = min(int(req.k or 8), MAX_K)
+        with stage("topk"):
+            order = start + top_k(scores[start:stop], k)
+        with stage("serialize"):
+            out.append(response_json(_result_items(snap, flat[order], content_sim[order], uc_scores[order],
+                                                   scores[order])))
+    return out
+
+
+def _recommend_many(reqs: List[RecommendRequest], snap: Snapshot) -> List[bytes]:
+    """One encoded response per request."""
+    out = []
+    for i in range(0, len(reqs), max(1, BATCH_CHUNK)):
+        out.extend(_recommend_chunk(snap, reqs[i:i + max(1, BATCH_CHUNK)]))
+    return out
+
+
+@app.post("/api/recommend/batch")
+def recommend_batch(reqs: List[RecommendRequest]):
+    """
+    Recommendations for many requests in one call, in request order.
+    `explain` is ignored: batch callers do not get LLM explanations.
+    """
+    if len(reqs) > MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH} requests per batch.")
+    _check_ready()
+    snap = SNAPSHOT
+    if snap.store is None or snap.catalog.df.empty:
+        return {"responses": [{"results": [], "message": "Catalog is empty."} for _ in reqs]}
+
+    responses = None
+    if BATCH_POOL is not None and snap.directory is not None and len(reqs) >= BATCH_PROCESS_MIN:
+        size = -(-len(reqs) // BATCH_PROCESSES)
+        parts = [reqs[i:i + size] for i in range(0, len(reqs), size)]
+        rank = partial(_recommend_attached, str(snap.directory), snap.source, snap.version)
+        try:
+            responses = [resp for part in BATCH_POOL.map(rank, parts) for resp in part]
+        except Exception as e:  # e.g. a reload removed the directory first: answer in-process
+            print("⚠️ Batch pool failed, ranking in-process:", repr(e))
+    if responses is None:
+        responses = _recommend_many(reqs, snap)
+    return JSONBytesResponse(b'{"responses":[' + b",".join(responses) + b"]}")
+
+
+# --- Batch process pool: long-lived spawned workers memory-mapping the shared snapshot ---
+_ATTACHED: Optional[Snapshot] = None  # inside a pool worker: the snapshot it last attached to
+
+
+def _attach(directory: str, source: Tuple[float, int], version: int) -> Snapshot:
+    """In a pool worker: the saved snapshot at `directory`, opened once and reused by later batches."""
+    global _ATTACHED
+    if _ATTACHED is None or str(_ATTACHED.directory) != directory:
+        from .snapshot import Snapshot
+        snap = Snapshot.open(Path(directory), INDEX_DIR, source, version, RETRIEVAL_DIMS)
+        if snap is None:
+            raise RuntimeError(f"snapshot {directory} is gone or stale")
+        _ATTACHED = snap
+    return _ATTACHED
+
+
+def _recommend_attached(directory: str, source: Tuple[float, int], version: int,
+                        reqs: List[RecommendRequest]) -> List[bytes]:
+    return _recommend_many(reqs, _attach(directory, source, version))
+
+
+def _batch_pool_startup() -> None:
+    global BATCH_POOL
+    if BATCH_PROCESSES <= 1 or BATCH_POOL is not None:
+        return
+    if not SHARED_SNAPSHOT:
+        print("⚠️ BATCH_PROCESSES needs SHARED_SNAPSHOT=1 (workers map the saved snapshot); batches run in-process")
+        return
+    # spawned, not forked: a fork of a process running threads can inherit held locks
+    BATCH_POOL = ProcessPoolExecutor(max_workers=BATCH_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _batch_pool_shutdown() -> None:
+    global BATCH_POOL
+    if BATCH_POOL is not None:
+        BATCH_POOL.shutdown(wait=False, cancel_futures=True)
+        BATCH_POOL = None
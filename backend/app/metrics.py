@@ -0,0 +1,314 @@
+"""
+Request instrumentation: per-stage timings (sent as a Server-Timing header),
+Prometheus text-format metrics and an opt-in sampling profiler.
+
+Code marks its hot sections with `with stage("similarity"): ...`; outside a
+request (no StageTimer in the context) that is a no-op. The timer lives in a
+context variable, so stages run on the threadpool are counted too.
+"""
+from __future__ import annotations
+
+import hmac
+import math
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as _Tally
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0)
+
+
+# --- Metric types (enough of the Prometheus data model for this app; no client library) ---
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter, one value per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in items]
+
+
+class Histogram:
+    """Cumulative-bucket histogram (seconds), one series per label combination."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = REQUEST_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}  # per-bucket counts (+Inf last), sum, count
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [0.0] * (len(self.buckets) + 3)
+            s[bisect_left(self.buckets, value)] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(s)) for k, s in self._series.items())
+        lines = []
+        for k, s in items:
+            cumulative = 0.0
+            for bound, n in zip(self.buckets + (math.inf,), s):
+                cumulative += n
+                le = 'le="%s"' % _num(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, k, le)} {_num(cumulative)}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, k)} {s[-2]!r}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, k)} {_num(s[-1])}")
+        return lines
+
+
+REGISTRY: List[object] = []
+
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+def family(name: str, help: str, kind: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> List[str]:
+    """Text lines of one metric family computed at scrape time (gauges, counters read from elsewhere)."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(list(labels), list(labels.values()))} {_num(value)}")
+    return lines
+
+
+def render(families: Iterable[List[str]] = ()) -> str:
+    """The registered metrics plus the scrape-time `families`, in Prometheus text format."""
+    lines: List[str] = []
+    for m in REGISTRY:
+        lines += [f"# HELP {m.name} {m.help}", f"# TYPE {m.name} {m.kind}"] + m.render()
+    for fam in families:
+        lines += fam
+    return "\n".join(lines) + "\n"
+
+
+REQUEST_SECONDS = register(Histogram("perfume_request_duration_seconds",
+                                     "Request latency by route, including streamed bodies.", ("route",)))
+REQUESTS = register(Counter("perfume_requests_total", "Requests by route and status code.", ("route", "status")))
+ERRORS = register(Counter("perfume_errors_total", "Unhandled exceptions by route.", ("route", "exception")))
+STAGE_SECONDS = register(Histogram("perfume_stage_duration_seconds",
+                                   "Time per pipeline stage and request.", ("stage",), STAGE_BUCKETS))
+
+
+# --- Stage timing ---
+class StageTimer:
+    """Accumulated seconds per stage for one request (a stage may run several times)."""
+
+    def __init__(self, profiling: bool = False):
+        self.t0 = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        # threads currently inside a stage, only tracked for the profiler: ident -> depth
+        self.threads: Optional[Dict[int, int]] = {} if profiling else None
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def header(self, extra: str = "") -> str:
+        """Server-Timing value: every stage so far plus the total, in milliseconds."""
+        parts = [f"{name};dur={s * 1000:.2f}" for name, s in self.stages.items()]
+        parts.append(f"total;dur={(time.perf_counter() - self.t0) * 1000:.2f}")
+        if extra:
+            parts.append(extra)
+        return ", ".join(parts)
+
+
+_TIMER: ContextVar[Optional[StageTimer]] = ContextVar("stage_timer", default=None)
+
+
+class stage:
+    """`with stage("filter"): ...` adds the block's wall time to the current request's timer."""
+
+    __slots__ = ("name", "timer", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.timer = _TIMER.get()
+        if self.timer is not None:
+            if self.timer.threads is not None:
+                ident = threading.get_ident()
+                self.timer.threads[ident] = self.timer.threads.get(ident, 0) + 1
+            self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        timer = self.timer
+        if timer is not None:
+            timer.add(self.name, time.perf_counter() - self.t0)
+            if timer.threads is not None:
+                ident = threading.get_ident()
+                depth = timer.threads.get(ident, 1) - 1
+                if depth:
+                    timer.threads[ident] = depth
+                else:
+                    timer.threads.pop(ident, None)
+
+
+# --- Sampling profiler ---
+def _folded(frame) -> str:
+    """One stack in folded form, root first: "module:function;module:function;..."."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{Path(code.co_filename).stem}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """
+    Samples, every `interval` seconds, the stacks of the request's event-loop
+    thread and of the threads currently inside one of its stages, and writes
+    the counts as folded stacks (flamegraph.pl / speedscope input).
+    """
+
+    def __init__(self, timer: StageTimer, path: Path, interval: float = 0.001):
+        self.timer, self.path, self.interval = timer, path, interval
+        self.loop_thread = threading.get_ident()
+        self.counts: _Tally = _Tally()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> "SamplingProfiler":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._done.wait(self.interval):
+            frames = sys._current_frames()
+            for ident in {self.loop_thread, *list(self.timer.threads or ())}:
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.counts[_folded(frame)] += 1
+
+    def stop(self) -> Path:
+        self._done.set()
+        self._thread.join()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            for stack, n in self.counts.most_common():
+                f.write(f"{stack} {n}\n")
+        return self.path
+
+
+# --- ASGI middleware ---
+class MetricsMiddleware:
+    """
+    Times every HTTP request into the histograms, counts statuses and unhandled
+    exceptions, and adds a Server-Timing header with the stages the request
+    went through before its response started (streamed bodies only show the
+    stages done by then; `server_timing=False` leaves the header out). A request carrying `X-Profile: <profile_token>` is
+    also profiled; the folded-stack file name is reported in Server-Timing.
+    """
+
+    def __init__(self, app, server_timing: bool = True, profile_token: str = "",
+                 profile_dir: Optional[Path] = None, profile_interval: float = 0.001):
+        self.app = app
+        self.server_timing = server_timing
+        self.profile_token = profile_token
+        self.profile_dir = profile_dir
+        self.profile_interval = profile_interval
+
+    def _profile_requested(self, scope) -> bool:
+        if not (self.profile_token and self.profile_dir):
+            return False
+        for name, value in scope.get("headers", ()):
+            if name == b"x-profile":
+                return hmac.compare_digest(value, self.profile_token.encode())
+        return False
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profiling = self._profile_requested(scope)
+        timer = StageTimer(profiling=profiling)
+        token = _TIMER.set(timer)
+        profiler = None
+        extra = ""
+        if profiling:
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{id(timer) & 0xffff:04x}.folded"
+            profiler = SamplingProfiler(timer, self.profile_dir / name, self.profile_interval).start()
+            extra = f'profile;desc="{name}"'
+        status = {"code": 500}
+
+        async def send_timed(message) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if self.server_timing or profiler is not None:
+                    headers = list(message.get("headers", ()))
+                    headers.append((b"server-timing", timer.header(extra).encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        except Exception as e:
+            ERRORS.inc(_route(scope), type(e).__name__)
+            raise
+        finally:
+            _TIMER.reset(token)
+            if profiler is not None:
+                profiler.stop()
+            route = _route(scope)
+            REQUEST_SECONDS.observe(time.perf_counter() - timer.t0, route)
+            REQUESTS.inc(route, str(status["code"]))
+            for name, seconds in timer.stages.items():
+                STAGE_SECONDS.observe(seconds, name)
+
+
+def _route(scope) -> str:
+    """Route template ("/api/recommend", "/static"), never the raw path: bounded label values."""
+    path = getattr(scope.get("route"), "path", None)
+    if path:
+        return path
+    # Mounted apps (StaticFiles) set no "route"; label them by their mount prefix.
+    for r in getattr(scope.get("app"), "routes", ()):
+        if hasattr(r, "routes") and scope.get("path", "").startswith(r.path + "/"):
+            return r.path
+    return "unmatched"
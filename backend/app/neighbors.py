@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import bisect
+import difflib
+import json
+import os
+import re
+import unicodedata
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .catalog import StringPool
+from .vectorstore import Hits
+
+# cap on the dense (vocabulary x batch) block used while building the neighbor table
+MAX_BLOCK_BYTES = 64 * 2**20
+
+
+def normalize_names(values: pd.Series) -> pd.Series:
+    """Lowercase, accents stripped, punctuation collapsed to single spaces ("Dior - Sauvage!" -> "dior sauvage")."""
+    return (
+        values.astype(str)
+        .str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+        .str.lower()
+        .str.replace(r"[^a-z0-9]+", " ", regex=True)
+        .str.strip()
+    )
+
+
+def normalize_name(value: str) -> str:
+    """Scalar `normalize_names` (same rules, without the pandas overhead)."""
+    value = unicodedata.normalize("NFKD", str(value)).encode("ascii", "ignore").decode("ascii").lower()
+    return re.sub(r"[^a-z0-9]+", " ", value).strip()
+
+
+class NameIndex:
+    """
+    Perfume name -> row id, for resolving liked perfumes. Keys are the
+    normalized `name` and `brand name`; a name shared by several perfumes
+    resolves to the most-rated one. Unknown names fall back to a fuzzy
+    match among keys that share their first three characters. Keys are kept
+    sorted in a string pool, so exact lookups and prefix blocks are binary searches.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        ids: Dict[str, int] = {}
+        if "name" in df.columns and len(df):
+            names = normalize_names(df["name"])
+            brands = normalize_names(df["brand"]) if "brand" in df.columns else pd.Series([""] * len(df))
+            counts = df["rating_count"].to_numpy(dtype=np.float64, na_value=0) if "rating_count" in df.columns \
+                else np.zeros(len(df))
+            names, brands = names.to_numpy(dtype=object), brands.to_numpy(dtype=object)
+            # most-rated first, so the first row seen keeps the key
+            for i in np.argsort(-counts, kind="stable"):
+                for key in (names[i], f"{brands[i]} {names[i]}".strip()):
+                    if key and key not in ids:
+                        ids[key] = int(i)
+        keys = sorted(ids)
+        pool = StringPool.from_strings(keys)
+        self._load({"keys.buffer": pool.buffer, "keys.offsets": pool.offsets,
+                    "ids": np.array([ids[k] for k in keys], dtype=np.int32)})
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], meta: Optional[dict] = None) -> "NameIndex":
+        self = cls.__new__(cls)
+        self._load(arrays)
+        return self
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], dict]:
+        return self._arrays, {}
+
+    def _load(self, arrays: Dict[str, np.ndarray]) -> None:
+        self._arrays = arrays
+        self._keys = StringPool(arrays["keys.buffer"], arrays["keys.offsets"])
+        self._ids = arrays["ids"]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def lookup(self, name: str, cutoff: float = 0.85) -> Optional[int]:
+        """Row id for `name`, or None when nothing is close enough."""
+        key = normalize_name(name)
+        if not key:
+            return None
+        i = bisect.bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return int(self._ids[i])
+        prefix = key[:3]
+        lo = bisect.bisect_left(self._keys, prefix)
+        hi = bisect.bisect_left(self._keys, prefix + "\uffff", lo)
+        block: Dict[str, int] = {}
+        for j in range(lo, hi):
+            k = self._keys[j]
+            if k[:3] == prefix:  # a key shorter than three characters only blocks with itself
+                block[k] = j
+        close = difflib.get_close_matches(key, list(block), n=1, cutoff=cutoff)
+        return int(self._ids[block[close[0]]]) if close else None
+
+
+class NeighborTable:
+    """
+    Top-N most similar perfumes of every row (TF-IDF cosine, self excluded)
+    as int32 ids / float16 similarities, best first; short rows pad with -1.
+    """
+
+    def __init__(self, ids: np.ndarray, sims: np.ndarray):
+        self.ids = ids
+        self.sims = sims
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.ids.nbytes + self.sims.nbytes)
+
+    @classmethod
+    def build(cls, X, top_n: int = 50, batch: int = 256) -> "NeighborTable":
+        """Table for every row of `X` (see `_top_neighbors`)."""
+        top_n = max(1, min(top_n, X.shape[0] - 1))
+        return cls(*_top_neighbors(X, 0, top_n, batch))
+
+    def extend(self, X, batch: int = 256) -> "NeighborTable":
+        """
+        Table for a catalog that appended rows to this one: only the new rows
+        get neighbor lists; existing lists are kept (they never point at new rows).
+        """
+        ids, sims = _top_neighbors(X, len(self), self.ids.shape[1], batch)
+        return NeighborTable(np.concatenate([self.ids, ids]), np.concatenate([self.sims, sims]))
+
+    def merge(self, rows: Sequence[int]) -> Hits:
+        """Mean similarity to the `rows` perfumes over the union of their neighbor lists."""
+        ids = self.ids[rows].ravel()
+        sims = self.sims[rows].ravel().astype(np.float64)
+        keep = ids >= 0
+        uniq, inv = np.unique(ids[keep], return_inverse=True)
+        return Hits(uniq.astype(np.int32), np.bincount(inv, weights=sims[keep]) / len(rows))
+
+    # --- Persisted next to the TF-IDF index ---
+    #   neighbor_ids.npy, neighbor_sims.npy, neighbors.json (catalog hash, shape; written last)
+
+    def save(self, index_dir: Union[str, Path], catalog_hash: str) -> None:
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        tmp = f".tmp-{os.getpid()}"
+        for name, arr in (("neighbor_ids", self.ids), ("neighbor_sims", self.sims)):
+            with open(index_dir / f"{name}.npy{tmp}", "wb") as f:
+                np.save(f, arr)
+            os.replace(index_dir / f"{name}.npy{tmp}", index_dir / f"{name}.npy")
+        with open(index_dir / f"neighbors.json{tmp}", "w", encoding="utf-8") as f:
+            json.dump({"catalog_hash": catalog_hash, "shape": list(self.ids.shape)}, f)
+        os.replace(index_dir / f"neighbors.json{tmp}", index_dir / "neighbors.json")
+
+    @classmethod
+    def load(cls, index_dir: Union[str, Path], catalog_hash: str, n: int) -> Optional["NeighborTable"]:
+        """Memory-map a saved table; None if it is missing or was built for another catalog."""
+        index_dir = Path(index_dir)
+        try:
+            with open(index_dir / "neighbors.json", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        shape = tuple(meta.get("shape") or ())
+        if meta.get("catalog_hash") != catalog_hash or len(shape) != 2 or shape[0] != n:
+            return None
+        return cls(np.load(index_dir / "neighbor_ids.npy", mmap_mode="r"),
+                   np.load(index_dir / "neighbor_sims.npy", mmap_mode="r"))
+
+    @classmethod
+    def load_or_build(cls, X, index_dir: Union[str, Path], catalog_hash: str,
+                      top_n: int, build_max: int) -> Optional["NeighborTable"]:
+        """Saved table if current; otherwise build (and try to save) only for catalogs up to `build_max` rows."""
+        table = cls.load(index_dir, catalog_hash, X.shape[0])
+        if table is not None or X.shape[0] < 2:
+            return table
+        if X.shape[0] > build_max:
+            print("ℹ️ Neighbor table missing or stale; liked perfumes use text search "
+                  "(build it with `python -m app.vectorstore`)")
+            return None
+        table = cls.build(X, top_n)
+        try:
+            table.save(index_dir, catalog_hash)
+        except OSError as e:
+            print("⚠️ Could not save neighbor table:", e)
+        return table
+
+
+def _top_neighbors(X, start: int, top_n: int, batch: int):
+    """
+    Top-N neighbors of rows `start:` of `X` among all rows, via catalog x dense
+    row-block products (float32), `batch` rows at a time. TF-IDF similarity
+    blocks are mostly nonzero, so this beats a sparse x sparse product by about 3x.
+    """
+    X = X.tocsr().astype(np.float32)
+    n, vocab = X.shape
+    k = min(top_n, n - 1)
+    ids = np.full((n - start, top_n), -1, dtype=np.int32)
+    sims = np.zeros((n - start, top_n), dtype=np.float16)
+    if k < 1:
+        return ids, sims
+    # large vocabularies: multiply only the columns the block uses, to bound the dense block
+    XC = X.tocsc() if vocab * batch * 4 > MAX_BLOCK_BYTES else None
+    for lo in range(start, n, batch):
+        hi = min(lo + batch, n)
+        block = X[lo:hi]
+        if XC is None:
+            S = X @ block.T.toarray()
+        else:
+            cols = np.unique(block.indices)
+            S = XC[:, cols] @ block[:, cols].T.toarray()
+        S = np.ascontiguousarray(S.T)
+        S[np.arange(hi - lo), np.arange(lo, hi)] = -np.inf  # never your own neighbor
+        cand = np.argpartition(-S, k - 1, axis=1)[:, :k]
+        vals = np.take_along_axis(S, cand, axis=1)
+        for r in range(hi - lo):
+            # best first, ties by row id, zero / self entries dropped
+            order = np.lexsort((cand[r], -vals[r]))
+            keep = order[vals[r][order] > 0]
+            ids[lo - start + r, :len(keep)] = cand[r][keep]
+            sims[lo - start + r, :len(keep)] = vals[r][keep]
+    return ids, sims
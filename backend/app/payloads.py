@@ -0,0 +1,162 @@
+"""
+Prebuilt result payloads and JSON encoding for the recommendation routes.
+
+The short catalog fields of a result card (brand, name, price range, accords,
+ratings, ...) never change between requests, so they are encoded to JSON once
+per catalog load. The long text (url, description) stays in the catalog's
+string pools and is encoded per result, and a request appends `score`, `why`
+and `ai_why`. orjson is used when installed, the standard json
+module otherwise.
+"""
+from __future__ import annotations
+
+import json
+import math
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional: same output from the standard encoder, only slower
+    orjson = None
+
+
+def dumps(obj) -> bytes:
+    """Compact UTF-8 JSON (NaN is written as null by orjson; callers avoid it)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class JSONBytesResponse(Response):
+    """application/json response; bytes are sent as already-encoded JSON, anything else goes through `dumps`."""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return content if isinstance(content, bytes) else dumps(content)
+
+
+# --- Per-perfume payloads ---
+
+def _missing(v) -> bool:
+    return v is None or (isinstance(v, float) and math.isnan(v))
+
+
+def _number(v, cast):
+    """`cast(v or 0)`, with missing values read as 0 too."""
+    return cast(0 if _missing(v) else (v or 0))
+
+
+def _card(values: Dict[str, Optional[list]], i: int) -> dict:
+    """Prebuilt fields of row `i`'s result, in response order (LONG_COLS follow them)."""
+    def get(col, default=None):
+        column = values[col]
+        v = column[i] if column is not None else default
+        return None if _missing(v) else v
+
+    accords = get("main_accords")
+    return {
+        "brand": get("brand"),
+        "name": get("name"),
+        "gender": get("gender", ""),
+        "price_range": [_number(get("price_min"), int), _number(get("price_max"), int)],
+        "accords": (str(accords) if accords else "").split("|"),
+        "longevity": _number(get("longevity"), float),
+        "sillage": _number(get("sillage"), float),
+        "rating_value": _number(get("rating_value"), float),
+        "rating_count": _number(get("rating_count"), int),
+    }
+
+
+CARD_COLS = ("brand", "name", "gender", "price_min", "price_max", "main_accords", "longevity", "sillage",
+             "rating_value", "rating_count")
+# last fields of every card, read from the catalog per result instead of being copied into the table
+LONG_COLS = ("url", "description")
+
+
+class PayloadTable:
+    """
+    Row i's CARD_COLS as one JSON object without its closing brace
+    (`{"brand":...,"rating_count":120`), in a byte buffer plus int64 offsets
+    like a StringPool, so a saved table can be memory-mapped and shared.
+    `table[i]` adds the LONG_COLS of row i from `catalog`.
+    """
+
+    def __init__(self, buffer: np.ndarray, offsets: np.ndarray, catalog):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.catalog = catalog
+        # (col, key bytes, its string pool: read directly, `Catalog.row` is the slow general path)
+        self._long = [(col, f',"{col}":'.encode(), catalog.text.get(col) if catalog is not None else None)
+                      for col in LONG_COLS]
+
+    @classmethod
+    def build(cls, catalog) -> "PayloadTable":
+        values = {col: catalog.column(col) for col in CARD_COLS}
+        encoded = [dumps(_card(values, i))[:-1] for i in range(len(catalog))]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets, catalog)
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], meta: Optional[dict] = None, catalog=None) -> "PayloadTable":
+        return cls(arrays["buffer"], arrays["offsets"], catalog)
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], dict]:
+        return {"buffer": self.buffer, "offsets": self.offsets}, {}
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> bytes:
+        out = [self.buffer[self.offsets[i]:self.offsets[i + 1]].tobytes()]
+        for col, key, pool in self._long:
+            # as `_card` would: "" without the column, null when missing
+            v = pool[i] if pool is not None else self.catalog.row(i, (col,)).get(col, "")
+            out += [key, dumps(None if _missing(v) else v)]
+        return b"".join(out)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.buffer.nbytes + self.offsets.nbytes)
+
+
+class Result:
+    """One ranked perfume of a response: its prebuilt payload plus the per-request fields."""
+
+    __slots__ = ("payload", "score", "why", "ai_why")
+
+    def __init__(self, payload: bytes, score: float, why: str):
+        self.payload = payload
+        self.score = score
+        self.why = why
+        self.ai_why: Optional[str] = None
+
+    def to_json(self) -> bytes:
+        tail = {"score": self.score, "why": self.why}
+        if self.ai_why is not None:
+            tail["ai_why"] = self.ai_why
+        return self.payload + b"," + dumps(tail)[1:]
+
+    def to_dict(self) -> dict:
+        """The card as a dict (LLM prompts and cache keys; not used on the response path)."""
+        return loads(self.to_json())
+
+
+def results_json(results: Sequence[Result]) -> bytes:
+    return b"[" + b",".join(r.to_json() for r in results) + b"]"
+
+
+def response_json(results: Sequence[Result], **fields) -> bytes:
+    """`{"results": [...], **fields}` as JSON bytes."""
+    if not fields:
+        return b'{"results":' + results_json(results) + b"}"
+    return b'{"results":' + results_json(results) + b"," + dumps(fields)[1:]
+
@@ -1,5 +1,6 @@
-import os, json, httpx
-from typing import List, Dict, Any
+import os, json, time, asyncio, httpx
+from collections import deque
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 
 # Read env at import-time (main.py already calls load_dotenv)
 # Accept both naming conventions to avoid silent "unavailable" issues
@@ -7,6 +8,22 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY") or os.getenv("LLM_API_KEY") or ""
 MODEL = os.getenv("OPENAI_MODEL") or os.getenv("LLM_MODEL") or "gpt-4o-mini"
 OPENAI_BASE = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
 
+# Connection pool / timeouts / concurrency for the shared clients
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "30"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "10"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+# Explanation scheduler: candidates per prompt (0 = all in one), overall deadline,
+# and how long a chunk may run before a duplicate "hedge" request is sent (0 = never)
+LLM_CHUNK_SIZE = int(os.getenv("LLM_CHUNK_SIZE", "2"))
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "20"))
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "0"))
+
+# Long-lived client: one keep-alive pool per process instead of a TCP+TLS handshake per call
+_ASYNC_CLIENT: Optional[httpx.AsyncClient] = None
+_ASYNC_SEM: Optional[asyncio.Semaphore] = None
+
 def llm_available() -> bool:
     """Return True if a usable API key is present."""
     return bool(OPENAI_API_KEY)
@@ -43,8 +60,29 @@ def build_prompt(context: Dict[str, Any], candidates: List[Dict[str, Any]]) -> s
     ]
     return "\n".join(lines)
 
-def _openai_chat(prompt: str) -> str:
-    """Call OpenAI chat completions and return the assistant content (JSON string)."""
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=LLM_MAX_CONNECTIONS,
+                        max_keepalive_connections=LLM_MAX_CONNECTIONS,
+                        keepalive_expiry=60.0)
+
+async def open_client() -> None:
+    """Create the shared AsyncClient (call from app startup, inside the running loop)."""
+    global _ASYNC_CLIENT, _ASYNC_SEM
+    if _ASYNC_CLIENT is None:
+        _ASYNC_CLIENT = httpx.AsyncClient(timeout=_timeout(), limits=_limits())
+        _ASYNC_SEM = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+async def close_client() -> None:
+    """Close the shared client (call from app shutdown)."""
+    global _ASYNC_CLIENT, _ASYNC_SEM
+    if _ASYNC_CLIENT is not None:
+        await _ASYNC_CLIENT.aclose()
+        _ASYNC_CLIENT, _ASYNC_SEM = None, None
+
+def _chat_request(prompt: str):
     if not OPENAI_API_KEY:
         raise RuntimeError("LLM key missing")
     headers = {
@@ -60,39 +98,154 @@ def _openai_chat(prompt: str) -> str:
         "temperature": 0.4,
         "response_format": {"type": "json_object"}  # ask for JSON
     }
-    with httpx.Client(timeout=30.0) as client:
-        r = client.post(f"{OPENAI_BASE}/chat/completions", headers=headers, json=payload)
-        r.raise_for_status()
-        data = r.json()
-        # Defensive: ensure expected shape
-        choice = (data.get("choices") or [{}])[0]
-        message = choice.get("message") or {}
-        content = message.get("content") or ""
-        return content
-
-def llm_explain(context: Dict[str, Any], candidates: List[Dict[str, Any]]) -> List[str]:
-    """Return up to len(candidates) short explanations (bulleted) aligned to candidates order."""
-    if not llm_available() or not candidates:
+    return f"{OPENAI_BASE}/chat/completions", headers, payload
+
+def _chat_content(data: Dict[str, Any]) -> str:
+    # Defensive: ensure expected shape
+    choice = (data.get("choices") or [{}])[0]
+    message = choice.get("message") or {}
+    content = message.get("content") or ""
+    return content
+
+async def _openai_chat(prompt: str) -> str:
+    """
+    Call OpenAI chat completions over the shared pooled client (bounded by
+    LLM_MAX_CONCURRENCY) and return the assistant content (JSON string).
+    """
+    url, headers, payload = _chat_request(prompt)
+    if _ASYNC_CLIENT is None:
+        # not started through the app (scripts): fall back to a one-off client
+        async with httpx.AsyncClient(timeout=_timeout()) as client:
+            r = await client.post(url, headers=headers, json=payload)
+    else:
+        async with _ASYNC_SEM:
+            r = await _ASYNC_CLIENT.post(url, headers=headers, json=payload)
+    r.raise_for_status()
+    return _chat_content(r.json())
+
+def _parse_explanations(raw: str, n: int) -> List[str]:
+    """Map the model's {"list":[{"bullets":[...]}]} JSON onto `n` bulleted strings."""
+    obj = json.loads(raw)
+    items = obj.get("list") if isinstance(obj, dict) else None
+    if not isinstance(items, list):
         return []
+
+    outs: List[str] = []
+    for i in range(n):
+        try:
+            bullets = items[i].get("bullets", [])
+            # keep max 2 bullets, each trimmed
+            outs.append("\n".join(f"• {str(b).strip()}" for b in bullets[:2] if str(b).strip()))
+        except Exception:
+            outs.append("")
+    return outs
+
+
+# --- Chunked, parallel explanations ---
+class ChunkStats:
+    """Outcome counters and recent latencies per chunk size, for tuning LLM_CHUNK_SIZE."""
+
+    def __init__(self, window: int = 512):
+        self.window = window
+        self._sizes: Dict[int, Dict[str, Any]] = {}
+
+    def record(self, size: int, seconds: float, outcome: str, hedged: bool) -> None:
+        rec = self._sizes.setdefault(size, {"ok": 0, "failed": 0, "timeout": 0, "cancelled": 0,
+                                            "hedged": 0,
+                                            "latency": deque(maxlen=self.window)})
+        rec[outcome] += 1
+        rec["hedged"] += int(hedged)
+        if outcome == "ok":
+            rec["latency"].append(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        out = {}
+        for size, rec in sorted(self._sizes.items()):
+            lat = sorted(rec["latency"])
+
+            def pct(q: float) -> Optional[float]:
+                return round(lat[min(len(lat) - 1, int(q * len(lat)))] * 1000, 1) if lat else None
+
+            out[str(size)] = {k: rec[k] for k in ("ok", "failed", "timeout", "cancelled", "hedged")}
+            out[str(size)].update(p50_ms=pct(0.5), p95_ms=pct(0.95), max_ms=pct(1.0))
+        return out
+
+
+CHUNK_STATS = ChunkStats()
+
+def llm_stats() -> Dict[str, Any]:
+    return {"chunk_size": LLM_CHUNK_SIZE, "deadline_s": LLM_DEADLINE,
+            "hedge_after_s": LLM_HEDGE_AFTER, "chunks": CHUNK_STATS.snapshot()}
+
+async def _hedged_chat(prompt: str, hedge_after: float) -> Tuple[str, bool]:
+    """Chat call that fires one duplicate if the first has not answered after `hedge_after` s."""
+    first = asyncio.ensure_future(_openai_chat(prompt))
+    pending = {first}
+    try:
+        if hedge_after <= 0:
+            return await first, False
+        done, pending = await asyncio.wait(pending, timeout=hedge_after)
+        if done:
+            return first.result(), False
+        pending.add(asyncio.ensure_future(_openai_chat(prompt)))
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), True
+                error = task.exception()
+        raise error
+    finally:
+        # Also reached on cancellation (chunk deadline): never leave a request running
+        for task in pending:
+            task.cancel()
+
+async def _explain_chunk(context: Dict[str, Any], chunk: List[Dict[str, Any]]) -> Tuple[List[str], bool]:
+    raw, hedged = await _hedged_chat(build_prompt(context, chunk), LLM_HEDGE_AFTER)
+    return _parse_explanations(raw, len(chunk)), hedged
+
+async def llm_explain_stream(context: Dict[str, Any],
+                             candidates: List[Dict[str, Any]]) -> AsyncIterator[Tuple[int, str]]:
+    """
+    Split `candidates` into LLM_CHUNK_SIZE prompts run concurrently and yield
+    (candidate index, explanation) as each chunk finishes. A failed or malformed
+    chunk loses only its own items; whatever is unfinished at LLM_DEADLINE is dropped
+    ("timeout"). Chunks still running when the caller stops early, e.g. a client
+    disconnect, are counted as "cancelled".
+    """
+    if not llm_available() or not candidates:
+        return
+    size = LLM_CHUNK_SIZE if LLM_CHUNK_SIZE > 0 else len(candidates)
+    starts = list(range(0, len(candidates), size))
+    t0 = time.perf_counter()
+    tasks = {asyncio.ensure_future(_explain_chunk(context, candidates[s:s + size])): s for s in starts}
+    deadline = t0 + LLM_DEADLINE
+    pending = set(tasks)
+    timed_out = False
     try:
-        # Build prompt for only the slice main.py asked for
-        prompt = build_prompt(context, candidates)
-        raw = _openai_chat(prompt)
-        obj = json.loads(raw)
-        items = obj.get("list") if isinstance(obj, dict) else None
-        if not isinstance(items, list):
-            return []
-
-        outs: List[str] = []
-        for i in range(len(candidates)):
-            try:
-                bullets = items[i].get("bullets", [])
-                # keep max 2 bullets, each trimmed
-                outs.append("\n".join(f"• {str(b).strip()}" for b in bullets[:2] if str(b).strip()))
-            except Exception:
-                outs.append("")
-        return outs
-    except Exception as e:
-        # Don't crash the request if LLM fails
-        print("LLM error:", repr(e))
-        return []
\ No newline at end of file
+        while pending:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                timed_out = True
+                break
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                start = tasks[task]
+                n = len(candidates[start:start + size])
+                elapsed = time.perf_counter() - t0
+                if task.exception() is not None:
+                    print("LLM chunk error:", repr(task.exception()))
+                    CHUNK_STATS.record(n, elapsed, "failed", False)
+                    continue
+                texts, hedged = task.result()
+                CHUNK_STATS.record(n, elapsed, "ok" if any(texts) else "failed", hedged)
+                for i, txt in enumerate(texts):
+                    if txt:
+                        yield start + i, txt
+    finally:
+        outcome = "timeout" if timed_out else "cancelled"
+        for task in pending:
+            task.cancel()
+            start = tasks[task]
+            CHUNK_STATS.record(len(candidates[start:start + size]), time.perf_counter() - t0, outcome, False)
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+# seconds of quota window (a client's budget resets this long after its first use)
+DAY = 24 * 3600
+
+
+class QuotaStore(ABC):
+    """
+    Per-client token budget: `limit` tokens per `window` seconds, counted from
+    the client's first take. `take()` is all-or-nothing and returns
+    (allowed, remaining after the take); `tokens <= 0` only reads the budget.
+    """
+
+    def __init__(self, limit: int, window: float = DAY):
+        self.limit = int(limit)
+        self.window = float(window)
+
+    @abstractmethod
+    def take(self, key: str, tokens: int, now: Optional[float] = None) -> Tuple[bool, int]:
+        ...
+
+    def stats(self) -> Dict[str, object]:
+        return {}
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryQuotaStore(QuotaStore):
+    """
+    Process-local store. Entries sit in a timing wheel of `slots` buckets
+    (each `window / slots` seconds wide) by expiry time; every take sweeps the
+    buckets that have fully expired since the last one, so stale clients are
+    dropped without scanning the table. At most `max_keys` clients are kept:
+    a new client beyond that evicts the one closest to expiry (its budget
+    restarts if it comes back).
+    """
+
+    def __init__(self, limit: int, window: float = DAY, max_keys: int = 100_000, slots: int = 96):
+        super().__init__(limit, window)
+        self.max_keys = max(1, int(max_keys))
+        self.tick = self.window / max(1, int(slots))
+        self._entries: Dict[str, List[float]] = {}  # key -> [used, reset_at]
+        self._wheel: Dict[int, Set[str]] = {}       # tick number -> keys expiring in it
+        self._swept = 0  # ticks below this one are already empty
+        self._lock = threading.Lock()
+        self.expired = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def take(self, key: str, tokens: int, now: Optional[float] = None) -> Tuple[bool, int]:
+        now = time.time() if now is None else now
+        with self._lock:
+            self._sweep(now)
+            entry = self._entries.get(key)
+            if entry is not None and now >= entry[1]:
+                self._remove(key)
+                entry = None
+            if tokens <= 0:
+                return True, self.limit - int(entry[0]) if entry else self.limit
+            if tokens > self.limit - (int(entry[0]) if entry else 0):
+                return False, max(0, self.limit - int(entry[0])) if entry else self.limit
+            if entry is None:
+                if len(self._entries) >= self.max_keys:
+                    self._evict()
+                entry = self._entries[key] = [0, now + self.window]
+                self._wheel.setdefault(self._slot(entry[1]), set()).add(key)
+            entry[0] += tokens
+            return True, self.limit - int(entry[0])
+
+    def _slot(self, t: float) -> int:
+        return int(t // self.tick)
+
+    def _remove(self, key: str) -> None:
+        _, reset_at = self._entries.pop(key)
+        bucket = self._wheel.get(self._slot(reset_at))
+        if bucket is not None:
+            bucket.discard(key)
+            if not bucket:
+                del self._wheel[self._slot(reset_at)]
+
+    def _sweep(self, now: float) -> None:
+        """Drop every entry whose tick ended before `now`."""
+        current = self._slot(now)
+        if current <= self._swept:
+            return
+        if current - self._swept > len(self._wheel):
+            due = [t for t in self._wheel if t < current]  # long idle gap: visit occupied ticks only
+        else:
+            due = [t for t in range(self._swept, current) if t in self._wheel]
+        for t in due:
+            for key in self._wheel.pop(t):
+                del self._entries[key]
+                self.expired += 1
+        self._swept = current
+
+    def _evict(self) -> None:
+        """Make room for one entry: drop the single entry closest to expiry."""
+        bucket = self._wheel[min(self._wheel)]
+        self._remove(min(bucket, key=lambda k: self._entries[k][1]))
+        self.evicted += 1
+
+    def stats(self) -> Dict[str, object]:
+        return {"backend": "memory", "keys": len(self._entries), "max_keys": self.max_keys,
+                "expired": self.expired, "evicted": self.evicted}
+
+
+class SqliteQuotaStore(QuotaStore):
+    """
+    Store shared by every process that opens the same SQLite file (WAL mode).
+    Each take is one `BEGIN IMMEDIATE` transaction, so concurrent workers
+    never both spend the last tokens. Expired rows are deleted every
+    `prune_every` takes, and beyond `max_keys` the rows closest to expiry go first.
+    """
+
+    def __init__(self, path: Path, limit: int, window: float = DAY, max_keys: int = 100_000,
+                 prune_every: int = 1000):
+        super().__init__(limit, window)
+        self.max_keys = max(1, int(max_keys))
+        self.prune_every = max(1, int(prune_every))
+        self._takes = 0
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS quota (key TEXT PRIMARY KEY, used INTEGER NOT NULL, reset_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS quota_reset_at ON quota (reset_at)")
+
+    def take(self, key: str, tokens: int, now: Optional[float] = None) -> Tuple[bool, int]:
+        now = time.time() if now is None else now
+        with self._lock:
+            if tokens <= 0:
+                row = self._db.execute("SELECT used FROM quota WHERE key = ? AND reset_at > ?", (key, now)).fetchone()
+                return True, self.limit - row[0] if row else self.limit
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT used FROM quota WHERE key = ? AND reset_at > ?", (key, now)).fetchone()
+                used = row[0] if row else 0
+                if used + tokens > self.limit:
+                    self._db.execute("COMMIT")
+                    return False, max(0, self.limit - used)
+                if row:
+                    self._db.execute("UPDATE quota SET used = used + ? WHERE key = ?", (tokens, key))
+                else:
+                    self._db.execute("INSERT OR REPLACE INTO quota (key, used, reset_at) VALUES (?, ?, ?)",
+                                     (key, tokens, now + self.window))
+                self._takes += 1
+                if self._takes % self.prune_every == 0:
+                    self._prune(now)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            return True, self.limit - used - tokens
+
+    def _prune(self, now: float) -> None:
+        self._db.execute("DELETE FROM quota WHERE reset_at <= ?", (now,))
+        self._db.execute(
+            "DELETE FROM quota WHERE key IN (SELECT key FROM quota ORDER BY reset_at "
+            "LIMIT max(0, (SELECT count(*) FROM quota) - ?))",
+            (self.max_keys,),
+        )
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            keys = self._db.execute("SELECT count(*) FROM quota").fetchone()[0]
+        return {"backend": "sqlite", "keys": keys, "max_keys": self.max_keys}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def open_quota_store(backend: str, limit: int, path: Optional[Path] = None,
+                     max_keys: int = 100_000, window: float = DAY) -> QuotaStore:
+    """`backend` is "memory" or "sqlite" (needs `path`)."""
+    if backend == "sqlite":
+        if path is None:
+            raise ValueError("the sqlite quota store needs a path")
+        return SqliteQuotaStore(path, limit, window, max_keys)
+    if backend != "memory":
+        raise ValueError(f"unknown quota store: {backend!r}")
+    return MemoryQuotaStore(limit, window, max_keys)
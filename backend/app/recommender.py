@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from typing import List, Set
+from typing import Dict, List, Optional, Set, Tuple
 import numpy as np
 import pandas as pd
+from scipy import sparse
 
 # simple rules to bias results by use-case
 USECASE_RULES = {
@@ -25,6 +26,103 @@ def usecase_score(accords: Set[str], use_cases: List[str] | None) -> float:
         s += 0.5 + 0.1 * len(accords & rule["boost"]) - 0.05 * len(accords & rule["penalize"])
     return float(np.clip(s / len(use_cases), 0.0, 1.0))
 
+class AccordIndex:
+    """
+    Accords parsed once per catalog load: a sparse perfume x accord 0/1 matrix
+    plus, per use-case rule, how many boost/penalize accords each perfume has.
+    Scoring a request is then a gather over those count vectors.
+    """
+
+    def __init__(self, accords: Optional[pd.Series], n: int):
+        if accords is None:
+            accords = pd.Series([""] * n)
+        # parse each distinct accord string once (a categorical column has few of them)
+        codes, uniques = pd.factorize(accords.astype(object).fillna("").astype(str).str.lower())
+        self.vocab: Dict[str, int] = {}
+        parsed = [
+            # same token set as accords_set()
+            [self.vocab.setdefault(tok, len(self.vocab)) for tok in (set(s.split("|")) if s else ())]
+            for s in uniques
+        ]
+        lengths = np.fromiter((len(p) for p in parsed), dtype=np.int64, count=len(parsed))
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(lengths[codes], out=indptr[1:])
+        indices = [parsed[c] for c in codes]
+        indices = np.fromiter((t for toks in indices for t in toks), dtype=np.int32, count=int(indptr[-1]))
+        self.matrix = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.uint8), indices, indptr),
+            shape=(n, len(self.vocab)),
+        )
+        self._counts: Dict[Tuple[str, str], np.ndarray] = {}
+        for uc in USECASE_RULES:
+            self.counts(uc, "boost")
+            self.counts(uc, "penalize")
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], meta: dict) -> "AccordIndex":
+        """Index over arrays saved by `to_arrays` (used as is, e.g. memory-mapped)."""
+        self = cls.__new__(cls)
+        self.vocab = {tok: i for i, tok in enumerate(meta["vocab"])}
+        self.matrix = sparse.csr_matrix(
+            (arrays["data"], arrays["indices"], arrays["indptr"]),
+            shape=(meta["n"], len(self.vocab)),
+            copy=False,
+        )
+        self._counts = {tuple(key.split(".")[1:]): arrays[key] for key in arrays if key.startswith("counts.")}
+        return self
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], dict]:
+        arrays = {"data": self.matrix.data, "indices": self.matrix.indices, "indptr": self.matrix.indptr}
+        for (use_case, kind), counts in self._counts.items():
+            arrays[f"counts.{use_case}.{kind}"] = counts
+        return arrays, {"n": self.matrix.shape[0], "vocab": sorted(self.vocab, key=self.vocab.get)}
+
+    def counts(self, use_case: str, kind: str) -> np.ndarray:
+        """Per-perfume number of `kind` ("boost"/"penalize") accords for a rule (cached)."""
+        key = (use_case, kind)
+        out = self._counts.get(key)
+        if out is None:
+            rule = USECASE_RULES.get(use_case, {"boost": set(), "penalize": set()})
+            mask = np.zeros(len(self.vocab), dtype=np.int32)
+            for tok in rule[kind]:
+                if tok in self.vocab:
+                    mask[self.vocab[tok]] = 1
+            out = np.asarray(self.matrix @ mask, dtype=np.int8)
+            self._counts[key] = out
+        return out
+
+    def usecase_scores(self, ids: np.ndarray, use_cases: List[str] | None) -> np.ndarray:
+        """Columnar `usecase_score` for the perfumes at row positions `ids`."""
+        if not use_cases:
+            return np.full(len(ids), 0.5)
+        s = np.zeros(len(ids))
+        for uc in use_cases:
+            if uc not in USECASE_RULES:
+                s += 0.5
+                continue
+            boost = self.counts(uc, "boost")[ids].astype(np.float64)
+            penalize = self.counts(uc, "penalize")[ids].astype(np.float64)
+            s += 0.5 + 0.1 * boost - 0.05 * penalize
+        return np.clip(s / len(use_cases), 0.0, 1.0)
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Positions of the `k` best scores, best first, in O(n) + O(k log k).
+    Ties are broken by lower position (i.e. catalog order); NaN ranks last.
+    """
+    n = len(scores)
+    if n == 0 or k <= 0:
+        return np.empty(0, dtype=np.int64)
+    key = np.where(np.isnan(scores), -np.inf, scores)
+    if k < n:
+        kth = key[np.argpartition(-key, k - 1)[k - 1]]
+        # keep every score tied with the k-th so the tie-break stays exact
+        pool = np.flatnonzero(key >= kth)
+    else:
+        pool = np.arange(n)
+    order = np.lexsort((pool, -key[pool]))[:k]
+    return pool[order]
+
 def final_score(content_sim: float, uc: float, lon: float) -> float:
     # weights: 65% text similarity, 25% use-case fit, 10% longevity/sillage
     return 0.65 * content_sim + 0.25 * uc + 0.10 * lon
\ No newline at end of file
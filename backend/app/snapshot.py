@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .catalog import Catalog, load_catalog, write_arrays
+from .filters import FilterIndex
+from .neighbors import NameIndex, NeighborTable
+from .payloads import PayloadTable
+from .recommender import AccordIndex
+from .suggest import SuggestIndex
+from .vectorstore import DenseIndex, SimpleStore, build_corpus, content_hash
+
+try:  # advisory file lock between worker processes (POSIX)
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: no locking, each worker may build
+    fcntl = None
+
+# Bump when the saved snapshot layout changes, so old directories are rebuilt.
+SNAPSHOT_FORMAT = 4
+# Appended to the catalog hash of artifacts built by `append_snapshot`, so a cold
+# start never takes an incremental vocabulary / SVD for a full fit of that csv.
+APPEND_TAG = "+append"
+
+
+class Snapshot:
+    """
+    Everything derived from one catalog load: the catalog, its TF-IDF store
+    the filter / accord / name / neighbor indexes, the autocomplete index and
+    the prebuilt result payloads. Built once and never
+    mutated; a request reads the current snapshot once and uses it throughout,
+    so a reload can swap in a new one at any time.
+    """
+
+    def __init__(self, catalog: Catalog, store: Optional[SimpleStore] = None,
+                 neighbors: Optional[NeighborTable] = None, catalog_hash: str = "",
+                 source: Tuple[float, int] = (0.0, 0), version: int = 0,
+                 accords: Optional[AccordIndex] = None, filters: Optional[FilterIndex] = None,
+                 names: Optional[NameIndex] = None, score_cols: Optional[Dict[str, np.ndarray]] = None,
+                 payloads: Optional[PayloadTable] = None, suggest: Optional[SuggestIndex] = None):
+        df = catalog.df
+        self.catalog = catalog
+        self.store = store
+        self.neighbors = neighbors
+        # indexes not passed in (e.g. memory-mapped by `open`) are built from the catalog
+        self.accords = accords if accords is not None else AccordIndex(df.get("main_accords"), len(df))
+        self.filters = filters if filters is not None else FilterIndex(df)
+        self.names = names if names is not None else NameIndex(df)
+        self.payloads = payloads if payloads is not None else PayloadTable.build(catalog)
+        self.suggest = suggest if suggest is not None else SuggestIndex(df)
+        # float64 scoring columns, already carrying the `or default` fallback
+        self.score_cols: Dict[str, np.ndarray] = score_cols if score_cols is not None else {
+            "longevity": _column(df, "longevity", 3),
+            "rating_value": _column(df, "rating_value", 0),
+            "rating_count": _column(df, "rating_count", 0),
+        }
+        self.catalog_hash = catalog_hash
+        self.source = source  # (mtime, size) of the csv it was built from
+        self.version = version
+        self.built_at = time.time()
+        self.shared = False  # True when attached to a saved snapshot directory
+        self.directory: Optional[Path] = None  # that directory (batch pool workers attach to it too)
+
+    @classmethod
+    def empty(cls) -> "Snapshot":
+        return cls(Catalog(pd.DataFrame()))
+
+    def __len__(self) -> int:
+        return len(self.catalog)
+
+    @property
+    def incremental(self) -> bool:
+        """Built by `append_snapshot`: vectorized with an earlier catalog's vocabulary."""
+        return self.catalog_hash.endswith(APPEND_TAG)
+
+    # --- Shared snapshot directory ---
+    #   <part>.<array>.npy for the catalog, filter / name / accord indexes,
+    #   score columns, result payloads and autocomplete index, snapshot.json (format, catalog hash, per-part metadata; written last).
+    #   The TF-IDF store, neighbor table and dense index are not copied: they are
+    #   already saved (and memory-mapped) under the same catalog hash in the index dir.
+
+    def save(self, directory: Path) -> None:
+        """Write every derived array under `directory` (built in a temp dir, then renamed into place)."""
+        parts = {
+            "catalog": self.catalog.to_arrays(),
+            "filters": self.filters.to_arrays(),
+            "names": self.names.to_arrays(),
+            "accords": self.accords.to_arrays(),
+            "scores": (self.score_cols, {}),
+            "payloads": self.payloads.to_arrays(),
+            "suggest": self.suggest.to_arrays(),
+        }
+        meta = {"format": SNAPSHOT_FORMAT, "catalog_hash": self.catalog_hash,
+                "neighbors": self.neighbors is not None,
+                "dense": self.store.dense.dims if self.store is not None and self.store.dense is not None else 0,
+                "parts": {}}
+        flat = {}
+        for part, (arrays, part_meta) in parts.items():
+            flat.update({f"{part}.{name}": arr for name, arr in arrays.items()})
+            meta["parts"][part] = {"arrays": list(arrays), "meta": part_meta}
+        write_arrays(directory, flat, meta, "snapshot.json")
+
+    @classmethod
+    def open(cls, directory: Path, index_dir: Path, source: Tuple[float, int] = (0.0, 0),
+             version: int = 0, dense_dims: int = 0) -> Optional["Snapshot"]:
+        """
+        Attach to a saved snapshot: every array is memory-mapped read-only, so
+        processes opening the same directory share one copy in the page cache.
+        None if it is missing, stale, saved for another retrieval mode
+        (`dense_dims`), or its TF-IDF store / neighbor table / dense index is gone.
+        """
+        try:
+            with open(directory / "snapshot.json", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("format") != SNAPSHOT_FORMAT or meta.get("dense", 0) != dense_dims:
+            return None
+
+        def part(name: str):
+            info = meta["parts"][name]
+            arrays = {a: np.load(directory / f"{name}.{a}.npy", mmap_mode="r") for a in info["arrays"]}
+            return arrays, info["meta"]
+
+        catalog_hash = meta["catalog_hash"]
+        catalog = Catalog.from_arrays(*part("catalog"))
+        store = SimpleStore.load(catalog, index_dir, catalog_hash)
+        neighbors = None
+        if meta["neighbors"]:
+            neighbors = NeighborTable.load(index_dir, catalog_hash, len(catalog))
+        if store is None or (meta["neighbors"] and neighbors is None):
+            return None
+        if dense_dims:
+            store.dense = DenseIndex.load(index_dir, catalog_hash, len(catalog), dense_dims)
+            if store.dense is None:
+                return None
+        snap = cls(catalog, store, neighbors, catalog_hash, source, version,
+                   accords=AccordIndex.from_arrays(*part("accords")),
+                   filters=FilterIndex.from_arrays(*part("filters")),
+                   names=NameIndex.from_arrays(*part("names")),
+                   score_cols=part("scores")[0],
+                   payloads=PayloadTable.from_arrays(*part("payloads"), catalog=catalog),
+                   suggest=SuggestIndex.from_arrays(*part("suggest")))
+        snap.shared = True
+        snap.directory = directory
+        return snap
+
+
+def file_signature(path: Path) -> Tuple[float, int]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return 0.0, 0
+    return st.st_mtime, st.st_size
+
+
+def build_snapshot(path: Path, index_dir: Path, compact: bool = True, max_rows: int = 0,
+                   neighbors_top_n: int = 0, neighbors_build_max: int = 0, version: int = 0,
+                   dense_dims: int = 0, fit_max_rows: int = 0) -> Snapshot:
+    """
+    Full load: catalog, persisted (or refit) TF-IDF store, neighbor table and,
+    with `dense_dims`, dense index; then the other indexes. Above `fit_max_rows`
+    the TF-IDF index must already be saved (see `SimpleStore.load_or_build`).
+    """
+    source = file_signature(path)
+    catalog = load_catalog(path, compact=compact, max_rows=max_rows)
+    if not len(catalog):
+        return Snapshot(catalog, source=source, version=version)
+    catalog_hash = content_hash(path)
+    store = SimpleStore.load_or_build(catalog, path, index_dir, catalog_hash, fit_max_rows)
+    if dense_dims > 0:
+        store.dense = DenseIndex.load_or_build(store.X, index_dir, catalog_hash, dense_dims)
+    neighbors = None
+    if neighbors_top_n > 0:
+        neighbors = NeighborTable.load_or_build(store.X, index_dir, catalog_hash,
+                                                neighbors_top_n, neighbors_build_max)
+    return Snapshot(catalog, store, neighbors, catalog_hash, source, version)
+
+
+def append_snapshot(old: Snapshot, path: Path, index_dir: Path, compact: bool = True,
+                    version: int = 0) -> Optional[Snapshot]:
+    """
+    Incremental load when the csv only gained rows at the end: new perfumes
+    are vectorized with the current vocabulary and get their own neighbor
+    lists (and dense embeddings), nothing else is refit. None if the file is not an append of `old`.
+    The result is saved under the new file's hash plus APPEND_TAG: other workers
+    reloading can attach to it, but the next cold start refits the whole catalog.
+    """
+    if old.store is None or not len(old):
+        return None
+    source = file_signature(path)
+    catalog = load_catalog(path, compact=compact)
+    n = len(old)
+    if len(catalog) <= n or not _same_rows(old.catalog, catalog, n):
+        return None
+
+    store = old.store.extend(catalog)
+    neighbors = old.neighbors.extend(store.X) if old.neighbors is not None else None
+    catalog_hash = content_hash(path) + APPEND_TAG
+    try:
+        store.save(index_dir, catalog_hash)
+        if neighbors is not None:
+            neighbors.save(index_dir, catalog_hash)
+        if store.dense is not None:
+            store.dense.save(index_dir, catalog_hash)
+    except OSError as e:
+        print("⚠️ Could not save appended index:", e)
+    return Snapshot(catalog, store, neighbors, catalog_hash, source, version)
+
+
+def shared_snapshot(path: Path, index_dir: Path, build: Callable[[], Snapshot], compact: bool = True,
+                    max_rows: int = 0, version: int = 0, dense_dims: int = 0, full: bool = False) -> Snapshot:
+    """
+    Snapshot for `path` shared by every worker process using `index_dir`.
+    Under an exclusive file lock, the first worker to get here runs `build()`
+    and saves the result; the others (and later restarts) only memory-map it.
+    With `full` (cold start, full reload) an incremental snapshot found there
+    is rebuilt instead. Directories of other catalog versions are removed once a new one is saved.
+    """
+    source = file_signature(path)
+    if not source[1]:
+        return build()
+    root = index_dir / "snapshot"
+    directory = root / f"{content_hash(path)[:16]}-{'compact' if compact else 'plain'}-{max_rows}"
+    with _locked(index_dir / "snapshot.lock"):
+        snap = Snapshot.open(directory, index_dir, source, version, dense_dims)
+        if snap is not None and not (full and snap.incremental):
+            return snap
+        built = build()
+        if built.store is None:
+            return built
+        try:
+            built.save(directory)
+        except OSError as e:
+            print("⚠️ Could not save shared snapshot:", e)
+            return built
+        for old in root.iterdir():
+            if old != directory:
+                shutil.rmtree(old, ignore_errors=True)  # workers still mapping it keep their pages
+        return Snapshot.open(directory, index_dir, built.source, version, dense_dims) or built
+
+
+@contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _same_rows(old: Catalog, new: Catalog, n: int) -> bool:
+    """True when the first `n` rows of `new` index the same text as `old`'s rows (compared by per-row hash)."""
+    a = pd.util.hash_pandas_object(build_corpus(old), index=False).to_numpy()
+    b = pd.util.hash_pandas_object(build_corpus(new).iloc[:n], index=False).to_numpy()
+    return np.array_equal(a, b)
+
+
+def _column(df: pd.DataFrame, name: str, default: float) -> np.ndarray:
+    """float64 column with the same `row.get(name, default) or default` fallback as before."""
+    if name not in df.columns:
+        return np.full(len(df), float(default))
+    values = df[name].to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.where(values == 0, float(default), values)
@@ -0,0 +1,150 @@
+"""
+Perfume name autocomplete (/api/suggest): a sorted prefix index over the
+normalized names plus a character-trigram index for misspellings, both
+ranked by popularity (rating_count). Built with the rest of the snapshot.
+"""
+from __future__ import annotations
+
+import bisect
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .catalog import StringPool
+from .neighbors import normalize_name
+
+# every character `normalize_name` can leave, so a trigram is a number below len(ALPHABET) ** 3
+ALPHABET = " 0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(ALPHABET)
+N_TRIGRAMS = BASE ** 3
+_CODES = np.zeros(256, dtype=np.int64)
+_CODES[np.frombuffer(ALPHABET.encode("ascii"), dtype=np.uint8)] = np.arange(BASE)
+
+
+def _trigrams(texts: List[str], pad_end: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """(text index, trigram code) pairs of " text " (or " text"), each pair once, sorted."""
+    padded = [f" {t} " if pad_end else f" {t}" for t in texts]
+    lens = np.fromiter(map(len, padded), dtype=np.int64, count=len(padded))
+    codes = _CODES[np.frombuffer("".join(padded).encode("ascii"), dtype=np.uint8)]
+    owner = np.repeat(np.arange(len(padded), dtype=np.int64), lens)
+    if len(codes) < 3:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    grams = codes[:-2] * BASE * BASE + codes[1:-1] * BASE + codes[2:]
+    inside = owner[:-2] == owner[2:]  # windows that do not straddle two texts
+    pairs = np.sort(owner[:-2][inside] * N_TRIGRAMS + grams[inside])
+    pairs = pairs[np.concatenate([[True], pairs[1:] != pairs[:-1]])] if len(pairs) else pairs
+    return pairs // N_TRIGRAMS, pairs % N_TRIGRAMS
+
+
+def _normalized(values: Optional[pd.Series], n: int) -> List[str]:
+    """`normalize_name` of every value, computed once per distinct value (brands repeat a lot)."""
+    if values is None:
+        return [""] * n
+    values = values.astype(object).tolist()
+    done = {v: normalize_name(v) for v in set(values)}
+    return [done[v] for v in values]
+
+
+class SuggestIndex:
+    """
+    Prefix keys are each perfume's normalized `name` and `brand name`, kept
+    sorted in a string pool with their row ids, so the keys starting with a
+    query are one binary-searched block. Typos fall back to the trigrams of
+    `brand name`: a postings list per trigram code, rows scored by the share
+    of the query's trigrams they contain. All state is flat arrays (`to_arrays`).
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        n = len(df)
+        names = _normalized(df.get("name"), n)
+        brands = _normalized(df.get("brand"), n)
+        popularity = df["rating_count"].to_numpy(dtype=np.float64, na_value=0) if "rating_count" in df.columns \
+            else np.zeros(n)
+        full = [f"{b} {m}".strip() for b, m in zip(brands, names)]
+
+        # (key, row) for the name and, when there is a brand, "brand name"
+        keys = [(k, i) for i, k in enumerate(names) if k]
+        keys += [(k, i) for i, (k, m) in enumerate(zip(full, names)) if k and k != m]
+        keys.sort()
+        pool = StringPool.from_strings([k for k, _ in keys])
+        rows, grams = _trigrams(full)
+        order = np.argsort(grams, kind="stable")  # rows stay ascending within a trigram
+        offsets = np.zeros(N_TRIGRAMS + 1, dtype=np.int64)
+        np.cumsum(np.bincount(grams, minlength=N_TRIGRAMS), out=offsets[1:])
+        self._load({
+            "keys.buffer": pool.buffer, "keys.offsets": pool.offsets,
+            "key_rows": np.fromiter((i for _, i in keys), dtype=np.int32, count=len(keys)),
+            "popularity": np.nan_to_num(popularity).astype(np.float64),
+            "postings": rows[order].astype(np.int32),
+            "trigram_offsets": offsets,
+        })
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], meta: Optional[dict] = None) -> "SuggestIndex":
+        self = cls.__new__(cls)
+        self._load(arrays)
+        return self
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], dict]:
+        return self._arrays, {}
+
+    def _load(self, arrays: Dict[str, np.ndarray]) -> None:
+        self._arrays = arrays
+        self._keys = StringPool(arrays["keys.buffer"], arrays["keys.offsets"])
+        self._key_rows = arrays["key_rows"]
+        self._popularity = arrays["popularity"]
+        self._postings = arrays["postings"]
+        self._offsets = arrays["trigram_offsets"]
+
+    def __len__(self) -> int:
+        return len(self._popularity)
+
+    def suggest(self, query: str, limit: int = 8, cutoff: float = 0.6) -> List[int]:
+        """
+        Up to `limit` row ids for the partly typed `query`: perfumes with a key
+        starting with it, most rated first, then (for 3+ characters) close
+        spellings holding at least a `cutoff` share of the query's trigrams.
+        """
+        key = normalize_name(query)
+        if not key or limit <= 0:
+            return []
+        lo = bisect.bisect_left(self._keys, key)
+        hi = bisect.bisect_left(self._keys, key + "￿", lo)
+        out = self._ranked(self._key_rows[lo:hi], limit)
+        if len(out) < limit and len(key) >= 3:
+            seen = set(out)
+            for row in self._fuzzy(key, limit + len(out), cutoff):
+                if row not in seen:
+                    out.append(row)
+                    if len(out) == limit:
+                        break
+        return out
+
+    def _ranked(self, rows: np.ndarray, limit: int) -> List[int]:
+        """Distinct `rows`, most rated first (ties by row id), at most `limit`."""
+        if len(rows) > 2 * limit:
+            # a row has at most two keys, so the top 2*limit keys hold the answer; every key
+            # tied with the cut stays, so the tie-break below sees all candidates (as in `top_k`)
+            popularity = self._popularity[rows]
+            cut = np.partition(popularity, len(rows) - 2 * limit)[len(rows) - 2 * limit]
+            rows = rows[popularity >= cut]
+        rows = np.unique(rows)
+        return rows[np.lexsort((rows, -self._popularity[rows]))][:limit].tolist()
+
+    def _fuzzy(self, key: str, limit: int, cutoff: float) -> List[int]:
+        _, grams = _trigrams([key], pad_end=False)
+        if not len(grams):
+            return []
+        postings = [self._postings[self._offsets[g]:self._offsets[g + 1]] for g in grams.tolist()]
+        rows, need = np.concatenate(postings), cutoff * len(grams)
+        if 16 * len(rows) < len(self):
+            hits, shared = np.unique(rows, return_counts=True)
+            keep = shared >= need
+            hits, shared = hits[keep], shared[keep]
+        else:  # long postings: one counting pass instead of sorting them
+            shared = np.bincount(rows, minlength=len(self))
+            hits = np.flatnonzero(shared >= need)
+            shared = shared[hits]
+        order = np.lexsort((hits, -self._popularity[hits], -shared))[:limit]
+        return hits[order].tolist()
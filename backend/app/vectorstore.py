@@ -1,28 +1,563 @@
+import hashlib
+import json
+import os
+import zlib
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+
+from .cache import LRUCache
+from .catalog import StringPool
+from .metrics import stage
+from .recommender import top_k
+
+# Bump when the corpus recipe, vectorizer settings or saved layout change, so old artifacts are refit.
+INDEX_FORMAT = 3
+NGRAM_RANGE = (1, 2)
+
+
+def build_corpus(df) -> pd.Series:
+    """One text document per perfume; `df` is a DataFrame or a `catalog.Catalog`."""
+    def norm(series: pd.Series) -> pd.Series:
+        if series is None:
+            return pd.Series([""] * len(df))
+        return series.astype(object).fillna("").astype(str).str.replace("|", " ").str.lower()
+
+    return (
+        norm(df.get("description")) + " " +
+        norm(df.get("main_accords")) + " " +
+        norm(df.get("top_notes")) + " " +
+        norm(df.get("middle_notes")) + " " +
+        norm(df.get("base_notes"))
+    )
+
+
+def normalize_query(parts: List[str]) -> str:
+    """
+    Query text (and cache key): each liked name / note lowercased and
+    whitespace-collapsed, in request order. Neither step changes the TF-IDF
+    tokens; reordering would, since bigrams span neighbouring items.
+    """
+    items = [" ".join(str(p).lower().split()) for p in parts]
+    return " ".join(p for p in items if p)
+
+
+def content_hash(path: Union[str, Path]) -> str:
+    """sha256 of the catalog file plus the index format, used to tag artifacts."""
+    h = hashlib.sha256(f"tfidf-v{INDEX_FORMAT}:".encode())
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class Hits:
+    """Sparse similarity result: sorted doc ids with a nonzero score, and those scores."""
+
+    def __init__(self, ids: np.ndarray, sims: np.ndarray):
+        self.ids = ids
+        self.sims = sims
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.ids.nbytes + self.sims.nbytes)
+
+    def lookup(self, ids: np.ndarray) -> np.ndarray:
+        """Similarity for each of `ids` (sorted or not); 0.0 where the doc had no hit."""
+        out = np.zeros(len(ids), dtype=np.float64)
+        if len(self.ids) and len(ids):
+            pos = np.minimum(np.searchsorted(self.ids, ids), len(self.ids) - 1)
+            found = self.ids[pos] == ids
+            out[found] = self.sims[pos[found]]
+        return out
+
+    def dense(self, n: int) -> np.ndarray:
+        out = np.zeros(n, dtype=np.float64)
+        out[self.ids] = self.sims
+        return out
+
+
+class TermTable(Mapping):
+    """
+    Fitted vocabulary (term -> column) as flat arrays instead of a dict: the
+    terms in column order in a StringPool, plus an open-addressing table of
+    column ids keyed by the term's crc32 (linear probing, at most 2/3 full).
+    Saved with the index and memory-mapped, so every worker reads one shared
+    copy; `TfidfVectorizer.transform` only needs `vocabulary_[term]` and `len`.
+    """
+
+    def __init__(self, terms: StringPool, slots: np.ndarray):
+        self.terms = terms
+        self.slots = slots
+        self._mask = len(slots) - 1
+
+    @classmethod
+    def from_vocabulary(cls, vocabulary: Dict[str, int]) -> "TermTable":
+        ordered = [""] * len(vocabulary)
+        for term, i in vocabulary.items():
+            ordered[i] = term
+        size = 1 << max(3, (3 * len(ordered) // 2).bit_length())
+        mask = size - 1
+        slots = np.full(size, -1, dtype=np.int32)
+        pos = np.fromiter((zlib.crc32(t.encode("utf-8")) for t in ordered), dtype=np.int64,
+                          count=len(ordered)) & mask
+        todo = np.arange(len(ordered))
+        while len(todo):
+            # each free slot goes to its first claimant; the rest probe the next slot
+            free = np.flatnonzero(slots[pos[todo]] == -1)
+            claimed, first = np.unique(pos[todo[free]], return_index=True)
+            slots[claimed] = todo[free[first]]
+            placed = np.zeros(len(todo), dtype=bool)
+            placed[free[first]] = True
+            todo = todo[~placed]
+            pos[todo] = (pos[todo] + 1) & mask
+        return cls(StringPool.from_strings(ordered), slots)
+
+    def __getitem__(self, term: str) -> int:
+        slot = zlib.crc32(term.encode("utf-8")) & self._mask
+        while True:
+            col = int(self.slots[slot])
+            if col < 0:
+                raise KeyError(term)
+            if self.terms[col] == term:
+                return col
+            slot = (slot + 1) & self._mask
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.terms.tolist())
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.terms.nbytes + self.slots.nbytes)
+
+
+class InvertedIndex:
+    """
+    Term -> postings view of the (row L2-normalized) TF-IDF matrix: a CSR
+    matrix over terms whose rows list doc ids in ascending order with their
+    weights, plus each term's max weight for max-score pruning.
+    """
+
+    def __init__(self, postings: sparse.csr_matrix, max_weight: np.ndarray):
+        self.P = postings
+        self.max_weight = max_weight
+
+    @classmethod
+    def from_matrix(cls, X) -> "InvertedIndex":
+        P = sparse.csr_matrix(X.T)
+        P.sort_indices()
+        max_weight = np.zeros(P.shape[0], dtype=np.float64)
+        nonempty = np.diff(P.indptr) > 0
+        if nonempty.any():
+            max_weight[nonempty] = np.maximum.reduceat(P.data, P.indptr[:-1][nonempty])
+        return cls(P, max_weight)
+
+    def search(self, q, top_n: Optional[int] = None) -> Hits:
+        """
+        Cosine scores for docs sharing a term with the (normalized) query `q`.
+        Without `top_n` every matching doc is scored (one sparse product over
+        its postings). With `top_n`, terms are visited by decreasing upper
+        bound (max-score): once the top_n-th partial score beats what the
+        unvisited terms could add, new docs are no longer admitted and docs
+        that cannot catch up are dropped. The top_n docs returned carry exact scores.
+        """
+        q = sparse.csr_matrix(q)
+        if not top_n:
+            r = sparse.csr_matrix(q @ self.P)
+            r.eliminate_zeros()
+            r.sort_indices()
+            return Hits(r.indices.astype(np.int32), r.data.astype(np.float64))
+
+        terms, weights = q.indices, q.data
+        bounds = weights * self.max_weight[terms]
+        remaining = float(bounds.sum())
+        acc_ids = np.empty(0, dtype=np.int32)
+        acc = np.empty(0, dtype=np.float64)
+        admitting = True
+        for j in np.argsort(-bounds, kind="stable"):
+            remaining = max(remaining - float(bounds[j]), 0.0)
+            lo, hi = self.P.indptr[terms[j]], self.P.indptr[terms[j] + 1]
+            post_ids = self.P.indices[lo:hi]
+            post_w = weights[j] * self.P.data[lo:hi]
+            if admitting:
+                acc_ids, inverse = np.unique(np.concatenate([acc_ids, post_ids]), return_inverse=True)
+                acc = np.bincount(inverse, weights=np.concatenate([acc, post_w]), minlength=len(acc_ids))
+            elif len(post_ids) and len(acc_ids):
+                pos = np.minimum(np.searchsorted(post_ids, acc_ids), len(post_ids) - 1)
+                found = post_ids[pos] == acc_ids
+                acc[found] += post_w[pos[found]]
+            if len(acc) > top_n:
+                threshold = np.partition(acc, len(acc) - top_n)[len(acc) - top_n]
+                if threshold >= remaining:
+                    admitting = False
+                keep = acc + remaining >= threshold
+                acc_ids, acc = acc_ids[keep], acc[keep]
+
+        if len(acc) > top_n:
+            best = np.sort(top_k(acc, top_n))
+            acc_ids, acc = acc_ids[best], acc[best]
+        keep = acc > 0
+        return Hits(acc_ids[keep].astype(np.int32), acc[keep])
+
+
+class DenseIndex:
+    """
+    Truncated-SVD (LSA) projection of the TF-IDF matrix: every document as a
+    `dims`-wide L2-normalized float32 row of one contiguous matrix, so a query
+    is one matrix-vector product and a batch of queries one matrix product.
+    Approximate: scores are cosines in the reduced space, not TF-IDF cosines.
+    Terms found in fewer than `min_df` documents cannot relate two documents
+    and are left out of the projection, which bounds its size on large
+    vocabularies; `terms` maps a vocabulary column to its row of `vectors` (-1 = dropped).
+    """
+
+    def __init__(self, docs: np.ndarray, vectors: np.ndarray, terms: np.ndarray):
+        self.docs = docs        # documents x dims
+        self.vectors = vectors  # kept terms x dims (TF-IDF weights -> embedding)
+        self.terms = terms
+
+    @property
+    def dims(self) -> int:
+        return self.vectors.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.docs.nbytes + self.vectors.nbytes + self.terms.nbytes)
+
+    @classmethod
+    def build(cls, X, dims: int = 128, min_df: int = 2, seed: int = 42) -> "DenseIndex":
+        from sklearn.decomposition import TruncatedSVD
+        X = sparse.csr_matrix(X)
+        keep = np.flatnonzero(np.bincount(X.indices, minlength=X.shape[1]) >= min_df)
+        if not len(keep):  # tiny catalogs: no shared term at all
+            keep = np.arange(X.shape[1])
+        dims = max(1, min(dims, len(keep) - 1, X.shape[0] - 1))
+        svd = TruncatedSVD(dims, random_state=seed).fit(X[:, keep])
+        terms = np.full(X.shape[1], -1, dtype=np.int32)
+        terms[keep] = np.arange(len(keep), dtype=np.int32)
+        index = cls(np.empty((0, dims), dtype=np.float32),
+                    np.ascontiguousarray(svd.components_.T, dtype=np.float32), terms)
+        index.docs = index.embed(X)
+        return index
+
+    def embed(self, Q) -> np.ndarray:
+        """Unit-length embeddings of the TF-IDF rows `Q` (all-zero rows for texts with no kept term)."""
+        Q = sparse.csr_matrix(Q)
+        cols = self.terms[Q.indices]
+        keep = cols >= 0
+        rows = np.repeat(np.arange(Q.shape[0]), np.diff(Q.indptr))
+        Q = sparse.csr_matrix((Q.data[keep].astype(np.float32), (rows[keep], cols[keep])),
+                              shape=(Q.shape[0], len(self.vectors)))
+        E = np.ascontiguousarray(Q @ self.vectors, dtype=np.float32)
+        norms = np.linalg.norm(E, axis=1, keepdims=True)
+        return E / np.where(norms > 0, norms, 1)
+
+    def extend(self, X) -> "DenseIndex":
+        """Index for `X`, whose leading rows are this index's documents: new rows are projected, nothing is refit."""
+        return DenseIndex(np.concatenate([self.docs, self.embed(X[len(self.docs):])]), self.vectors, self.terms)
+
+    def search(self, q, top_n: Optional[int] = None) -> Hits:
+        """Docs with a positive reduced-space cosine to `q` (only the best `top_n`, if given)."""
+        q = sparse.csr_matrix(q)
+        cols = self.terms[q.indices]
+        keep = cols >= 0
+        e = q.data[keep].astype(np.float32) @ self.vectors[cols[keep]]  # a few rows of `vectors`
+        norm = np.linalg.norm(e)
+        if not norm:
+            return Hits(np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64))
+        return self._hits(self.docs @ (e / norm), top_n)
+
+    def search_many(self, Q) -> List[Hits]:
+        """`search` for every row of `Q`: one (queries x dims) x (dims x documents) product."""
+        S = self.embed(Q) @ self.docs.T
+        return [self._hits(s, None) for s in S]
+
+    @staticmethod
+    def _hits(sims: np.ndarray, top_n: Optional[int]) -> Hits:
+        if top_n and top_n < len(sims):
+            ids = np.sort(top_k(sims, top_n))
+            ids = ids[sims[ids] > 0]
+        else:
+            ids = np.flatnonzero(sims > 0)
+        return Hits(ids.astype(np.int32), sims[ids].astype(np.float64))
+
+    # --- Persisted next to the TF-IDF index ---
+    #   dense_docs.npy, dense_vectors.npy, dense_terms.npy, dense.json (catalog hash, dims; written last)
+
+    def save(self, index_dir: Union[str, Path], catalog_hash: str) -> None:
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        tmp = f".tmp-{os.getpid()}"
+        for name, arr in (("dense_docs", self.docs), ("dense_vectors", self.vectors), ("dense_terms", self.terms)):
+            with open(index_dir / f"{name}.npy{tmp}", "wb") as f:
+                np.save(f, arr)
+            os.replace(index_dir / f"{name}.npy{tmp}", index_dir / f"{name}.npy")
+        with open(index_dir / f"dense.json{tmp}", "w", encoding="utf-8") as f:
+            json.dump({"format": INDEX_FORMAT, "catalog_hash": catalog_hash, "dims": self.dims,
+                       "shape": list(self.docs.shape)}, f)
+        os.replace(index_dir / f"dense.json{tmp}", index_dir / "dense.json")
+
+    @classmethod
+    def load(cls, index_dir: Union[str, Path], catalog_hash: str, n: int, dims: int) -> Optional["DenseIndex"]:
+        """Memory-map a saved index; None if it is missing, of other dims or built for another catalog."""
+        index_dir = Path(index_dir)
+        try:
+            with open(index_dir / "dense.json", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (meta.get("format") != INDEX_FORMAT or meta.get("catalog_hash") != catalog_hash
+                or meta.get("dims") != dims or (meta.get("shape") or [None])[0] != n):
+            return None
+        return cls(_mmap(index_dir, "dense_docs"), _mmap(index_dir, "dense_vectors"), _mmap(index_dir, "dense_terms"))
+
+    @classmethod
+    def load_or_build(cls, X, index_dir: Union[str, Path], catalog_hash: str, dims: int) -> "DenseIndex":
+        """Saved index if current; otherwise fit the SVD (and try to save it)."""
+        index = cls.load(index_dir, catalog_hash, X.shape[0], dims)
+        if index is not None:
+            return index
+        print(f"ℹ️ Dense index missing or stale, fitting a {dims}-dim SVD")
+        index = cls.build(X, dims)
+        try:
+            index.save(index_dir, catalog_hash)
+        except OSError as e:
+            print("⚠️ Could not save dense index:", e)
+        return index
+
 
 class SimpleStore:
-    def __init__(self, df: pd.DataFrame):
-        self.df = df.reset_index(drop=True)
-
-        def norm(series: pd.Series) -> pd.Series:
-            if series is None:
-                return pd.Series([""] * len(self.df))
-            return series.fillna("").astype(str).str.replace("|", " ").str.lower()
-
-        corpus = (
-            norm(self.df.get("description")) + " " +
-            norm(self.df.get("main_accords")) + " " +
-            norm(self.df.get("top_notes")) + " " +
-            norm(self.df.get("middle_notes")) + " " +
-            norm(self.df.get("base_notes"))
-        )
+    def __init__(self, df, vec: Optional[TfidfVectorizer] = None, X=None,
+                 index: Optional[InvertedIndex] = None, dense: Optional[DenseIndex] = None):
+        if vec is None or X is None:
+            vec = TfidfVectorizer(min_df=1, ngram_range=NGRAM_RANGE)
+            X = vec.fit_transform(build_corpus(df))
+            vec.vocabulary_ = TermTable.from_vocabulary(vec.vocabulary_)  # the dict is the largest part of the fit
+        self.vec = vec
+        self.X = X
+        self.index = index if index is not None else InvertedIndex.from_matrix(X)
+        # set: queries are answered from the SVD embeddings instead of the inverted index
+        self.dense = dense
+        self.cache: Optional[LRUCache] = None
+        self.cache_hits = False
+
+    def enable_cache(self, max_bytes: int, ttl: Optional[float] = None, cache_hits: bool = True) -> None:
+        """Cache query vectors (and, with `cache_hits`, their search results) per query text."""
+        self.cache = LRUCache(max_bytes, ttl)
+        self.cache_hits = cache_hits
+
+    def disable_cache(self) -> None:
+        """Drop the cache and its memory (searches already running keep the one they read)."""
+        self.cache = None
+
+    @property
+    def retriever(self):
+        return self.dense if self.dense is not None else self.index
 
-        self.vec = TfidfVectorizer(min_df=1, ngram_range=(1, 2))
-        self.X = self.vec.fit_transform(corpus)
+    def search(self, text: str, top_n: Optional[int] = None) -> Hits:
+        """
+        Cosine similarity of `text` against the catalog: sparse (see
+        `InvertedIndex.search`) or, with a dense index, in its reduced space.
+        """
+        text = text.lower()
+        key = (text, top_n or 0)
+        cache = self.cache
+        if cache is not None:
+            hit = cache.get(key)
+            if hit is not None:
+                q, hits = hit
+                if hits is not None:
+                    return hits
+                with stage("similarity"):
+                    return self.retriever.search(q, top_n)
+
+        with stage("vectorize"):
+            q = self.vec.transform([text])
+        with stage("similarity"):
+            hits = self.retriever.search(q, top_n)
+        if cache is not None:
+            nbytes = q.data.nbytes + q.indices.nbytes + q.indptr.nbytes + 256
+            if not (self.cache_hits and cache.put(key, (q, hits), nbytes + hits.nbytes)):
+                cache.put(key, (q, None), nbytes)
+        return hits
+
+    def search_many(self, texts: List[str]) -> List[Hits]:
+        """
+        `search` for many texts: one transform, then one sparse x sparse product
+        (or one dense matrix product with a dense index).
+        """
+        with stage("vectorize"):
+            Q = self.vec.transform([t.lower() for t in texts])
+        with stage("similarity"):
+            if self.dense is not None:
+                return self.dense.search_many(Q)
+            R = sparse.csr_matrix(Q @ self.index.P)
+            R.eliminate_zeros()
+            R.sort_indices()
+        return [
+            Hits(R.indices[R.indptr[i]:R.indptr[i + 1]].astype(np.int32), R.data[R.indptr[i]:R.indptr[i + 1]])
+            for i in range(len(texts))
+        ]
+
+    def extend(self, df) -> "SimpleStore":
+        """
+        Store for `df`, whose leading rows are this store's catalog: the new rows
+        are transformed with the fitted vocabulary and idf weights (and projected
+        with the fitted SVD), nothing is refit.
+        """
+        n = self.X.shape[0]
+        X_new = self.vec.transform(build_corpus(df).iloc[n:])
+        X = sparse.vstack([self.X, X_new], format="csr")
+        return SimpleStore(df, vec=self.vec, X=X, dense=self.dense.extend(X) if self.dense is not None else None)
 
     def query_text(self, text: str):
-        q = self.vec.transform([text.lower()])
-        sims = cosine_similarity(q, self.X).ravel()
-        return sims
\ No newline at end of file
+        """Dense similarity array over the whole catalog."""
+        return self.search(text).dense(self.X.shape[0])
+
+    # --- Persisted index artifact ---
+    #   meta.json   format, catalog hash, shape
+    #   vocab_buffer.npy, vocab_offsets.npy, vocab_slots.npy   TermTable (terms in column order + hash slots)
+    #   idf.npy, data.npy, indices.npy, indptr.npy   doc x term CSR
+    #   post_data.npy, post_indices.npy, post_indptr.npy, max_weight.npy   term x doc postings
+    #   (all .npy files are loaded memory-mapped)
+
+    def save(self, index_dir: Union[str, Path], catalog_hash: str) -> None:
+        """Write the fitted vocabulary, idf weights and CSR arrays. meta.json goes last."""
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        X = self.X.tocsr()
+        vocab = self.vec.vocabulary_
+        if not isinstance(vocab, TermTable):
+            vocab = TermTable.from_vocabulary(vocab)
+        P = self.index.P
+        arrays = {
+            "vocab_buffer": vocab.terms.buffer,
+            "vocab_offsets": vocab.terms.offsets,
+            "vocab_slots": vocab.slots,
+            "idf": np.asarray(self.vec.idf_, dtype=np.float64),
+            "data": np.asarray(X.data, dtype=np.float64),
+            "indices": np.asarray(X.indices, dtype=np.int32),
+            "indptr": np.asarray(X.indptr, dtype=np.int64),
+            "post_data": np.asarray(P.data, dtype=np.float64),
+            "post_indices": np.asarray(P.indices, dtype=np.int32),
+            "post_indptr": np.asarray(P.indptr, dtype=np.int64),
+            "max_weight": np.asarray(self.index.max_weight, dtype=np.float64),
+        }
+        tmp = f".tmp-{os.getpid()}"
+        for name, arr in arrays.items():
+            with open(index_dir / f"{name}.npy{tmp}", "wb") as f:
+                np.save(f, arr)
+            os.replace(index_dir / f"{name}.npy{tmp}", index_dir / f"{name}.npy")
+        meta = {"format": INDEX_FORMAT, "catalog_hash": catalog_hash, "shape": list(X.shape)}
+        with open(index_dir / f"meta.json{tmp}", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(index_dir / f"meta.json{tmp}", index_dir / "meta.json")
+
+    @classmethod
+    def load(cls, df, index_dir: Union[str, Path], catalog_hash: str) -> Optional["SimpleStore"]:
+        """Memory-map a saved index; None if it is missing or was built for another catalog."""
+        index_dir = Path(index_dir)
+        try:
+            with open(index_dir / "meta.json", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        shape = tuple(meta.get("shape") or ())
+        if (meta.get("format") != INDEX_FORMAT or meta.get("catalog_hash") != catalog_hash
+                or len(shape) != 2 or shape[0] != len(df)):
+            return None
+
+        vec = TfidfVectorizer(min_df=1, ngram_range=NGRAM_RANGE)
+        vec.vocabulary_ = TermTable(StringPool(_mmap(index_dir, "vocab_buffer"), _mmap(index_dir, "vocab_offsets")),
+                                    _mmap(index_dir, "vocab_slots"))
+        vec.idf_ = _mmap(index_dir, "idf")
+        X = sparse.csr_matrix(
+            (_mmap(index_dir, "data"), _mmap(index_dir, "indices"), _mmap(index_dir, "indptr")),
+            shape=shape,
+            copy=False,
+        )
+        P = sparse.csr_matrix(
+            (_mmap(index_dir, "post_data"), _mmap(index_dir, "post_indices"), _mmap(index_dir, "post_indptr")),
+            shape=(shape[1], shape[0]),
+            copy=False,
+        )
+        return cls(df, vec=vec, X=X, index=InvertedIndex(P, _mmap(index_dir, "max_weight")))
+
+    @classmethod
+    def load_or_build(cls, df, catalog_path: Union[str, Path], index_dir: Union[str, Path],
+                      catalog_hash: Optional[str] = None, fit_max_rows: int = 0) -> "SimpleStore":
+        """
+        Use the saved index when its hash matches `catalog_path`, otherwise refit
+        and save it, then map the saved files (the fitted arrays are freed).
+        Catalogs above `fit_max_rows` (> 0) are not fitted: RuntimeError.
+        """
+        catalog_hash = catalog_hash or content_hash(catalog_path)
+        store = cls.load(df, index_dir, catalog_hash)
+        if store is not None:
+            return store
+        if 0 < fit_max_rows < len(df):
+            raise RuntimeError(f"TF-IDF index missing or stale for {len(df)} perfumes, above the "
+                               f"{fit_max_rows}-row fit limit: build it with `python -m app.vectorstore`")
+        print("ℹ️ TF-IDF index missing or stale, fitting from catalog")
+        store = cls(df)
+        try:
+            store.save(index_dir, catalog_hash)
+        except OSError as e:
+            print("⚠️ Could not save TF-IDF index:", e)
+            return store
+        return cls.load(df, index_dir, catalog_hash) or store
+
+
+def _mmap(index_dir: Path, name: str) -> np.ndarray:
+    return np.load(index_dir / f"{name}.npy", mmap_mode="r")
+
+def main() -> None:
+    """Offline build: `cd backend && python -m app.vectorstore`."""
+    import argparse
+    from .catalog import load_catalog
+    from .main import (CATALOG_COMPACT, CATALOG_MAX_ROWS, DATA_PATH, INDEX_DIR, NEIGHBORS_BUILD_MAX,
+                       NEIGHBORS_TOP_N, RETRIEVAL_DIMS, SHARED_SNAPSHOT)
+    from .neighbors import NeighborTable
+    from .snapshot import build_snapshot, shared_snapshot
+
+    parser = argparse.ArgumentParser(description="Build the persisted TF-IDF index and neighbor table for perfumes.csv")
+    parser.add_argument("--catalog", default=str(DATA_PATH))
+    parser.add_argument("--out", default=str(INDEX_DIR))
+    args = parser.parse_args()
+
+    catalog = Path(args.catalog)
+    if not catalog.exists():
+        print(f"ℹ️ No catalog at {catalog}, nothing to index")
+        return
+    catalog_hash = content_hash(catalog)
+    store = SimpleStore(load_catalog(catalog, max_rows=CATALOG_MAX_ROWS))
+    store.save(args.out, catalog_hash)
+    print(f"✅ Saved TF-IDF index: {args.out} | docs: {store.X.shape[0]} | terms: {store.X.shape[1]}")
+    if NEIGHBORS_TOP_N > 0 and store.X.shape[0] > 1:
+        table = NeighborTable.build(store.X, NEIGHBORS_TOP_N)
+        table.save(args.out, catalog_hash)
+        print(f"✅ Saved neighbor table: top {table.ids.shape[1]} per perfume ({table.nbytes / 2**20:.1f} MiB)")
+    if RETRIEVAL_DIMS > 0:
+        dense = DenseIndex.build(store.X, RETRIEVAL_DIMS)
+        dense.save(args.out, catalog_hash)
+        print(f"✅ Saved dense index: {dense.dims} dims ({dense.nbytes / 2**20:.1f} MiB)")
+    if SHARED_SNAPSHOT:
+        # catalog arrays and indexes for the workers to memory-map (reuses the files saved above)
+        out = Path(args.out)
+        shared_snapshot(catalog, out, lambda: build_snapshot(catalog, out, CATALOG_COMPACT, CATALOG_MAX_ROWS,
+                                                             NEIGHBORS_TOP_N, NEIGHBORS_BUILD_MAX,
+                                                             dense_dims=RETRIEVAL_DIMS),
+                        CATALOG_COMPACT, CATALOG_MAX_ROWS, dense_dims=RETRIEVAL_DIMS, full=True)
+        print(f"✅ Saved shared snapshot: {out / 'snapshot'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Benchmarks: `cd backend && python -m bench.<name> --help`."""
@@ -0,0 +1,154 @@
+"""
+Synthetic perfume catalogs with the perfumes.csv schema, for benchmarks.
+Deterministic for a given size and seed; written once and reused.
+
+    cd backend && python -m bench.catalog --rows 5k 50k 500k
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from .common import BENCH_DIR
+
+DATA_DIR = BENCH_DIR / "data"
+SIZES = {"5k": 5_000, "50k": 50_000, "500k": 500_000}
+
+ACCORDS = ["citrus", "woody", "fresh", "green", "aromatic", "floral", "fruity", "sweet", "very_sweet",
+           "vanilla", "amber", "spicy", "oud", "leather", "musky", "powdery", "aquatic", "heavy",
+           "smoky", "earthy", "balsamic", "rose", "iris", "tobacco", "lavender", "coffee"]
+NOTES = ["bergamot", "lemon", "grapefruit", "mandarin", "neroli", "pink pepper", "cardamom", "ginger",
+         "lavender", "rose", "jasmine", "iris", "violet", "tuberose", "orange blossom", "geranium",
+         "sage", "vetiver", "cedar", "sandalwood", "patchouli", "oud", "amber", "vanilla", "tonka bean",
+         "benzoin", "labdanum", "musk", "leather", "tobacco", "incense", "coffee", "cacao", "almond",
+         "apple", "pear", "blackcurrant", "raspberry", "coconut", "sea notes", "ambroxan", "birch tar"]
+WORDS = ["warm", "fresh", "bright", "dark", "creamy", "powdery", "smoky", "sweet", "airy", "elegant",
+         "sensual", "clean", "bold", "soft", "modern", "classic", "intense", "radiant", "cozy", "juicy",
+         "opens", "with", "and", "a", "of", "the", "heart", "base", "dries", "down", "into", "trail",
+         "notes", "accord", "scent", "fragrance", "composition", "signature", "for", "evening", "day"]
+ADJECTIVES = ["Blue", "Black", "Velvet", "Golden", "Silver", "Wild", "Midnight", "Royal", "Secret",
+              "Electric", "Pure", "Dark", "Bright", "Rose", "Amber", "Ocean", "Desert", "Imperial",
+              "Eternal", "Crystal", "Savage", "Noble", "Radiant", "Hidden", "Luminous", "Urban"]
+NOUNS = ["Oud", "Iris", "Vetiver", "Musk", "Bloom", "Legend", "Night", "Garden", "Leather", "Vanilla",
+         "Cedar", "Storm", "Spirit", "Code", "Dream", "Idol", "Tobacco", "Wood", "Rain", "Orchid",
+         "Saffron", "Tonka", "Neroli", "Voyage", "Empire", "Echo", "Aura", "Essence", "Ember", "Nomad"]
+FLANKERS = ["", " Intense", " Eau de Parfum", " Noir", " Extreme", " Elixir", " Sport", " Absolu", " Prive"]
+SYLLABLES = ["la", "mo", "ri", "sa", "ve", "no", "ta", "ki", "lu", "de", "ar", "el", "on", "is", "or",
+             "an", "be", "ca", "fi", "go", "ju", "ne", "po", "qu", "ro", "si", "tu", "vi", "za", "xe"]
+
+
+def _pseudo_words(n: int, rng: np.random.Generator) -> List[str]:
+    """`n` distinct made-up words, the long tail of a realistic description vocabulary."""
+    out, seen = [], set()
+    while len(out) < n:
+        w = "".join(rng.choice(SYLLABLES, size=int(rng.integers(2, 5))))
+        if w not in seen:
+            seen.add(w)
+            out.append(w)
+    return out
+
+
+def _join(vocab: np.ndarray, idx: np.ndarray, lengths: np.ndarray, sep: str) -> List[str]:
+    """Row i = `sep`-joined vocab[idx[...]] over its `lengths[i]` slice of the flat `idx`."""
+    words = vocab[idx]
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    return [sep.join(words[s:e]) for s, e in zip(starts, ends)]
+
+
+def _zipf_choice(rng: np.random.Generator, n_items: int, size: int, a: float = 1.1) -> np.ndarray:
+    """Indices in [0, n_items) with Zipf-like frequencies (item 0 most common)."""
+    weights = 1.0 / np.arange(1, n_items + 1) ** a
+    return rng.choice(n_items, size=size, p=weights / weights.sum())
+
+
+def generate(n: int, seed: int = 42) -> pd.DataFrame:
+    """`n` synthetic perfumes with the perfumes.csv columns (plus middle / base notes)."""
+    rng = np.random.default_rng(seed)
+    brands = np.array([w.capitalize() for w in _pseudo_words(max(50, n // 300), rng)], dtype=object)
+    brand = brands[_zipf_choice(rng, len(brands), n, a=0.8)]
+    name = (np.array(ADJECTIVES, dtype=object)[rng.integers(0, len(ADJECTIVES), n)] + " "
+            + np.array(NOUNS, dtype=object)[rng.integers(0, len(NOUNS), n)]
+            + np.array(FLANKERS, dtype=object)[_zipf_choice(rng, len(FLANKERS), n, a=1.5)])
+    gender = rng.choice(np.array(["Male", "Female", "Unisex"], dtype=object), size=n, p=[0.4, 0.4, 0.2])
+
+    price_min = rng.integers(100, 900, n).astype(float)
+    price_max = price_min + rng.integers(50, 900, n)
+    longevity = rng.integers(1, 6, n).astype(float)
+    longevity[rng.random(n) < 0.02] = np.nan
+    sillage = rng.integers(1, 6, n).astype(float)
+    rating_value = np.round(np.clip(rng.normal(3.9, 0.5, n), 1.0, 5.0), 2)
+    rating_value[rng.random(n) < 0.02] = np.nan
+    rating_count = np.floor(rng.lognormal(5.0, 1.6, n)).astype(float)
+
+    accords = np.array(ACCORDS, dtype=object)
+    n_acc = rng.integers(1, 7, n)
+    n_acc[rng.random(n) < 0.15] = 0
+    main_accords = _join(accords, _zipf_choice(rng, len(accords), int(n_acc.sum()), a=0.7), n_acc, "|")
+
+    notes = np.array(NOTES, dtype=object)
+    note_cols = {}
+    for col in ("top_notes", "middle_notes", "base_notes"):
+        k = rng.integers(2, 6, n)
+        note_cols[col] = _join(notes, rng.integers(0, len(notes), int(k.sum())), k, "|")
+
+    # descriptions: common words and notes plus a long tail of rarer terms
+    vocab = np.array(WORDS + NOTES + ACCORDS + _pseudo_words(20_000, rng), dtype=object)
+    k = rng.integers(15, 46, n)
+    description = _join(vocab, _zipf_choice(rng, len(vocab), int(k.sum()), a=1.05), k, " ")
+
+    slug = pd.Series(name).str.lower().str.replace(r"[^a-z0-9]+", "-", regex=True)
+    url = ("https://www.fragrantica.com/perfume/" + pd.Series(brand).str.lower() + "/" + slug + "-"
+           + pd.Series(np.arange(n)).astype(str) + ".html")
+    return pd.DataFrame({
+        "brand": brand, "name": name, "gender": gender,
+        "price_min": price_min, "price_max": price_max, "main_accords": main_accords,
+        "longevity": longevity, "sillage": sillage, "rating_value": rating_value, "rating_count": rating_count,
+        "description": description, "url": url.to_numpy(), **note_cols,
+    })
+
+
+def parse_size(text: str) -> int:
+    """"5k" / "500k" / "2m" / "1234" -> rows."""
+    m = re.fullmatch(r"(\d+)([km]?)", text.strip().lower())
+    if not m:
+        raise argparse.ArgumentTypeError(f"bad size: {text!r}")
+    return int(m.group(1)) * {"": 1, "k": 1_000, "m": 1_000_000}[m.group(2)]
+
+
+def size_label(n: int) -> str:
+    return f"{n // 1_000_000}m" if n % 1_000_000 == 0 else f"{n // 1000}k" if n % 1000 == 0 else str(n)
+
+
+def ensure_catalog(n: int, seed: int = 42, out_dir: Path = DATA_DIR) -> Path:
+    """Path of the generated catalog with `n` rows, writing it first if missing."""
+    path = out_dir / f"perfumes-{size_label(n)}-s{seed}.csv"
+    if not path.exists():
+        out_dir.mkdir(parents=True, exist_ok=True)
+        t0 = time.perf_counter()
+        tmp = path.with_suffix(".csv.tmp")
+        generate(n, seed).to_csv(tmp, index=False)
+        tmp.replace(path)
+        print(f"✅ Generated {path} ({n} rows, {time.perf_counter() - t0:.1f}s)")
+    return path
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rows", type=parse_size, nargs="+", default=list(SIZES.values()),
+                    help="catalog sizes, e.g. 5k 50k 500k")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out", default=str(DATA_DIR))
+    args = ap.parse_args()
+    for n in args.rows:
+        print(ensure_catalog(n, args.seed, Path(args.out)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Shared helpers for the benchmarks: timing percentiles, RSS and the JSON result files."""
+from __future__ import annotations
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+BENCH_DIR = Path(__file__).resolve().parent
+RESULTS_DIR = BENCH_DIR / "results"
+
+
+def summarize(seconds: Iterable[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds: count, mean, p50 / p95 / p99 and max."""
+    ms = np.asarray(list(seconds), dtype=np.float64) * 1000
+    if not len(ms):
+        return {"n": 0}
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"n": int(len(ms)), "mean_ms": round(float(ms.mean()), 4), "p50_ms": round(float(p50), 4),
+            "p95_ms": round(float(p95), 4), "p99_ms": round(float(p99), 4), "max_ms": round(float(ms.max()), 4)}
+
+
+def time_calls(fn: Callable[[int], object], n: int, warmup: int = 3) -> Dict[str, float]:
+    """Call `fn(i)` for i in range(n) after `warmup` untimed calls; summary of the per-call times."""
+    for i in range(min(warmup, n)):
+        fn(i)
+    times: List[float] = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        fn(i)
+        times.append(time.perf_counter() - t0)
+    return summarize(times)
+
+
+def peak_rss_mib(pid: Optional[int] = None) -> Optional[float]:
+    """Peak resident set size (VmHWM) of `pid` (default: this process), in MiB; None if unknown."""
+    try:
+        with open(f"/proc/{pid or os.getpid()}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    if pid is None:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (2**20 if sys.platform == "darwin" else 1024), 1)
+    return None
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def write_results(name: str, payload: Dict[str, object], path: Optional[str] = None) -> Path:
+    """
+    Save `payload` with the commit, time and machine it ran on, to `path` or
+    bench/results/<name>-<commit>-<timestamp>.json, so runs can be compared.
+    """
+    commit = git_commit()
+    record = {
+        "benchmark": name,
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} cpus",
+        **payload,
+    }
+    if path:
+        out = Path(path)
+    else:
+        out = RESULTS_DIR / f"{name}-{commit or 'nogit'}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2)
+    print(f"✅ Results: {out}")
+    return out
@@ -0,0 +1,58 @@
+"""
+Compare two benchmark result files (same benchmark, e.g. two commits):
+every shared latency percentile / throughput number side by side with the change.
+
+    cd backend && python -m bench.compare bench/results/micro-abc123-*.json bench/results/micro-def456-*.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from typing import Dict, Iterator, Tuple
+
+# lower is better for these; rps / takes_per_s / recall are better when higher
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "rps", "takes_per_s", "server_peak_rss_mib", "peak_rss_mib",
+           "import_ms", "index_mib", "recall_at_10", "recall_at_50")
+
+
+def flatten(node, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """(dotted path, value) for every metric in a result file; list items are keyed by their parameters."""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key in METRICS and isinstance(value, (int, float)):
+                yield f"{prefix}{key}", float(value)
+            else:
+                yield from flatten(value, f"{prefix}{key}.")
+    elif isinstance(node, list):
+        for i, item in enumerate(node):
+            label = i
+            if isinstance(item, dict):
+                params = [f"{k}={item[k]}" for k in ("store", "mode", "dims", "threads", "processes", "concurrency")
+                          if k in item]
+                label = ",".join(params) or i
+            yield from flatten(item, f"{prefix}[{label}].")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("before")
+    ap.add_argument("after")
+    args = ap.parse_args()
+    with open(args.before, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(args.after, encoding="utf-8") as f:
+        after = json.load(f)
+    if before.get("benchmark") != after.get("benchmark"):
+        raise SystemExit(f"different benchmarks: {before.get('benchmark')} vs {after.get('benchmark')}")
+
+    old: Dict[str, float] = dict(flatten(before))
+    print(f"{before.get('benchmark')}: {before.get('commit')} -> {after.get('commit')}")
+    for path, new in flatten(after):
+        if path not in old:
+            continue
+        change = (new - old[path]) / old[path] * 100 if old[path] else 0.0
+        print(f"  {path:<58} {old[path]:>12.3f} {new:>12.3f} {change:>+8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
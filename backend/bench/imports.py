@@ -0,0 +1,79 @@
+"""
+Import-time budget of the server module: `import app.main` runs before
+uvicorn binds its port, so it has to stay small. Measures it with
+`python -X importtime` in fresh interpreters, lists the heaviest packages and
+exits non-zero when the median is over --budget-ms or when a module that
+should only load in the warmup thread (pandas, SciPy, scikit-learn) was imported.
+
+    cd backend && python -m bench.imports --runs 5 --budget-ms 1000
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from .common import BENCH_DIR, write_results
+
+BACKEND_DIR = BENCH_DIR.parent
+
+
+def import_times(module: str) -> Tuple[float, Dict[str, float]]:
+    """(cumulative ms of `module`, self ms per top-level package) from one fresh interpreter."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                         cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    total = 0.0
+    packages: Dict[str, float] = defaultdict(float)
+    for line in out.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        packages[name.split(".")[0]] += int(self_us) / 1000
+        if name == module:
+            total = int(cumulative_us) / 1000
+    return total, dict(packages)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--module", default="app.main")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=1000.0, help="fail above this median import time")
+    ap.add_argument("--forbid", nargs="*", default=["pandas", "scipy", "sklearn"],
+                    help="top-level packages that must not be imported")
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--json", help="result file (default bench/results/imports-<commit>-<time>.json)")
+    args = ap.parse_args()
+
+    totals: List[float] = []
+    packages: Dict[str, List[float]] = defaultdict(list)
+    for _ in range(args.runs):
+        total, per_package = import_times(args.module)
+        totals.append(total)
+        for name, ms in per_package.items():
+            packages[name].append(ms)
+    median = statistics.median(totals)
+    heaviest = sorted(((statistics.median(v), k) for k, v in packages.items()), reverse=True)[:args.top]
+    forbidden = sorted(set(args.forbid) & set(packages))
+
+    print(f"import {args.module}: median {median:.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    for ms, name in heaviest:
+        print(f"   {name:<24} {ms:>8.1f} ms")
+    if forbidden:
+        print(f"⚠️ Imported at startup: {', '.join(forbidden)}")
+    write_results("imports", {
+        "module": args.module, "runs": args.runs, "budget_ms": args.budget_ms,
+        "import_ms": round(median, 1), "packages_ms": {k: round(ms, 1) for ms, k in heaviest},
+        "forbidden_imported": forbidden,
+    }, args.json)
+    if median > args.budget_ms or forbidden:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+End-to-end load test of /api/recommend: starts the LLM stub and uvicorn on
+a synthetic catalog (or targets --url), drives it with concurrent clients
+and reports latency percentiles, requests per second and server peak RSS.
+
+    cd backend && python -m bench.load --rows 50k --workers 2 --concurrency 8 32 --duration 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+import pandas as pd
+
+from .catalog import ACCORDS, DATA_DIR, NOTES, ensure_catalog, parse_size, size_label
+from .common import BENCH_DIR, summarize, write_results
+
+BACKEND_DIR = BENCH_DIR.parent
+USE_CASES = ["office", "date", "summer", "winter"]
+
+
+def make_bodies(catalog: Path, n: int, explain_share: float, seed: int) -> List[dict]:
+    """Random request bodies: notes, liked names from the catalog, use-cases and filters."""
+    rng = random.Random(seed)
+    names = pd.read_csv(catalog, usecols=["name"], nrows=20_000)["name"].dropna().astype(str).tolist()
+    bodies = []
+    for _ in range(n):
+        body = {"k": rng.choice([5, 8, 10]), "explain": rng.random() < explain_share}
+        if rng.random() < 0.8:
+            body["preferred_notes"] = rng.sample(NOTES + ACCORDS, rng.randint(1, 3))
+        if rng.random() < 0.4:
+            body["liked"] = rng.sample(names, rng.randint(1, 2))
+        if rng.random() < 0.6:
+            body["use_cases"] = rng.sample(USE_CASES, rng.randint(1, 2))
+        if rng.random() < 0.5:
+            lo = rng.randrange(100, 700, 50)
+            body.update(price_min=lo, price_max=lo + rng.randrange(200, 900, 50))
+        if rng.random() < 0.3:
+            body["gender"] = rng.choice(["Male", "Female", "Unisex"])
+        if rng.random() < 0.3:
+            body["rating_min"] = rng.choice([3.0, 3.5, 4.0])
+        bodies.append(body)
+    return bodies
+
+
+# --- Server processes ---
+
+def _tree(pid: int) -> List[int]:
+    """`pid` and all its descendants (Linux /proc; just `pid` elsewhere)."""
+    out, todo = [], [pid]
+    while todo:
+        p = todo.pop()
+        out.append(p)
+        try:
+            with open(f"/proc/{p}/task/{p}/children", encoding="ascii") as f:
+                todo.extend(int(c) for c in f.read().split())
+        except OSError:
+            pass
+    return out
+
+
+def _rss_mib(pids: List[int]) -> float:
+    total = 0
+    for p in pids:
+        try:
+            with open(f"/proc/{p}/status", encoding="ascii") as f:
+                total += next((int(line.split()[1]) for line in f if line.startswith("VmRSS:")), 0)
+        except OSError:
+            pass
+    return total / 1024
+
+
+class RssSampler(threading.Thread):
+    """Peak of the summed RSS of a process tree, sampled every `interval` seconds."""
+
+    def __init__(self, pid: int, interval: float = 0.25):
+        super().__init__(daemon=True)
+        self.pid, self.interval = pid, interval
+        self.peak = 0.0
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        while not self._done.is_set():
+            self.peak = max(self.peak, _rss_mib(_tree(self.pid)))
+            self._done.wait(self.interval)
+
+    def stop(self) -> float:
+        self._done.set()
+        self.join()
+        return round(self.peak, 1)
+
+
+def start_server(catalog: Path, index_dir: Path, port: int, workers: int, stub_port: int,
+                 extra_env: Dict[str, str]) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "CATALOG_PATH": str(catalog),
+        "TFIDF_INDEX_DIR": str(index_dir),
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+        "LLM_DAILY_LIMIT": str(10**9),  # every request comes from 127.0.0.1
+        "EXPLAIN_CACHE_PATH": "",
+        "PYTHONUNBUFFERED": "1",
+        **extra_env,
+    }
+    # fit the index (and neighbor table) once, outside the measured server
+    subprocess.run([sys.executable, "-m", "app.vectorstore", "--catalog", str(catalog), "--out", str(index_dir)],
+                   cwd=BACKEND_DIR, env=env, check=True, stdout=subprocess.DEVNULL)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+
+
+def wait_ready(url: str, timeout: float = 600) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{url}/api/ready", timeout=2).status_code == 200:
+                return
+        except (httpx.HTTPError, ValueError):
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"{url} did not become ready in {timeout:.0f}s")
+
+
+# --- Load ---
+
+async def drive(url: str, bodies: List[dict], concurrency: int, duration: float) -> Dict[str, object]:
+    """`concurrency` clients sending `bodies` round-robin for `duration` seconds."""
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    explained = 0
+    counter = iter(range(10**12))
+    stop = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, timeout=60, limits=limits) as client:
+        async def client_loop() -> None:
+            nonlocal explained
+            while time.perf_counter() < stop:
+                body = bodies[next(counter) % len(bodies)]
+                t0 = time.perf_counter()
+                try:
+                    r = await client.post("/api/recommend", json=body)
+                    ok = r.status_code == 200
+                    key = str(r.status_code)
+                    if ok and any("ai_why" in x for x in r.json().get("results", [])):
+                        explained += 1
+                except httpx.HTTPError as e:
+                    ok, key = False, type(e).__name__
+                if ok:
+                    latencies.append(time.perf_counter() - t0)
+                else:
+                    errors[key] = errors.get(key, 0) + 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+
+    return {"concurrency": concurrency, "seconds": round(elapsed, 2), "requests": len(latencies),
+            "rps": round(len(latencies) / elapsed, 1), "errors": errors, "explained": explained,
+            "latency": summarize(latencies)}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rows", type=parse_size, default=5_000, help="synthetic catalog size, e.g. 5k 50k 500k")
+    ap.add_argument("--catalog", help="use this csv instead of a synthetic one")
+    ap.add_argument("--url", help="benchmark a running server instead of starting one")
+    ap.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    ap.add_argument("--duration", type=float, default=15.0, help="seconds per concurrency level")
+    ap.add_argument("--explain-share", type=float, default=0.3, help="share of requests asking for AI reasons")
+    ap.add_argument("--stub-delay", type=float, default=0.5, help="LLM stub latency, seconds")
+    ap.add_argument("--stub-jitter", type=float, default=0.2)
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--env", nargs="*", default=[], metavar="KEY=VALUE", help="extra server environment")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--json", help="result file (default bench/results/load-<commit>-<time>.json)")
+    args = ap.parse_args()
+
+    catalog = Path(args.catalog) if args.catalog else ensure_catalog(args.rows, args.seed)
+    bodies = make_bodies(catalog, 1000, args.explain_share, args.seed)
+    extra_env = dict(kv.split("=", 1) for kv in args.env)
+    procs: List[subprocess.Popen] = []
+    url = args.url
+    sampler: Optional[RssSampler] = None
+    try:
+        if url is None:
+            stub_port = args.port + 1
+            procs.append(subprocess.Popen(
+                [sys.executable, "-m", "utils.llm_stub", "--port", str(stub_port),
+                 "--delay", str(args.stub_delay), "--jitter", str(args.stub_jitter)],
+                cwd=BACKEND_DIR, stdout=subprocess.DEVNULL))
+            index_dir = DATA_DIR / f"index-{catalog.stem}"
+            procs.append(start_server(catalog, index_dir, args.port, args.workers, stub_port, extra_env))
+            url = f"http://127.0.0.1:{args.port}"
+            sampler = RssSampler(procs[-1].pid)
+            sampler.start()
+        wait_ready(url)
+        asyncio.run(drive(url, bodies[:20], 2, 2.0))  # warm-up
+
+        levels = []
+        for c in args.concurrency:
+            r = asyncio.run(drive(url, bodies, c, args.duration))
+            lat = r["latency"]
+            print(f"c={c:<4} {r['rps']:>8.1f} req/s  p50 {lat.get('p50_ms', 0):>8.1f} ms  "
+                  f"p95 {lat.get('p95_ms', 0):>8.1f}  p99 {lat.get('p99_ms', 0):>8.1f}  errors {r['errors'] or 0}")
+            levels.append(r)
+    finally:
+        peak = sampler.stop() if sampler is not None else None
+        for p in reversed(procs):
+            p.terminate()
+            try:
+                p.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                p.kill()
+
+    print(f"   server peak RSS: {peak} MiB" if peak is not None else "   server peak RSS: n/a (--url)")
+    write_results("load", {
+        "catalog": str(catalog), "rows": size_label(args.rows) if not args.catalog else None,
+        "workers": args.workers, "explain_share": args.explain_share,
+        "stub_delay": args.stub_delay, "stub_jitter": args.stub_jitter, "env": extra_env,
+        "server_peak_rss_mib": peak, "levels": levels,
+    }, args.json)
+
+
+if __name__ == "__main__":
+    main()
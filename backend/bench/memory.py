@@ -0,0 +1,137 @@
+"""
+Memory budget of the server on a synthetic catalog: the catalog's own size,
+the RSS of a fresh uvicorn process once it is ready (index prebuilt by
+`python -m app.vectorstore`), and its private memory after some requests.
+The file-backed part of RSS (pages of the memory-mapped index and string
+pools) is reported but not budgeted: it is page cache shared by every worker
+and grows with the folio size of the filesystem, not with the process.
+Exits non-zero when the catalog is over --catalog-mib or either RSS figure
+is over --rss-mib. `--fit` also reports a cold start that fits the index
+itself (not budgeted, and without the server's INDEX_FIT_MAX_ROWS limit).
+
+    cd backend && python -m bench.memory --rows 100k --catalog-mib 50 --rss-mib 300
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.catalog import load_catalog
+from app.snapshot import content_hash
+from app.vectorstore import INDEX_FORMAT
+
+from .catalog import DATA_DIR, ensure_catalog, parse_size, size_label
+from .common import peak_rss_mib, write_results
+from .load import BACKEND_DIR, make_bodies, wait_ready
+
+
+def _status_mib(pid: int) -> Dict[str, float]:
+    """VmRSS, RssAnon (private) and RssFile (mapped files) of `pid` in MiB."""
+    out = {}
+    with open(f"/proc/{pid}/status", encoding="ascii") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "RssAnon", "RssFile"):
+                out[key] = round(int(value.split()[0]) / 1024, 1)
+    return out
+
+
+def _index_current(catalog: Path, index_dir: Path) -> bool:
+    """The TF-IDF index and neighbor table in `index_dir` were built from this catalog (skip the slow rebuild)."""
+    try:
+        metas = [json.loads((index_dir / name).read_text(encoding="utf-8")) for name in ("meta.json", "neighbors.json")]
+    except (OSError, ValueError):
+        return False
+    catalog_hash = content_hash(catalog)
+    return metas[0].get("format") == INDEX_FORMAT and all(m.get("catalog_hash") == catalog_hash for m in metas)
+
+
+def serve(catalog: Path, index_dir: Path, port: int, requests: int, seed: int) -> Dict[str, Optional[float]]:
+    """Start one uvicorn worker, wait for the catalog, send `requests` requests; its memory in MiB."""
+    env = {**os.environ, "CATALOG_PATH": str(catalog), "TFIDF_INDEX_DIR": str(index_dir),
+           "EXPLAIN_CACHE_PATH": "", "OPENAI_API_KEY": "", "INDEX_FIT_MAX_ROWS": "0"}
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+                             "--log-level", "warning"], cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL)
+    try:
+        url = f"http://127.0.0.1:{port}"
+        wait_ready(url)
+        ready = _status_mib(proc.pid)
+        with httpx.Client(base_url=url, timeout=60) as client:
+            for body in make_bodies(catalog, requests, 0.0, seed):
+                client.post("/api/recommend", json=body).raise_for_status()
+        after = _status_mib(proc.pid)
+        return {"rss_ready_mib": ready["VmRSS"], "rss_mib": after["VmRSS"], "private_mib": after["RssAnon"],
+                "mapped_mib": after["RssFile"], "peak_rss_mib": peak_rss_mib(proc.pid)}
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def measure(rows: int, requests: int = 200, seed: int = 42, port: int = 8790) -> Dict[str, object]:
+    """Catalog size and served memory of the synthetic `rows`-row catalog, building its index if stale."""
+    catalog = ensure_catalog(rows, seed)
+    index_dir = DATA_DIR / f"index-{catalog.stem}"
+    if not _index_current(catalog, index_dir):
+        subprocess.run([sys.executable, "-m", "app.vectorstore", "--catalog", str(catalog), "--out", str(index_dir)],
+                       cwd=BACKEND_DIR, check=True, stdout=subprocess.DEVNULL)
+    catalog_mib = round(load_catalog(catalog).nbytes / 2**20, 1)
+    return {"rows": rows, "catalog_mib": catalog_mib, "prebuilt": serve(catalog, index_dir, port, requests, seed)}
+
+
+def over_budget(result: Dict[str, object], catalog_mib: float, rss_mib: float) -> List[str]:
+    """The budgets `result` (from `measure`) exceeds, as messages."""
+    prebuilt = result["prebuilt"]
+    over = []
+    if result["catalog_mib"] > catalog_mib:
+        over.append(f"catalog {result['catalog_mib']:.1f} > {catalog_mib:.0f} MiB")
+    if prebuilt["rss_ready_mib"] > rss_mib:
+        over.append(f"RSS when ready {prebuilt['rss_ready_mib']:.1f} > {rss_mib:.0f} MiB")
+    if prebuilt["private_mib"] > rss_mib:
+        over.append(f"private memory {prebuilt['private_mib']:.1f} > {rss_mib:.0f} MiB")
+    return over
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rows", type=parse_size, default=100_000, help="e.g. 5k, 100k")
+    ap.add_argument("--catalog-mib", type=float, default=50.0, help="fail above this catalog size")
+    ap.add_argument("--rss-mib", type=float, default=300.0,
+                    help="fail above this RSS when ready or private memory after the requests")
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--fit", action="store_true", help="also measure a cold start without a prebuilt index")
+    ap.add_argument("--port", type=int, default=8790)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--json", help="result file (default bench/results/memory-<commit>-<time>.json)")
+    args = ap.parse_args()
+
+    result = measure(args.rows, args.requests, args.seed, args.port)
+    catalog_mib, prebuilt = result["catalog_mib"], result["prebuilt"]
+    print(f"— {size_label(args.rows)}: catalog {catalog_mib:.1f} MiB (budget {args.catalog_mib:.0f})")
+    print(f"   prebuilt index: RSS {prebuilt['rss_ready_mib']:.1f} MiB when ready (budget {args.rss_mib:.0f}); "
+          f"after {args.requests} requests {prebuilt['private_mib']:.1f} MiB private (budget {args.rss_mib:.0f}) "
+          f"+ {prebuilt['mapped_mib']:.1f} MiB mapped, peak {prebuilt['peak_rss_mib']} MiB")
+    if args.fit:
+        with tempfile.TemporaryDirectory() as empty:
+            catalog = ensure_catalog(args.rows, args.seed)
+            fit = result["fit"] = serve(catalog, Path(empty), args.port, args.requests, args.seed)
+        print(f"   fit at startup: RSS {fit['rss_ready_mib']:.1f} MiB when ready, {fit['private_mib']:.1f} MiB "
+              f"private after the requests, peak {fit['peak_rss_mib']} MiB")
+    write_results("memory", {**result, "budget": {"catalog_mib": args.catalog_mib, "rss_mib": args.rss_mib}},
+                  args.json)
+
+    over = over_budget(result, args.catalog_mib, args.rss_mib)
+    if over:
+        print(f"⚠️ Over budget: {'; '.join(over)}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Micro-benchmarks of the ranking pipeline on a synthetic catalog: catalog
+load, SimpleStore build and queries, filtering, scoring and top-k.
+
+    cd backend && python -m bench.micro --rows 5k 50k --queries 200
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.catalog import load_catalog
+from app.main import _final_scores, _result_items
+from app.payloads import response_json
+from app.recommender import top_k
+from app.snapshot import Snapshot
+from app.vectorstore import SimpleStore
+
+from .catalog import ACCORDS, NOTES, ensure_catalog, parse_size, size_label
+from .common import peak_rss_mib, summarize, time_calls, write_results
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, round(time.perf_counter() - t0, 4)
+
+
+def _queries(n: int, rng: np.random.Generator) -> List[str]:
+    """Note / accord queries of 1-4 terms, like the preferred_notes field."""
+    terms = np.array(NOTES + ACCORDS, dtype=object)
+    return [" ".join(rng.choice(terms, size=int(rng.integers(1, 5)), replace=False)) for _ in range(n)]
+
+
+def _typed(names: List[str], n: int, rng: np.random.Generator) -> List[str]:
+    """What a user has typed so far: a prefix of a catalog name, every other one with two letters swapped."""
+    out = []
+    for i in range(n):
+        name = names[int(rng.integers(len(names)))]
+        t = name[:int(rng.integers(2, max(3, len(name) + 1)))]
+        if i % 2 and len(t) > 3:
+            j = int(rng.integers(1, len(t) - 1))
+            t = t[:j] + t[j + 1] + t[j] + t[j + 2:]
+        out.append(t)
+    return out
+
+
+def bench_size(rows: int, queries: int, seed: int) -> Dict[str, object]:
+    path = ensure_catalog(rows, seed)
+    rng = np.random.default_rng(seed)
+    _, load_s = _timed(lambda: load_catalog(path, binary=False))
+    load_catalog(path)  # (re)writes the binary catalog if needed
+    catalog, binary_s = _timed(lambda: load_catalog(path))
+    store, build_s = _timed(lambda: SimpleStore(catalog))
+    snap, index_s = _timed(lambda: Snapshot(catalog, store))
+    texts = _queries(queries, rng)
+    n = len(catalog)
+
+    hits = [store.search(t) for t in texts]
+    results: Dict[str, object] = {
+        "rows": n,
+        "terms": int(store.X.shape[1]),
+        "catalog_mib": round(catalog.nbytes / 2**20, 1),
+        "load_catalog_s": load_s,
+        "load_binary_s": binary_s,
+        "store_build_s": build_s,
+        "indexes_build_s": index_s,
+        "search": time_calls(lambda i: store.search(texts[i]), queries),
+        "search_top_500": time_calls(lambda i: store.search(texts[i], top_n=500), queries),
+    }
+
+    # filters: a random price window, a rating floor and, half the time, a gender
+    lo = rng.integers(100, 700, queries)
+    genders = [None, "male", None, "female", None, "unisex"]
+
+    def select(i: int):
+        return snap.filters.select([("price_min", float(lo[i]), None), ("price_max", None, float(lo[i] + 600)),
+                                    ("rating_value", 3.5, None)], gender=genders[i % len(genders)])
+
+    results["filter"] = time_calls(select, queries)
+    candidates = [select(i) for i in range(queries)]
+    results["filter_survivors_mean"] = round(float(np.mean([len(c) for c in candidates])), 1)
+
+    def score(i: int):
+        ids = candidates[i]
+        return _final_scores(hits[i].lookup(ids), snap.accords.usecase_scores(ids, ["office", "summer"]),
+                             snap.score_cols["longevity"][ids], snap.score_cols["rating_value"][ids],
+                             snap.score_cols["rating_count"][ids])
+
+    results["score"] = time_calls(score, queries)
+    scores = [score(i) for i in range(queries)]
+    results["top_k_10"] = time_calls(lambda i: top_k(scores[i], 10), queries)
+
+    def serialize(i: int) -> bytes:
+        ids, order = candidates[i], top_k(scores[i], 10)
+        sims = hits[i].lookup(ids[order])
+        return response_json(_result_items(snap, ids[order], sims, np.zeros(len(order)), scores[i][order]))
+
+    results["serialize_10"] = time_calls(serialize, queries)
+    typed = _typed(catalog.get("name").astype(str).tolist(), queries, rng)
+    results["suggest"] = time_calls(lambda i: snap.suggest.suggest(typed[i]), queries)
+    full = [rng.random(n) for _ in range(min(queries, 20))]
+    results["top_k_10_full_catalog"] = time_calls(lambda i: top_k(full[i % len(full)], 10), queries)
+    results["peak_rss_mib"] = peak_rss_mib()
+    return results
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rows", type=parse_size, nargs="+", default=[5_000, 50_000], help="e.g. 5k 50k 500k")
+    ap.add_argument("--queries", type=int, default=200, help="timed calls per operation")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--json", help="result file (default bench/results/micro-<commit>-<time>.json)")
+    args = ap.parse_args()
+
+    runs = {}
+    for rows in args.rows:
+        r = runs[size_label(rows)] = bench_size(rows, args.queries, args.seed)
+        print(f"— {size_label(rows)}: {r['rows']} rows, {r['terms']} terms, load {r['load_catalog_s']}s "
+              f"(binary {r['load_binary_s']}s), "
+              f"build {r['store_build_s']}s + {r['indexes_build_s']}s")
+        for op in ("search", "search_top_500", "filter", "score", "top_k_10", "top_k_10_full_catalog", "serialize_10",
+                   "suggest"):
+            s = r[op]
+            print(f"   {op:<22} p50 {s['p50_ms']:>8.3f} ms  p95 {s['p95_ms']:>8.3f}  p99 {s['p99_ms']:>8.3f}")
+    write_results("micro", {"queries": args.queries, "seed": args.seed, "runs": runs}, args.json)
+
+
+if __name__ == "__main__":
+    main()
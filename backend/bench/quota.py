@@ -0,0 +1,95 @@
+"""
+take() throughput of the LLM quota stores under contention: every thread
+(and, for SQLite, every process) hammers one shared store with one-token
+takes over a pool of client keys.
+
+    cd backend && python -m bench.quota --threads 1 8 --processes 4 --seconds 2
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from app.quota import MemoryQuotaStore, QuotaStore, SqliteQuotaStore
+
+from .common import write_results
+
+
+def _hammer(store: QuotaStore, keys: int, seconds: float, seed: int) -> int:
+    rng = random.Random(seed)
+    names = [f"10.0.{i // 256}.{i % 256}" for i in range(keys)]
+    n = 0
+    stop = time.perf_counter() + seconds
+    while time.perf_counter() < stop:
+        for _ in range(100):
+            store.take(names[rng.randrange(keys)], 1)
+        n += 100
+    return n
+
+
+def run_threads(store: QuotaStore, threads: int, keys: int, seconds: float) -> float:
+    counts = [0] * threads
+
+    def worker(i: int) -> None:
+        counts[i] = _hammer(store, keys, seconds, i)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return sum(counts) / seconds
+
+
+def _process_worker(path: str, keys: int, seconds: float, seed: int, out) -> None:
+    store = SqliteQuotaStore(Path(path), limit=10**9)
+    out.put(_hammer(store, keys, seconds, seed))
+    store.close()
+
+
+def run_processes(path: Path, processes: int, keys: int, seconds: float) -> float:
+    out = mp.Queue()
+    pool = [mp.Process(target=_process_worker, args=(str(path), keys, seconds, i, out)) for i in range(processes)]
+    for p in pool:
+        p.start()
+    total = sum(out.get() for _ in pool)
+    for p in pool:
+        p.join()
+    return total / seconds
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--threads", type=int, nargs="+", default=[1, 8])
+    ap.add_argument("--processes", type=int, nargs="*", default=[4], help="SQLite only")
+    ap.add_argument("--keys", type=int, default=10_000, help="distinct client keys")
+    ap.add_argument("--seconds", type=float, default=2.0, help="duration of each run")
+    ap.add_argument("--json", help="result file (default bench/results/quota-<commit>-<time>.json)")
+    args = ap.parse_args()
+
+    results: List[Dict[str, object]] = []
+    tmp = Path(tempfile.mkdtemp(prefix="quota-bench-"))
+    for threads in args.threads:
+        store = MemoryQuotaStore(limit=10**9)
+        results.append({"store": "memory", "threads": threads, "takes_per_s": run_threads(store, threads, args.keys, args.seconds)})
+        store = SqliteQuotaStore(tmp / f"threads-{threads}.sqlite3", limit=10**9)
+        results.append({"store": "sqlite", "threads": threads, "takes_per_s": run_threads(store, threads, args.keys, args.seconds)})
+        store.close()
+    for processes in args.processes:
+        rate = run_processes(tmp / f"processes-{processes}.sqlite3", processes, args.keys, args.seconds)
+        results.append({"store": "sqlite", "processes": processes, "takes_per_s": rate})
+
+    for r in results:
+        who = f"{r['threads']} threads" if "threads" in r else f"{r['processes']} processes"
+        print(f"{r['store']:>6} | {who:>12} | {r['takes_per_s']:>10,.0f} takes/s")
+    write_results("quota", {"keys": args.keys, "seconds": args.seconds, "results": results}, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Sparse vs dense retrieval on a synthetic catalog: the TF-IDF inverted index
+(exact cosine) against truncated-SVD embeddings of each --dims (RETRIEVAL_MODE=dense).
+Reports recall@k of the dense top-k against the exact sparse top-k, the
+index memory, the SVD fit time and the latency of a single query and of a batch.
+
+    cd backend && python -m bench.retrieval --rows 5k 50k --dims 128 256
+"""
+from __future__ import annotations
+
+import argparse
+from typing import Dict, List
+
+import numpy as np
+
+from app.catalog import load_catalog
+from app.vectorstore import DenseIndex, Hits, SimpleStore
+
+from .catalog import ensure_catalog, parse_size, size_label
+from .common import time_calls, write_results
+from .micro import _queries, _timed
+
+
+def _top(hits: Hits, k: int) -> np.ndarray:
+    """Best `k` ids of `hits`, ties by id (the order `top_k` ranks by)."""
+    return hits.ids[np.lexsort((hits.ids, -hits.sims))[:k]]
+
+
+def recall_at(truth: List[Hits], found: List[Hits], k: int) -> float:
+    """Mean share of the exact top-k found in the approximate top-k (queries with no exact hit skipped)."""
+    shares = []
+    for t, f in zip(truth, found):
+        best = _top(t, k)
+        if len(best):
+            shares.append(len(np.intersect1d(best, _top(f, k))) / len(best))
+    return round(float(np.mean(shares)), 4) if shares else 0.0
+
+
+def bench_size(rows: int, dims: List[int], ks: List[int], queries: int, batch: int, seed: int) -> Dict[str, object]:
+    catalog = load_catalog(ensure_catalog(rows, seed))
+    store, build_s = _timed(lambda: SimpleStore(catalog))
+    texts = _queries(queries, np.random.default_rng(seed))
+    batches = [texts[i:i + batch] for i in range(0, len(texts), batch)]
+    P = store.index.P
+
+    truth = [store.search(t) for t in texts]
+    modes = [{
+        "mode": "sparse", "dims": 0, "build_s": build_s,
+        "index_mib": round((P.data.nbytes + P.indices.nbytes + P.indptr.nbytes + store.index.max_weight.nbytes)
+                           / 2**20, 1),
+        "search": time_calls(lambda i: store.search(texts[i]), queries),
+        f"search_many_{batch}": time_calls(lambda i: store.search_many(batches[i]), len(batches)),
+    }]
+    for d in dims:
+        dense, fit_s = _timed(lambda: DenseIndex.build(store.X, d))
+        store.dense = dense
+        found = [store.search(t) for t in texts]
+        modes.append({
+            "mode": "dense", "dims": dense.dims, "build_s": fit_s,
+            "index_mib": round(dense.nbytes / 2**20, 1),
+            "docs_mib": round(dense.docs.nbytes / 2**20, 1),
+            "search": time_calls(lambda i: store.search(texts[i]), queries),
+            f"search_many_{batch}": time_calls(lambda i: store.search_many(batches[i]), len(batches)),
+            **{f"recall_at_{k}": recall_at(truth, found, k) for k in ks},
+        })
+        store.dense = None
+    return {"rows": len(catalog), "terms": int(store.X.shape[1]), "modes": modes}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rows", type=parse_size, nargs="+", default=[5_000, 50_000], help="e.g. 5k 50k 100k")
+    ap.add_argument("--dims", type=int, nargs="+", default=[128, 256])
+    ap.add_argument("--k", type=int, nargs="+", default=[10, 50], help="recall@k cut-offs")
+    ap.add_argument("--queries", type=int, default=200, help="timed calls per mode")
+    ap.add_argument("--batch", type=int, default=64, help="texts per search_many call")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--json", help="result file (default bench/results/retrieval-<commit>-<time>.json)")
+    args = ap.parse_args()
+
+    runs = {}
+    for rows in args.rows:
+        r = runs[size_label(rows)] = bench_size(rows, args.dims, args.k, args.queries, args.batch, args.seed)
+        print(f"— {size_label(rows)}: {r['rows']} rows, {r['terms']} terms")
+        for m in r["modes"]:
+            label = m["mode"] if not m["dims"] else f"dense-{m['dims']}"
+            recall = "  ".join(f"recall@{k} {m[f'recall_at_{k}']:.3f}" for k in args.k if f"recall_at_{k}" in m)
+            print(f"   {label:<10} {m['index_mib']:>7.1f} MiB  build {m['build_s']:>7.2f}s  "
+                  f"search p50 {m['search']['p50_ms']:>7.3f} ms  "
+                  f"batch of {args.batch} p50 {m[f'search_many_{args.batch}']['p50_ms']:>8.2f} ms  {recall}")
+    write_results("retrieval", {"queries": args.queries, "batch": args.batch, "seed": args.seed, "runs": runs},
+                  args.json)
+
+
+if __name__ == "__main__":
+    main()
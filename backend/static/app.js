@@ -88,6 +88,220 @@ function renderStars(value, max = 5) {
   return html;
 }
 
+// --- Read a fetch() body as NDJSON, calling onEvent per line as soon as it arrives ---
+async function readEvents(res, onEvent) {
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (value) buffer += decoder.decode(value, { stream: true });
+    let nl;
+    while ((nl = buffer.indexOf("\n")) >= 0) {
+      const line = buffer.slice(0, nl).trim();
+      buffer = buffer.slice(nl + 1);
+      if (line) onEvent(JSON.parse(line));
+    }
+    if (done) break;
+  }
+  if (buffer.trim()) onEvent(JSON.parse(buffer));
+}
+
+// --- One result card (AI reasoning is filled in later via setAiWhy) ---
+function renderCard(item, pendingAi) {
+  const card = document.createElement("div");
+  card.className = "card";
+
+  const genderEmoji =
+    item.gender?.toLowerCase() === "male" ? "♂️" :
+    item.gender?.toLowerCase() === "female" ? "♀️" :
+    "⚧️";
+
+  card.innerHTML = `
+    <div class="title">${item.brand} — ${item.name}</div>
+    <div class="gender">${genderEmoji} ${item.gender || "Unisex"}</div>
+
+    <div class="price">💰 ${item.price_range?.[0]}–${item.price_range?.[1]} PLN</div>
+
+    <div class="kv">
+      <span>${item.accords?.slice(0,3).join(", ")}</span>
+    </div>
+
+    <div class="stars">Rating: ${renderStars(item.rating_value)} 
+      <span class="muted">(${item.rating_value?.toFixed(1)} / 5, ${item.rating_count} reviews)</span>
+    </div>
+
+    <div class="stars">Longevity: ${renderStars(item.longevity)}</div>
+    <div class="stars">Sillage: ${renderStars(item.sillage)}</div>
+
+    <div class="divider"></div>
+    <div class="muted">${item.description || ""}</div>
+
+    <div class="divider"></div>
+    <div><a class="link" href="${item.url}" target="_blank">🔗 View on Fragrantica</a></div>
+
+    ${item.ai_why ? `<div class="ai-why">💡 AI says:<br>${item.ai_why.replaceAll("\n", "<br>")}</div>` :
+      pendingAi ? `<div class="ai-why pending muted">💡 AI is thinking…</div>` : ""}
+  `;
+  return card;
+}
+
+function setAiWhy(card, text) {
+  let box = card.querySelector(".ai-why");
+  if (!box) {
+    box = document.createElement("div");
+    card.appendChild(box);
+  }
+  box.className = "ai-why";
+  box.innerHTML = `💡 AI says:<br>${text.replaceAll("\n", "<br>")}`;
+}
+
+// --- Badges / notice from the final stream event ---
+function updateLlmStatus(data) {
+  // === AI daily limit UI ===
+  const aiNotice = document.getElementById("aiNotice");
+  const llmLeftBadge = document.getElementById("llmLeft");
+  const llmBadge = document.getElementById("llmBadge");
+  const explainChecked = document.getElementById("explain").checked;
+
+  setAiBadges({
+    show: explainChecked,
+    left: data.llm_remaining,
+    limited: data.llm_limited === true,
+    used: data.llm_used === true
+  });
+
+  // update remaining counter
+  if (typeof data.llm_remaining === "number" && llmLeftBadge) {
+    llmLeftBadge.style.display = "inline-block";
+    llmLeftBadge.textContent = `AI left: ${data.llm_remaining}`;
+
+    // style tweaks when low / zero
+    if (data.llm_remaining <= 0) {
+      llmLeftBadge.classList.add("danger");
+    } else {
+      llmLeftBadge.classList.remove("danger");
+    }
+  }
+
+  // show/hide limit notice
+  const limited = data.llm_limited === true;
+  if (aiNotice) {
+    if (limited) {
+      aiNotice.classList.remove("hidden");
+      // Optional: sharpen text when hard limited
+      aiNotice.innerHTML = `<strong>No more AI explanations today.</strong> Recommendations still work; try AI insights again after the daily reset.`;
+    } else {
+      // show a gentle heads-up if very low (<= 5 left)
+      if (typeof data.llm_remaining === "number" && data.llm_remaining <= 5 && data.llm_remaining > 0) {
+        aiNotice.classList.remove("hidden");
+        aiNotice.innerHTML = `<strong>Heads up:</strong> Only ${data.llm_remaining} AI explanations left today.`;
+      } else {
+        aiNotice.classList.add("hidden");
+      }
+    }
+  }
+
+  // optional: reflect if AI was used this call
+  if (llmBadge) {
+    if (limited) {
+      llmBadge.textContent = "AI reasoning: capped";
+    } else if (data.llm_used) {
+      llmBadge.textContent = "AI reasoning: used";
+    } else {
+      llmBadge.textContent = "AI reasoning: ready";
+    }
+  }
+}
+
+// --- Autocomplete for the liked perfumes (the comma-separated part being typed) ---
+const likedInput = document.getElementById("liked");
+const suggestList = document.getElementById("likedSuggest");
+const SUGGEST_DEBOUNCE_MS = 120;
+let suggestTimer = null;
+let suggestAbort = null;
+let suggestItems = [];
+let suggestActive = -1;
+
+function hideSuggestions() {
+  suggestItems = [];
+  suggestActive = -1;
+  suggestList.innerHTML = "";
+  suggestList.hidden = true;
+}
+
+function renderSuggestions(items) {
+  suggestItems = items;
+  suggestActive = -1;
+  suggestList.innerHTML = "";
+  items.forEach((item, i) => {
+    const li = document.createElement("li");
+    li.textContent = [item.brand, item.name].filter(Boolean).join(" ");
+    const count = document.createElement("span");
+    count.className = "muted";
+    count.textContent = `${item.rating_count} reviews`;
+    li.appendChild(count);
+    // mousedown, not click: runs before the input's blur hides the list
+    li.addEventListener("mousedown", e => { e.preventDefault(); pickSuggestion(i); });
+    suggestList.appendChild(li);
+  });
+  suggestList.hidden = !items.length;
+}
+
+function highlightSuggestion(i) {
+  suggestActive = i;
+  [...suggestList.children].forEach((li, j) => li.classList.toggle("active", j === i));
+}
+
+// replaces the part after the last comma with "Brand Name" and starts a new one
+function pickSuggestion(i) {
+  const item = suggestItems[i];
+  if (!item) return;
+  const parts = likedInput.value.split(",");
+  parts[parts.length - 1] = " " + [item.brand, item.name].filter(Boolean).join(" ");
+  likedInput.value = parts.join(",").trimStart() + ", ";
+  hideSuggestions();
+  likedInput.focus();
+}
+
+async function fetchSuggestions(q) {
+  suggestAbort?.abort();  // only the latest keystroke's answer matters
+  suggestAbort = new AbortController();
+  try {
+    const res = await fetch(`/api/suggest?q=${encodeURIComponent(q)}`, { signal: suggestAbort.signal });
+    if (!res.ok) return hideSuggestions();  // 503 while the catalog loads: no list, typing still works
+    renderSuggestions((await res.json()).suggestions || []);
+  } catch (err) {
+    if (err.name !== "AbortError") console.error(err);
+  }
+}
+
+likedInput.addEventListener("input", () => {
+  clearTimeout(suggestTimer);
+  const q = likedInput.value.split(",").pop().trim();
+  if (q.length < 2) {
+    suggestAbort?.abort();
+    return hideSuggestions();
+  }
+  suggestTimer = setTimeout(() => fetchSuggestions(q), SUGGEST_DEBOUNCE_MS);
+});
+
+likedInput.addEventListener("keydown", e => {
+  if (suggestList.hidden) return;
+  if (e.key === "ArrowDown" || e.key === "ArrowUp") {
+    e.preventDefault();
+    const step = e.key === "ArrowDown" ? 1 : -1;
+    highlightSuggestion((suggestActive + step + suggestItems.length) % suggestItems.length);
+  } else if (e.key === "Enter" && suggestActive >= 0) {
+    e.preventDefault();
+    pickSuggestion(suggestActive);
+  } else if (e.key === "Escape") {
+    hideSuggestions();
+  }
+});
+
+likedInput.addEventListener("blur", hideSuggestions);
+
 // --- Handle request ---
 document.getElementById("go").addEventListener("click", async () => {
   const liked = document.getElementById("liked").value
@@ -120,117 +334,47 @@ document.getElementById("go").addEventListener("click", async () => {
 
   try {
     console.log("Request:", body);
-    const res = await fetch("/api/recommend", {
+    // Streamed NDJSON: ranked cards render immediately, AI reasoning fills in as it arrives
+    const res = await fetch("/api/recommend/stream", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify(body)
     });
     console.log("HTTP status:", res.status);
 
+    if (res.status === 503) {
+      // the server is up but still loading the catalog
+      const wait = res.headers.get("Retry-After") || "a few";
+      errorDiv.textContent = `The catalog is still loading — please try again in ${wait} seconds.`;
+      return;
+    }
     if (!res.ok) {
       errorDiv.textContent = `Server error: ${res.status}`;
       return;
     }
 
-    const data = await res.json();
-    console.log("Response:", data);
-    // === AI daily limit UI ===
-    const aiNotice = document.getElementById("aiNotice");
-    const llmLeftBadge = document.getElementById("llmLeft");
-    const llmBadge = document.getElementById("llmBadge");
-    const explainChecked = document.getElementById("explain").checked;
-
-    setAiBadges({
-      show: explainChecked,
-      left: data.llm_remaining,
-      limited: data.llm_limited === true,
-      used: data.llm_used === true
-    });
-
-    // update remaining counter
-    if (typeof data.llm_remaining === "number" && llmLeftBadge) {
-      llmLeftBadge.style.display = "inline-block";
-      llmLeftBadge.textContent = `AI left: ${data.llm_remaining}`;
-
-      // style tweaks when low / zero
-      if (data.llm_remaining <= 0) {
-        llmLeftBadge.classList.add("danger");
-      } else {
-        llmLeftBadge.classList.remove("danger");
-      }
-    }
-
-    // show/hide limit notice
-    const limited = data.llm_limited === true;
-    if (aiNotice) {
-      if (limited) {
-        aiNotice.classList.remove("hidden");
-        // Optional: sharpen text when hard limited
-        aiNotice.innerHTML = `<strong>No more AI explanations today.</strong> Recommendations still work; try AI insights again after the daily reset.`;
-      } else {
-        // show a gentle heads-up if very low (<= 5 left)
-        if (typeof data.llm_remaining === "number" && data.llm_remaining <= 5 && data.llm_remaining > 0) {
-          aiNotice.classList.remove("hidden");
-          aiNotice.innerHTML = `<strong>Heads up:</strong> Only ${data.llm_remaining} AI explanations left today.`;
-        } else {
-          aiNotice.classList.add("hidden");
+    const cards = [];
+    await readEvents(res, event => {
+      if (event.type === "results") {
+        console.log("Response:", event);
+        if (!event.results || !event.results.length) {
+          resultsDiv.innerHTML = `<div class="muted">No results — try relaxing your filters.</div>`;
+          return;
         }
+        event.results.forEach((item, i) => {
+          const card = renderCard(item, i < (event.explaining || 0));
+          cards.push(card);
+          resultsDiv.appendChild(card);
+          cardsDiv.appendChild(card);
+        });
+      } else if (event.type === "ai_why") {
+        const card = cards[event.index];
+        if (card) setAiWhy(card, event.ai_why);
+      } else if (event.type === "done") {
+        // drop "thinking" placeholders nobody answered (quota hit / LLM error)
+        cards.forEach(card => card.querySelector(".ai-why.pending")?.remove());
+        updateLlmStatus(event);
       }
-    }
-
-    // optional: reflect if AI was used this call
-    if (llmBadge) {
-      if (limited) {
-        llmBadge.textContent = "AI reasoning: capped";
-      } else if (data.llm_used) {
-        llmBadge.textContent = "AI reasoning: used";
-      } else {
-        llmBadge.textContent = "AI reasoning: ready";
-      }
-    }
-
-    if (!data.results || !data.results.length) {
-      resultsDiv.innerHTML = `<div class="muted">No results — try relaxing your filters.</div>`;
-      return;
-    }
-
-    data.results.forEach(item => {
-      const card = document.createElement("div");
-      card.className = "card";
-
-      const genderEmoji =
-        item.gender?.toLowerCase() === "male" ? "♂️" :
-        item.gender?.toLowerCase() === "female" ? "♀️" :
-        "⚧️";
-
-      card.innerHTML = `
-        <div class="title">${item.brand} — ${item.name}</div>
-        <div class="gender">${genderEmoji} ${item.gender || "Unisex"}</div>
-
-        <div class="price">💰 ${item.price_range?.[0]}–${item.price_range?.[1]} PLN</div>
-
-        <div class="kv">
-          <span>${item.accords?.slice(0,3).join(", ")}</span>
-        </div>
-
-        <div class="stars">Rating: ${renderStars(item.rating_value)} 
-          <span class="muted">(${item.rating_value?.toFixed(1)} / 5, ${item.rating_count} reviews)</span>
-        </div>
-
-        <div class="stars">Longevity: ${renderStars(item.longevity)}</div>
-        <div class="stars">Sillage: ${renderStars(item.sillage)}</div>
-
-        <div class="divider"></div>
-        <div class="muted">${item.description || ""}</div>
-
-        <div class="divider"></div>
-        <div><a class="link" href="${item.url}" target="_blank">🔗 View on Fragrantica</a></div>
-
-        ${item.ai_why ? `<div class="ai-why">💡 AI says:<br>${item.ai_why.replaceAll("\n", "<br>")}</div>` : ""}
-      `;
-
-      resultsDiv.appendChild(card);
-      cardsDiv.appendChild(card);
     });
 
   } catch (err) {
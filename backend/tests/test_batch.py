@@ -0,0 +1,63 @@
+"""/api/recommend/batch answers every request exactly as /api/recommend ranks it alone."""
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.payloads import results_json
+from app.snapshot import build_snapshot
+from bench.catalog import generate
+
+
+@pytest.fixture(scope="module")
+def snap(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp("batch")
+    generate(800, 21).to_csv(tmp / "perfumes.csv", index=False)
+    return build_snapshot(tmp / "perfumes.csv", tmp / "index", neighbors_top_n=20, neighbors_build_max=1000)
+
+
+def requests(snap):
+    df = snap.catalog.df
+    rng = np.random.default_rng(8)
+    names = [str(df["name"][i]) for i in rng.choice(len(df), 6, replace=False)]
+    return [
+        {},
+        {"preferred_notes": ["citrus", "bergamot"], "use_cases": ["office"], "k": 5},
+        {"liked": names[:2], "use_cases": ["date", "winter"]},
+        {"liked": [names[2], "no such perfume"], "preferred_notes": ["vanilla"], "gender": "female"},
+        {"liked": [names[3][:-1]], "k": 10},  # misspelled: fuzzy name lookup
+        {"preferred_notes": ["oud"], "price_min": 150, "price_max": 1000, "rating_min": 3.5},
+        {"preferred_notes": ["rose"], "longevity_min": 3, "sillage_min": 2, "rating_count_min": 100},
+        {"liked": names[4:], "gender": "Male", "use_cases": ["summer", "bogus"]},
+        {"preferred_notes": ["citrus"], "price_min": 5000},  # nothing left after the filters
+        {"preferred_notes": ["citrus", "bergamot"], "use_cases": ["office"], "k": 5},
+    ]
+
+
+@pytest.mark.parametrize("top_n, chunk", [(0, 64), (0, 3), (200, 4)])
+def test_batch_matches_single(snap, monkeypatch, top_n, chunk):
+    monkeypatch.setattr(main, "SNAPSHOT", snap)
+    monkeypatch.setattr(main, "RETRIEVAL_TOP_N", top_n)
+    monkeypatch.setattr(main, "BATCH_CHUNK", chunk)
+    bodies = requests(snap)
+    r = TestClient(main.app).post("/api/recommend/batch", json=bodies)
+    assert r.status_code == 200
+    responses = r.json()["responses"]
+    assert len(responses) == len(bodies)
+    for body, got in zip(bodies, responses):
+        results, message = main._rank(main.RecommendRequest(**body))
+        if results is None:
+            assert got == {"results": [], "message": message}
+        else:
+            assert got == {"results": json.loads(results_json(results))}
+
+
+def test_batch_limits(snap, monkeypatch):
+    client = TestClient(main.app)
+    monkeypatch.setattr(main, "SNAPSHOT", None)
+    assert client.post("/api/recommend/batch", json=[{}]).status_code == 503
+    monkeypatch.setattr(main, "SNAPSHOT", snap)
+    monkeypatch.setattr(main, "MAX_BATCH", 2)
+    assert client.post("/api/recommend/batch", json=[{}] * 3).status_code == 413
@@ -0,0 +1,68 @@
+"""LLM explanation cache: key normalization, the memory and SQLite tiers, pruning."""
+
+from app import explain_cache
+from app.cache import LRUCache
+from app.explain_cache import ExplanationCache, explain_key
+
+CONTEXT = {"liked": ["Sauvage", "Aqua"], "use_cases": ["office"], "preferred_notes": ["citrus"],
+           "price_min": 200, "price_max": 1200}
+CANDIDATE = {"brand": "Dior", "name": "Homme"}
+
+
+def test_key_ignores_order_case_and_nearby_budgets():
+    same = {"liked": [" aqua", "SAUVAGE", "Aqua"], "use_cases": ["Office"], "preferred_notes": ["citrus", ""],
+            "price_min": 210, "price_max": 1190}
+    key = explain_key(CONTEXT, CANDIDATE, "m")
+    assert explain_key(same, {"brand": " dior", "name": "HOMME "}, "m") == key
+    assert explain_key(CONTEXT, CANDIDATE, "other") != key
+    assert explain_key({**CONTEXT, "price_max": 1300}, CANDIDATE, "m") != key
+    assert explain_key({**CONTEXT, "use_cases": ["date"]}, CANDIDATE, "m") != key
+    assert explain_key(CONTEXT, {"brand": "Dior", "name": "Sauvage"}, "m") != key
+
+
+def test_lru_cache_byte_budget():
+    cache = LRUCache(100)
+    assert cache.put("a", 1, 40) and cache.put("b", 2, 40)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    assert cache.put("c", 3, 40)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    assert not cache.put("big", 4, 101)
+    assert cache.stats()["evictions"] == 1 and cache.bytes == 80
+
+
+def test_disk_tier_survives_restart_and_promotes(tmp_path):
+    cache = ExplanationCache(tmp_path / "explain.db", max_bytes=10_000)
+    cache.put_many({"k1": "one", "k2": "", "k3": "three"})  # empty texts are not stored
+    cache.close()
+
+    cache = ExplanationCache(tmp_path / "explain.db", max_bytes=10_000)
+    assert cache.get_many(["k1", "k2", "k3", "k4"]) == ["one", None, "three", None]
+    assert cache.disk_hits == 2
+    assert cache.get_many(["k1"]) == ["one"] and cache.disk_hits == 2  # now answered from memory
+    cache.close()
+
+
+def test_memory_only():
+    cache = ExplanationCache(None, max_bytes=10_000)
+    cache.put_many({"k": "text"})
+    assert cache.get_many(["k", "x"]) == ["text", None]
+    assert cache.stats()["disk"] is False
+
+
+def test_prune_by_age_and_rows(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(explain_cache.time, "time", lambda: now[0])
+    cache = ExplanationCache(tmp_path / "explain.db", max_bytes=10_000, ttl=100, max_rows=3, prune_every=2)
+    for i in range(4):
+        now[0] += 1
+        cache.put_many({f"k{i}": f"t{i}"})
+    assert cache.pruned == 1  # the 4th write pruned the oldest row beyond max_rows
+    cache.memory.clear()
+    assert cache.get_many(["k0", "k1", "k2", "k3"]) == [None, "t1", "t2", "t3"]
+    now[0] += 150  # older than ttl: hidden at once, deleted when the file is opened again
+    cache.memory.clear()
+    assert cache.get_many(["k3"]) == [None]
+    cache.close()
+    cache = ExplanationCache(tmp_path / "explain.db", max_bytes=10_000, ttl=100)
+    assert cache.pruned == 3
+    cache.close()
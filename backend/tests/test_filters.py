@@ -0,0 +1,70 @@
+"""`FilterIndex.select` against the pandas boolean masks /api/recommend used before."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.filters import FilterIndex
+
+
+@pytest.fixture(scope="module")
+def frame() -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    n = 400
+
+    def column(lo, hi, dtype, step):
+        values = (rng.integers(lo, hi, n) * step).astype(dtype)
+        values[rng.random(n) < 0.1] = np.nan
+        return values
+
+    return pd.DataFrame({
+        "name": rng.choice(["Aqua", "aqua", "Noir", "Rose Oud", "Santal", "Vetiver", "Iris"], n),
+        "gender": rng.choice(["Unisex", "women", "Men", "men"], n),
+        "price_min": column(50, 300, np.float64, 1.0),
+        "price_max": column(300, 900, np.float64, 1.0),
+        "rating_value": column(0, 50, np.float32, 0.1),
+        "rating_count": column(0, 3000, np.float64, 1.0),
+        "longevity": column(0, 50, np.float32, 0.1),
+        "sillage": column(0, 50, np.float32, 0.1),
+    })
+
+
+def masked(df, ranges, gender, exclude_names, within):
+    keep = pd.Series(True, index=df.index)
+    for col, lo, hi in ranges:
+        if lo is not None:
+            keep &= df[col] >= lo
+        if hi is not None:
+            keep &= df[col] <= hi
+    if gender is not None:
+        keep &= df["gender"].str.lower() == gender.lower()
+    if exclude_names:
+        keep &= ~df["name"].str.lower().isin([s.lower() for s in exclude_names])
+    if within is not None:
+        keep &= df.index.isin(within)
+    return np.flatnonzero(keep.to_numpy())
+
+
+CASES = [
+    ([], None, [], None),
+    ([("price_min", 100, None)], None, [], None),
+    ([("price_min", 100, None), ("price_max", None, 600)], "men", [], None),
+    ([("rating_value", 3.3, None), ("rating_count", 500, None), ("longevity", 2.1, None)], None, ["AQUA"], None),
+    ([("sillage", 1.7, None), ("rating_value", None, 4.2)], "UNISEX", ["noir", "Missing"], None),
+    ([("price_min", 200, None), ("price_max", None, 500)], "women", [], None),
+    ([("rating_value", 4.9, 4.9)], None, [], None),
+    ([("price_min", 0, None)], "nobody", [], None),
+    ([("longevity", 1.0, None)], "Men", ["rose oud"], "within"),
+    ([], None, ["iris"], "within"),
+]
+
+
+@pytest.mark.parametrize("ranges, gender, exclude_names, within", CASES)
+def test_select_matches_mask(frame, ranges, gender, exclude_names, within):
+    if within == "within":
+        within = np.sort(np.random.default_rng(1).choice(len(frame), 120, replace=False))
+    index = FilterIndex(frame)
+    got = index.select(ranges, gender, exclude_names, within)
+    np.testing.assert_array_equal(got, masked(frame, ranges, gender, exclude_names, within))
+    # the saved arrays give the same answer
+    loaded = FilterIndex.from_arrays(*index.to_arrays())
+    np.testing.assert_array_equal(loaded.select(ranges, gender, exclude_names, within), got)
@@ -0,0 +1,25 @@
+"""Memory budget of one worker (bench.memory); slow, so it only runs with RUN_SLOW=1."""
+import os
+
+import pytest
+
+from app.vectorstore import SimpleStore
+from bench.catalog import generate
+from bench.memory import measure, over_budget
+
+
+@pytest.mark.skipif(not os.getenv("RUN_SLOW"), reason="starts a server on a 20k catalog; set RUN_SLOW=1")
+def test_worker_within_budget():
+    result = measure(20_000, requests=100, port=8792)
+    assert over_budget(result, catalog_mib=50, rss_mib=300) == []
+
+
+def test_fit_limit_fails_closed(tmp_path):
+    df = generate(50, 1)
+    catalog = tmp_path / "perfumes.csv"
+    df.to_csv(catalog, index=False)
+    with pytest.raises(RuntimeError, match="python -m app.vectorstore"):
+        SimpleStore.load_or_build(df, catalog, tmp_path / "index", fit_max_rows=20)
+    assert not (tmp_path / "index").exists()
+    store = SimpleStore.load_or_build(df, catalog, tmp_path / "index", fit_max_rows=50)
+    assert store.X.shape[0] == len(df)
@@ -0,0 +1,107 @@
+"""Liked-perfume resolution: `NameIndex` lookups and the `NeighborTable` against brute force."""
+import difflib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.neighbors import NameIndex, NeighborTable, normalize_name, normalize_names
+from app.vectorstore import SimpleStore
+from bench.catalog import generate
+
+
+@pytest.fixture(scope="module")
+def catalog() -> pd.DataFrame:
+    return generate(600, 13)
+
+
+@pytest.fixture(scope="module")
+def X(catalog):
+    return SimpleStore(catalog).X
+
+
+def test_normalize_name():
+    assert normalize_name("Dior - Sauvage!") == "dior sauvage"
+    assert normalize_name("  Éclat  d'Arpège ") == "eclat d arpege"
+    assert normalize_names(pd.Series(["Dior - Sauvage!", "Éclat d'Arpège"])).tolist() == \
+        ["dior sauvage", "eclat d arpege"]
+
+
+def test_name_index_exact_and_shared_names():
+    df = pd.DataFrame({"name": ["Sauvage", "Sauvage", "Aqua", "Noir"],
+                       "brand": ["Dior", "Other", "Acqua di Parma", None],
+                       "rating_count": [10, 500, np.nan, 3]})
+    index = NameIndex(df)
+    assert index.lookup("sauvage") == 1  # shared name: the most-rated perfume
+    assert index.lookup("DIOR sauvage!") == 0
+    assert index.lookup("Acqua di Parma Aqua") == 2
+    assert index.lookup("noir") == 3
+    assert index.lookup("") is None and index.lookup("!!") is None
+
+
+def name_keys(df):
+    """Key -> row as `NameIndex` defines them: name and "brand name", the most-rated row first."""
+    ids = {}
+    counts = df["rating_count"].fillna(0).to_numpy()
+    for i in np.argsort(-counts, kind="stable"):
+        m, b = normalize_name(df["name"][i]), normalize_name(df["brand"][i])
+        for key in (m, f"{b} {m}".strip()):
+            ids.setdefault(key, int(i))
+    return ids
+
+
+def brute_force_lookup(ids, name, cutoff):
+    """Exact key, else the difflib best match among keys sharing the first three characters."""
+    key = normalize_name(name)
+    if key in ids:
+        return ids[key]
+    block = sorted(k for k in ids if k[:3] == key[:3])
+    close = difflib.get_close_matches(key, block, n=1, cutoff=cutoff)
+    return ids[close[0]] if close else None
+
+
+def test_name_index_fuzzy_matches_brute_force(catalog):
+    index = NameIndex(catalog)
+    loaded = NameIndex.from_arrays(*index.to_arrays())
+    ids = name_keys(catalog)
+    rng = np.random.default_rng(4)
+    for i in rng.choice(len(catalog), 40, replace=False):
+        name = f"{catalog['brand'][i]} {catalog['name'][i]}"
+        typo = int(rng.integers(3, len(name)))
+        for query in (name, catalog["name"][i], name[:typo] + name[typo + 1:], name[:typo] + "q" + name[typo:],
+                      name[:3] + "zzzz"):
+            for cutoff in (0.85, 0.6):
+                expected = brute_force_lookup(ids, query, cutoff)
+                assert index.lookup(query, cutoff) == expected, query
+                assert loaded.lookup(query, cutoff) == expected, query
+
+
+def brute_force_neighbors(X, top_n):
+    S = (X @ X.T).toarray().astype(np.float32)
+    np.fill_diagonal(S, -np.inf)
+    out = []
+    for r in range(len(S)):
+        order = np.lexsort((np.arange(len(S)), -S[r]))
+        out.append([j for j in order if S[r, j] > 0][:top_n])
+    return S, out
+
+
+def test_neighbor_table_matches_brute_force(X):
+    table = NeighborTable.build(X, top_n=10, batch=64)
+    S, expected = brute_force_neighbors(X, 10)
+    assert table.ids.shape == table.sims.shape == (X.shape[0], 10)
+    for r, ids in enumerate(expected):
+        got = table.ids[r][table.ids[r] >= 0]
+        assert r not in got
+        # float32 products may swap near-ties: the ids returned must carry the best similarities
+        assert len(got) == len(ids)
+        np.testing.assert_allclose(S[r, got], S[r, ids], rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(table.sims[r][:len(got)], S[r, ids], rtol=2e-3, atol=1e-3)
+
+
+def test_neighbor_table_merge():
+    table = NeighborTable(np.array([[1, 2, -1], [2, 0, 3], [0, -1, -1], [1, 0, -1]], dtype=np.int32),
+                          np.array([[0.9, 0.5, 0], [0.8, 0.4, 0.2], [0.7, 0, 0], [0.6, 0.1, 0]], dtype=np.float16))
+    hits = table.merge([0, 1])
+    np.testing.assert_array_equal(hits.ids, [0, 1, 2, 3])
+    np.testing.assert_allclose(hits.sims, np.array([0.4, 0.9, 0.5 + 0.8, 0.2], dtype=np.float16) / 2, rtol=1e-3)
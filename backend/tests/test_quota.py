@@ -0,0 +1,84 @@
+"""Both quota stores: limit semantics, window rollover and bounded size."""
+import pytest
+
+from app.quota import MemoryQuotaStore, QuotaStore, SqliteQuotaStore, open_quota_store
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make(request, tmp_path):
+    stores = []
+
+    def open_store(limit, window=100.0, max_keys=1000, **kw):
+        if request.param == "memory":
+            store = MemoryQuotaStore(limit, window, max_keys, **kw)
+        else:
+            store = SqliteQuotaStore(tmp_path / f"quota-{len(stores)}.db", limit, window, max_keys, **kw)
+        stores.append(store)
+        return store
+
+    yield open_store
+    for store in stores:
+        store.close()
+
+
+def test_limit_is_all_or_nothing(make):
+    store = make(5)
+    assert store.take("a", 0, now=0) == (True, 5)
+    assert store.take("a", 3, now=1) == (True, 2)
+    assert store.take("a", 3, now=2) == (False, 2)  # would overshoot: nothing is spent
+    assert store.take("a", 2, now=3) == (True, 0)
+    assert store.take("a", 1, now=4) == (False, 0)
+    assert store.take("a", 0, now=5) == (True, 0)
+    assert store.take("b", 5, now=5) == (True, 0)  # budgets are per key
+    assert store.take("c", 6, now=5) == (False, 5)
+
+
+def test_window_counts_from_first_take(make):
+    store = make(2, window=100.0)
+    assert store.take("a", 2, now=10) == (True, 0)
+    assert store.take("a", 1, now=50) == (False, 0)  # later takes do not move the reset
+    assert store.take("a", 1, now=109.9) == (False, 0)
+    assert store.take("a", 0, now=110) == (True, 2)
+    assert store.take("a", 1, now=110) == (True, 1)
+    assert store.take("a", 1, now=209.9) == (True, 0)
+    assert store.take("a", 1, now=210) == (True, 1)
+
+
+def test_memory_store_sweeps_and_evicts():
+    store = MemoryQuotaStore(3, window=100.0, max_keys=3, slots=10)
+    for i, key in enumerate("abc"):
+        store.take(key, 1, now=i * 20)
+    store.take("d", 1, now=60)  # full: "a" expires first, so it goes
+    assert len(store) == 3 and store.evicted == 1
+    assert store.take("a", 0, now=61) == (True, 3)
+    assert store.take("b", 0, now=61) == (True, 2)
+    store.take("e", 1, now=1000)  # long idle gap: everything else has expired
+    assert len(store) == 1 and store.expired == 3
+
+
+def test_sqlite_store_is_shared_and_pruned(tmp_path):
+    first = SqliteQuotaStore(tmp_path / "q.db", 3, window=100.0, max_keys=2, prune_every=1)
+    second = SqliteQuotaStore(tmp_path / "q.db", 3, window=100.0, max_keys=2, prune_every=1)
+    try:
+        assert first.take("a", 2, now=0) == (True, 1)
+        assert second.take("a", 2, now=1) == (False, 1)  # one budget for every worker
+        second.take("b", 1, now=2)
+        second.take("c", 1, now=3)  # over max_keys: "a" (closest to expiry) is dropped
+        assert first.stats()["keys"] == 2
+        assert first.take("a", 0, now=4) == (True, 3)
+    finally:
+        first.close()
+        second.close()
+
+
+def test_open_quota_store(tmp_path):
+    assert isinstance(open_quota_store("memory", 5), MemoryQuotaStore)
+    store = open_quota_store("sqlite", 5, tmp_path / "q.db")
+    assert isinstance(store, SqliteQuotaStore)
+    store.close()
+    with pytest.raises(ValueError):
+        open_quota_store("sqlite", 5)
+    with pytest.raises(ValueError):
+        open_quota_store("redis", 5)
+    with pytest.raises(TypeError):
+        QuotaStore(5)
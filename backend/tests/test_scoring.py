@@ -0,0 +1,77 @@
+"""The columnar scoring path against the original per-row formulas."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.main import _final_scores
+from app.recommender import AccordIndex, accords_set, usecase_score
+from app.snapshot import _column
+
+
+def final_score(content_sim, usecase, longevity, rating_value, rating_count) -> float:
+    """Per-row composite score as /api/recommend computed it before it was vectorized."""
+    rating_norm = max(min(rating_value / 5.0, 1.0), 0.0)
+    count_norm = min(max(rating_count, 0.0) / 2000.0, 1.0)
+    longevity_norm = max(min(longevity / 5.0, 1.0), 0.0)
+    return (
+        0.40 * float(content_sim)
+        + 0.15 * float(usecase)
+        + 0.15 * float(longevity_norm)
+        + 0.20 * float(rating_norm)
+        + 0.10 * float(count_norm)
+    )
+
+
+@pytest.fixture
+def frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "main_accords": ["citrus|fresh|woody", "oud|amber|very_sweet", "", "vanilla|spicy|aquatic", np.nan,
+                         "green|citrus|aquatic|fresh|woody"],
+        "longevity": [4.0, 0.0, np.nan, 7.0, 2.5, 5.0],
+        "rating_value": [4.4, np.nan, 0.0, 5.6, 3.1, -1.0],
+        "rating_count": [2500.0, 0.0, np.nan, 120.0, 0.0, 1999.0],
+    })
+
+
+@pytest.mark.parametrize("use_cases", [None, [], ["office"], ["office", "summer"], ["date", "winter", "bogus"]])
+def test_columnar_scores_match_per_row(frame, use_cases):
+    n = len(frame)
+    content_sim = np.linspace(0.0, 0.9, n)
+    ids = np.arange(n)
+
+    expected_uc, expected = [], []
+    for i, (_, row) in enumerate(frame.iterrows()):
+        uc = usecase_score(accords_set(row), use_cases)
+        expected_uc.append(uc)
+        # the `or default` fallbacks of the per-row code (NaN is truthy, so it stays NaN)
+        expected.append(final_score(content_sim[i], uc,
+                                    float(row.get("longevity", 3) or 3),
+                                    float(row.get("rating_value", 0) or 0),
+                                    float(row.get("rating_count", 0) or 0)))
+
+    accords = AccordIndex(frame["main_accords"], n)
+    uc_scores = accords.usecase_scores(ids, use_cases)
+    np.testing.assert_array_equal(uc_scores, expected_uc)
+
+    scores = _final_scores(content_sim, uc_scores, _column(frame, "longevity", 3),
+                           _column(frame, "rating_value", 0), _column(frame, "rating_count", 0))
+    np.testing.assert_array_equal(scores, expected)
+    # a missing rating or longevity scored NaN before too (it then ranks last in `top_k`)
+    assert np.flatnonzero(np.isnan(scores)).tolist() == [1, 2]
+
+
+def test_accord_index_subsets_and_saved_arrays():
+    rng = np.random.default_rng(3)
+    tokens = ["Citrus", "fresh", "woody", "oud", "amber", "vanilla", "aquatic", "green", "spicy", "heavy", "musk"]
+    values = ["|".join(rng.choice(tokens, rng.integers(1, 5))) for _ in range(300)]  # repeats inside a string too
+    values[::17] = [np.nan] * len(values[::17])
+    accords = pd.Series(values, dtype="category")
+    ids = rng.choice(len(accords), 120)  # unsorted, with repeats
+    index = AccordIndex(accords, len(accords))
+    loaded = AccordIndex.from_arrays(*index.to_arrays())
+    for use_cases in ([], ["office"], ["summer", "winter", "date"], ["bogus", "date"]):
+        expected = [usecase_score(accords_set(pd.Series({"main_accords": accords[i]})), use_cases) for i in ids]
+        np.testing.assert_allclose(index.usecase_scores(ids, use_cases), expected, rtol=0, atol=1e-12)
+        np.testing.assert_array_equal(loaded.usecase_scores(ids, use_cases), index.usecase_scores(ids, use_cases))
+
+    np.testing.assert_array_equal(AccordIndex(None, 4).usecase_scores(np.arange(4), ["office"]), [0.5] * 4)
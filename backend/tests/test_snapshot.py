@@ -0,0 +1,66 @@
+"""Incremental reload: `append_snapshot` and `NeighborTable.extend`, rejecting anything but an append."""
+import numpy as np
+import pytest
+
+from app.neighbors import NeighborTable
+from app.snapshot import APPEND_TAG, append_snapshot, build_snapshot
+from app.vectorstore import SimpleStore, build_corpus
+from bench.catalog import generate
+
+N = 300
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return generate(N + 40, 17)
+
+
+@pytest.fixture
+def old(frame, tmp_path):
+    path = tmp_path / "perfumes.csv"
+    frame.iloc[:N].to_csv(path, index=False)
+    return build_snapshot(path, tmp_path / "index", neighbors_top_n=8, neighbors_build_max=N, version=1)
+
+
+def test_neighbor_table_extend_lists_only_new_rows(frame):
+    X = SimpleStore(frame).X
+    table = NeighborTable.build(X[:N], top_n=8)
+    extended = table.extend(X)
+    full = NeighborTable.build(X, top_n=8)
+    np.testing.assert_array_equal(extended.ids[:N], table.ids)  # existing lists are kept as they were
+    np.testing.assert_array_equal(extended.ids[N:], full.ids[N:])
+    np.testing.assert_array_equal(extended.sims[N:], full.sims[N:])
+
+
+def test_append_accepted(frame, old, tmp_path):
+    path = tmp_path / "perfumes.csv"
+    frame.to_csv(path, index=False)
+    snap = append_snapshot(old, path, tmp_path / "index", version=2)
+    assert snap is not None and len(snap) == len(frame) and snap.version == 2
+    assert snap.incremental and snap.catalog_hash.endswith(APPEND_TAG)
+    # old rows keep their vectors, new ones use the fitted vocabulary and idf
+    assert (snap.store.X[:N] != old.store.X).nnz == 0
+    X_new = old.store.vec.transform(build_corpus(snap.catalog).iloc[N:])
+    assert abs(snap.store.X[N:] - X_new).max() < 1e-12
+    np.testing.assert_array_equal(snap.neighbors.ids[:N], old.neighbors.ids)
+    assert (snap.neighbors.ids[N:, 0] >= 0).any()
+    # saved under the tagged hash, so other workers can attach to it
+    loaded = NeighborTable.load(tmp_path / "index", snap.catalog_hash, len(frame))
+    np.testing.assert_array_equal(loaded.ids, snap.neighbors.ids)
+    assert SimpleStore.load(snap.catalog, tmp_path / "index", snap.catalog_hash) is not None
+
+
+@pytest.mark.parametrize("change", ["edited", "fewer", "same", "reordered"])
+def test_append_rejected(frame, old, tmp_path, change):
+    df = frame.copy()
+    if change == "edited":
+        df.loc[10, "description"] = "a completely different description"
+    elif change == "fewer":
+        df = df.iloc[:N - 1]
+    elif change == "same":
+        df = df.iloc[:N]
+    else:
+        df = df.iloc[np.r_[1, 0, 2:len(df)]]
+    path = tmp_path / "perfumes.csv"
+    df.to_csv(path, index=False)
+    assert append_snapshot(old, path, tmp_path / "index", version=2) is None
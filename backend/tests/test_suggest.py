@@ -0,0 +1,70 @@
+"""`SuggestIndex.suggest` against a brute-force scan: prefix block first, then trigram matches."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.neighbors import normalize_name
+from app.suggest import SuggestIndex
+from bench.catalog import generate
+
+
+@pytest.fixture(scope="module")
+def catalog() -> pd.DataFrame:
+    df = generate(800, 11)
+    # ties in popularity, a missing count and accented / punctuated names
+    df.loc[:99, "rating_count"] = 100.0
+    df.loc[5, "rating_count"] = np.nan
+    df.loc[7, "name"] = "Éclat d'Ambre"
+    df.loc[8, "brand"] = np.nan
+    return df
+
+
+def trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def brute_force(df, query, limit, cutoff):
+    key = normalize_name(query)
+    if not key:
+        return []
+    names = [normalize_name(v) for v in df["name"]]
+    full = [f"{normalize_name(b)} {m}".strip() if isinstance(b, str) else m for b, m in zip(df["brand"], names)]
+    popularity = df["rating_count"].fillna(0).to_numpy()
+    prefix = [i for i in range(len(df)) if names[i] and names[i].startswith(key) or full[i].startswith(key)]
+    out = sorted(prefix, key=lambda i: (-popularity[i], i))[:limit]
+    if len(out) < limit and len(key) >= 3:
+        grams = trigrams(f" {key}")
+        shared = {i: len(grams & trigrams(f" {t} ")) for i, t in enumerate(full)}
+        fuzzy = [i for i, s in shared.items() if s >= cutoff * len(grams) and i not in out]
+        out += sorted(fuzzy, key=lambda i: (-shared[i], -popularity[i], i))[:limit - len(out)]
+    return out
+
+
+def queries(df):
+    rng = np.random.default_rng(2)
+    out = ["a", "mid", "Golden", "eclat d", "ÉCLAT", "zzzz", "", "  "]
+    for i in rng.choice(len(df), 20, replace=False):
+        full = f"{df['brand'][i]} {df['name'][i]}"
+        cut = int(rng.integers(2, len(full)))
+        typo = int(rng.integers(0, cut))
+        out += [full[:cut], full[:typo] + "x" + full[typo + 1:cut], str(df["name"][i])[:cut]]
+    return out
+
+
+@pytest.mark.parametrize("limit, cutoff", [(8, 0.6), (3, 0.6), (20, 0.4), (1, 0.9)])
+def test_suggest_matches_brute_force(catalog, limit, cutoff):
+    index = SuggestIndex(catalog)
+    loaded = SuggestIndex.from_arrays(*index.to_arrays())
+    for query in queries(catalog):
+        expected = brute_force(catalog, query, limit, cutoff)
+        assert index.suggest(query, limit, cutoff) == expected, query
+        assert loaded.suggest(query, limit, cutoff) == expected, query
+
+
+def test_typo_falls_back_to_trigrams(catalog):
+    index = SuggestIndex(catalog)
+    row = 1
+    name = normalize_name(catalog["name"][row])
+    typo = name[:2] + ("q" if name[2] != "q" else "z") + name[3:]
+    assert row in index.suggest(f"{normalize_name(catalog['brand'][row])} {typo}", limit=20)
+    assert index.suggest("", 8) == [] and index.suggest("gold", 0) == []
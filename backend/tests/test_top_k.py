@@ -0,0 +1,29 @@
+"""`top_k` against a stable descending pandas sort (ties by position, NaN last)."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.recommender import top_k
+
+
+def expected(scores: np.ndarray, k: int) -> np.ndarray:
+    return pd.Series(scores).sort_values(ascending=False, kind="stable").index[:k].to_numpy()
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_stable_sort(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(1, 300))
+    # few distinct values, so ties (also across the k-th place) and NaNs are common
+    scores = rng.integers(0, 6, n).astype(np.float64) / 5
+    scores[rng.random(n) < 0.2] = np.nan
+    for k in (1, 2, 5, n // 2, n - 1, n, n + 3):
+        if k > 0:
+            np.testing.assert_array_equal(top_k(scores, k), expected(scores, k))
+
+
+def test_edges():
+    assert top_k(np.array([]), 3).size == 0
+    assert top_k(np.array([1.0, 2.0]), 0).size == 0
+    np.testing.assert_array_equal(top_k(np.array([np.nan, 0.5, np.nan, 0.5]), 4), [1, 3, 0, 2])
+    np.testing.assert_array_equal(top_k(np.array([-np.inf, np.nan, -1.0]), 2), [2, 0])
@@ -0,0 +1,81 @@
+"""Retrieval indexes against brute-force scans: TF-IDF cosine for the inverted index, embedding dot products for the dense one."""
+import numpy as np
+import pytest
+
+from app.vectorstore import DenseIndex, SimpleStore
+from bench.catalog import generate
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return generate(1500, 3)
+
+
+@pytest.fixture(scope="module")
+def store(catalog) -> SimpleStore:
+    return SimpleStore(catalog)
+
+
+@pytest.fixture(scope="module")
+def queries(catalog, store):
+    rows = np.random.default_rng(5).choice(len(catalog), 15, replace=False)
+    texts = [f"{catalog['name'][i]} {catalog['main_accords'][i]}".lower() for i in rows]
+    texts += ["citrus woody amber", "vanilla", "no such words here"]
+    return [store.vec.transform([t]) for t in texts]
+
+
+def exhaustive(store, q) -> np.ndarray:
+    return np.asarray((store.X @ q.T).todense()).ravel()
+
+
+def test_search_all_matches_exhaustive(store, queries):
+    for q in queries:
+        sims = exhaustive(store, q)
+        hits = store.index.search(q)
+        np.testing.assert_array_equal(hits.ids, np.flatnonzero(sims > 0))
+        np.testing.assert_allclose(hits.sims, sims[hits.ids], rtol=1e-9)
+
+
+@pytest.mark.parametrize("top_n", [1, 5, 20, 100])
+def test_max_score_top_n_matches_exhaustive(store, queries, top_n):
+    for q in queries:
+        sims = exhaustive(store, q)
+        hits = store.index.search(q, top_n)
+        assert np.all(np.diff(hits.ids) > 0)
+        # exact scores for the docs returned ...
+        np.testing.assert_allclose(hits.sims, sims[hits.ids], rtol=1e-9)
+        # ... and they are the top_n of the exhaustive ranking (up to ties at the cut)
+        best = np.sort(sims[sims > 0])[::-1][:top_n]
+        np.testing.assert_allclose(np.sort(hits.sims)[::-1], best, rtol=1e-9)
+
+
+def test_dense_index_matches_brute_force(store, queries, tmp_path):
+    dense = DenseIndex.build(store.X, dims=32)
+    assert dense.docs.shape == (store.X.shape[0], dense.dims)
+    for q in queries:
+        e = dense.embed(q)[0]
+        sims = dense.docs @ e
+        hits = dense.search(q)
+        np.testing.assert_array_equal(hits.ids, np.flatnonzero(sims > 0))
+        np.testing.assert_allclose(hits.sims, sims[hits.ids], rtol=1e-5, atol=1e-6)
+        top = dense.search(q, 10)
+        np.testing.assert_allclose(np.sort(top.sims)[::-1], np.sort(sims[sims > 0])[::-1][:10], rtol=1e-5, atol=1e-6)
+    # one matrix product for a batch gives the same hits as one query at a time
+    Q = store.vec.transform(["citrus woody amber", "vanilla", "no such words here"])
+    for q, hits in zip(Q, dense.search_many(Q)):
+        single = dense.search(q)
+        np.testing.assert_array_equal(hits.ids, single.ids)
+        np.testing.assert_allclose(hits.sims, single.sims, rtol=1e-5, atol=1e-6)
+
+    # appended rows are projected with the fitted SVD, the existing embeddings are kept
+    n = store.X.shape[0] - 100
+    base = DenseIndex.build(store.X[:n], dims=32)
+    extended = base.extend(store.X)
+    np.testing.assert_array_equal(extended.docs[:n], base.docs)
+    np.testing.assert_allclose(extended.docs[n:], extended.embed(store.X[n:]), rtol=1e-5, atol=1e-6)
+
+    dense.save(tmp_path, "hash")
+    loaded = DenseIndex.load(tmp_path, "hash", store.X.shape[0], dense.dims)
+    np.testing.assert_array_equal(loaded.docs, dense.docs)
+    assert DenseIndex.load(tmp_path, "other", store.X.shape[0], dense.dims) is None
+    assert DenseIndex.load(tmp_path, "hash", store.X.shape[0], dense.dims + 1) is None
@@ -1,17 +1,33 @@
-import pandas as pd
-import numpy as np
+"""
+Clean a raw Fragrantica export into data/perfumes.csv.
+
+The raw csv is read in chunks; each chunk is cleaned with column-wise string
+operations on a process pool, and the cleaned chunks are joined in input
+order, so the output does not depend on --chunksize or --workers. The
+cleaned csv is then parsed once more into the server's binary catalog
+(perfumes.catalog/, see app.catalog) unless --no-binary is given.
+
+    cd backend && python -m utils.clean_fragrantica --raw data/raw_fragrantica.csv --out data/perfumes.csv
+"""
+import argparse
+import os
 import re
-from urllib.parse import urlparse, unquote
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from urllib.parse import urlparse, unquote
 
-RAW_PATH = Path("/Users/selimdalcicek/Desktop/Computer Science/perfume-recommender/backend/data/raw_fragrantica.csv")
-OUT_PATH = Path("/Users/selimdalcicek/Desktop/Computer Science/perfume-recommender/backend/data/perfumes.csv")
+import numpy as np
+import pandas as pd
 
-# ---------- helpers ----------
+from app.catalog import load_catalog
 
-import re
+BASE_DIR = Path(__file__).resolve().parents[1]
+RAW_PATH = BASE_DIR / "data" / "raw_fragrantica.csv"
+OUT_PATH = BASE_DIR / "data" / "perfumes.csv"
 
-import re
+# ---------- helpers ----------
 
 FEMALE_PATTERNS = [
     r"\bfor women\b", r"\bfor woman\b", r"\bfor her\b",
@@ -28,14 +44,32 @@ UNISEX_PATTERNS = [
     r"\bfor women and men\b", r"\bfor men and women\b", r"\bfor (?:him|her)\b", r"\bfor her and him\b",
 ]
 
+# one alternation per family: a single search answers "does any pattern match"
+FEMALE_RE = re.compile("|".join(FEMALE_PATTERNS))
+MALE_RE = re.compile("|".join(MALE_PATTERNS))
+UNISEX_RE = re.compile("|".join(UNISEX_PATTERNS))
+
+# checked in this order on the dataset gender (which also accepts the exact words),
+# then on the description, then on the name; first hit wins
+GENDER_FAMILIES = [
+    ("Unisex", UNISEX_RE, ()),
+    ("Male", MALE_RE, ("male", "m")),
+    ("Female", FEMALE_RE, ("female", "f")),
+]
+
+# URLs that `parse_brand_name_from_url` reads the same way as this regex: lowercase
+# http(s), plain host, /perfume/<Brand>/<Perfume>..., nothing to unquote, no ;params
+# or whitespace. Everything else goes through the function.
+FAST_URL_RE = re.compile(
+    r"^https?://[A-Za-z0-9.:@_-]*/+(?i:perfume)/+([^/?#;%\s]+)/+([^/?#;%\s]+)"
+    r"(?:/[^?#;%\s]*)?(?:[?#]\S*)?\Z"
+)
+
 def _norm(s):
     if not isinstance(s, str):
         return ""
     return s.strip().lower()
 
-def _any_match(patterns, text):
-    return any(re.search(p, text) for p in patterns)
-
 def infer_gender(raw_gender, name_hint="", desc_hint=""):
     """
     Priority:
@@ -49,19 +83,19 @@ def infer_gender(raw_gender, name_hint="", desc_hint=""):
     d = _norm(desc_hint)
 
     # 1) dataset gender
-    if _any_match(UNISEX_PATTERNS, g): return "Unisex"
-    if _any_match(MALE_PATTERNS, g) or g in {"male", "m"}: return "Male"
-    if _any_match(FEMALE_PATTERNS, g) or g in {"female", "f"}: return "Female"
+    if UNISEX_RE.search(g): return "Unisex"
+    if MALE_RE.search(g) or g in {"male", "m"}: return "Male"
+    if FEMALE_RE.search(g) or g in {"female", "f"}: return "Female"
 
     # 2) description hints
-    if _any_match(UNISEX_PATTERNS, d): return "Unisex"
-    if _any_match(MALE_PATTERNS, d): return "Male"
-    if _any_match(FEMALE_PATTERNS, d): return "Female"
+    if UNISEX_RE.search(d): return "Unisex"
+    if MALE_RE.search(d): return "Male"
+    if FEMALE_RE.search(d): return "Female"
 
     # 3) name hints
-    if _any_match(UNISEX_PATTERNS, n): return "Unisex"
-    if _any_match(MALE_PATTERNS, n): return "Male"
-    if _any_match(FEMALE_PATTERNS, n): return "Female"
+    if UNISEX_RE.search(n): return "Unisex"
+    if MALE_RE.search(n): return "Male"
+    if FEMALE_RE.search(n): return "Female"
 
     return "Unisex"
 
@@ -75,6 +109,10 @@ def one_liner(text: str) -> str:
     s = re.split(r"[.!?]\s", text.strip())[0]
     return re.sub(r"\s+", " ", s)[:240]
 
+def _title_words(s: str) -> str:
+    # Title case words (keep apostrophes and d’)
+    return " ".join(w.capitalize() for w in s.split())
+
 def parse_brand_name_from_url(u: str):
     """
     Expected Fragrantica URL:
@@ -88,10 +126,7 @@ def parse_brand_name_from_url(u: str):
             brand = parts[1].replace("-", " ").strip()
             perfume_seg = parts[2].replace(".html", "")
             perfume = re.sub(r"-\d+$", "", perfume_seg)  # drop trailing -12345
-            # Title case words (keep apostrophes and d’)
-            brand = " ".join(w.capitalize() for w in brand.split())
-            perfume = " ".join(w.capitalize() for w in perfume.replace("-", " ").split())
-            return brand, perfume
+            return _title_words(brand), _title_words(perfume.replace("-", " "))
     except Exception:
         pass
     return None, None
@@ -121,68 +156,182 @@ def normalize_accords(s: str) -> str:
          .lower()
     )
 
-# ---------- main ----------
-
-def main():
-    if not RAW_PATH.exists():
-        raise FileNotFoundError(f"Raw file not found: {RAW_PATH}")
+# ---------- column versions (same results as the helpers above, one call per chunk) ----------
 
-    df = pd.read_csv(RAW_PATH)
+def _text(col: pd.Series) -> pd.Series:
+    """Python-object strings, so every .str op below is the plain `str` method / `re` call."""
+    return col.astype(object)
 
-    # Tolerant column-name handling
-    cols = {c.lower(): c for c in df.columns}
-    name_col = cols.get("name")
-    gender_col = cols.get("gender")
-    rating_val_col = cols.get("rating value") or cols.get("rating_value")
-    rating_cnt_col = cols.get("rating count") or cols.get("rating_count")
-    accords_col = cols.get("main accords") or cols.get("main_accords") or cols.get("accords")
-    desc_col = cols.get("description")
-    url_col = cols.get("url")
+def _is_str(text: pd.Series) -> pd.Series:
+    # text columns are read with dtype=str: anything that is not a str is a missing value
+    return text.notna()
 
-    # Minimal checks
-    if not name_col or not gender_col or not accords_col:
-        raise ValueError(
-            "CSV must contain at least Name, Gender, Main Accords columns.\n"
-            f"Found columns: {list(df.columns)}"
-        )
+def _map_unique(col: pd.Series, fn) -> pd.Series:
+    """`col.map(fn)`, calling `fn` once per distinct value."""
+    codes, uniques = pd.factorize(col)
+    return pd.Series(np.array([fn(u) for u in uniques], dtype=object)[codes], index=col.index)
 
-    work = pd.DataFrame({
-        "Name": df[name_col],
-        "Gender": df[gender_col],
-        "MainAccords": df[accords_col],
-        "Description": df[desc_col] if desc_col else "",
-        "URL": df[url_col] if url_col else "",
-        "rating_value_raw": df[rating_val_col] if rating_val_col else 0,
-        "rating_count_raw": df[rating_cnt_col] if rating_cnt_col else 0,
-    })
+def infer_genders(raw_gender: pd.Series, names: pd.Series, descs: pd.Series) -> np.ndarray:
+    """
+    `infer_gender` for whole columns. Each family regex only scans the distinct
+    values among the rows still undecided (the dataset gender has a handful).
+    """
+    out = np.full(len(raw_gender), "Unisex", dtype=object)
+    todo = np.arange(len(out))
+    for col, exact in ((raw_gender, True), (descs, False), (names, False)):
+        text = _text(col)
+        text = text.where(_is_str(text), "").str.strip().str.lower()
+        for label, regex, words in GENDER_FAMILIES:
+            if not len(todo):
+                return out
+            codes, uniques = pd.factorize(text.iloc[todo])
+            uniques = pd.Series(uniques, dtype=object)
+            hit = uniques.str.contains(regex).to_numpy(dtype=bool)
+            if exact:
+                hit = hit | uniques.isin(words).to_numpy()
+            hit = hit[codes]
+            out[todo[hit]] = label
+            todo = todo[~hit]
+    return out
+
+def one_liners(descs: pd.Series) -> pd.Series:
+    text = _text(descs)
+    first = text.str.strip().str.split(r"[.!?]\s", n=1, regex=True).str[0]
+    return first.str.replace(r"\s+", " ", regex=True).str[:240].where(_is_str(text), "")
+
+def normalize_accords_col(accords: pd.Series) -> pd.Series:
+    """`normalize_accords` per distinct accord string (they repeat a lot)."""
+    codes, uniques = pd.factorize(_text(accords))
+    text = pd.Series(uniques, dtype=object)
+    out = (
+        text.str.replace("/", "|", regex=False)
+            .str.replace(",", "|", regex=False)
+            .str.replace("  ", " ", regex=False)
+            .str.replace(" |", "|", regex=False)
+            .str.replace("| ", "|", regex=False)
+            .str.strip()
+            .str.lower()
+    )
+    # factorize gives -1 for missing values, which normalize to ""
+    return pd.Series(np.append(out.to_numpy(dtype=object), "")[codes], index=accords.index)
+
+def brand_names_from_urls(urls: pd.Series):
+    """(brand, name) columns as `parse_brand_name_from_url` gives them, None where it gives None."""
+    text = _text(urls)
+    text = text.where(_is_str(text), text.map(str))
+    seg = text.str.extract(FAST_URL_RE)
+    fast = seg[0].notna().to_numpy()
+
+    brand = pd.Series(None, index=urls.index, dtype=object)
+    name = pd.Series(None, index=urls.index, dtype=object)
+    if fast.any():
+        b = seg.loc[fast, 0].str.replace("-", " ", regex=False)
+        n = (seg.loc[fast, 1].str.replace(".html", "", regex=False)
+                             .str.replace(r"-\d+$", "", regex=True)
+                             .str.replace("-", " ", regex=False))
+        brand[fast] = _map_unique(b, _title_words)
+        name[fast] = _map_unique(n, _title_words)
+    if not fast.all():
+        parsed = text[~fast].apply(parse_brand_name_from_url)
+        brand[~fast] = [p[0] for p in parsed]
+        name[~fast] = [p[1] for p in parsed]
+    # empty strings count as not found, as before
+    brand = brand.where(brand.map(bool), None)
+    name = name.where(name.map(bool), None)
+    return brand, name
+
+def clean_chunk(work: pd.DataFrame) -> pd.DataFrame:
+    """
+    Clean one chunk of raw rows (columns Name, Gender, MainAccords and, when the
+    raw file has them, Description, URL, rating_value_raw, rating_count_raw).
+    Row-independent; prices, longevity and deduplication happen on the whole file.
+    """
+    if "Description" not in work:
+        work["Description"] = ""
+    if "URL" not in work:
+        work["URL"] = ""
+    if "rating_value_raw" not in work:
+        work["rating_value_raw"] = 0
+    if "rating_count_raw" not in work:
+        work["rating_count_raw"] = 0
 
     # Parse brand & name from URL (best), fallback to naive split on Name
-    parsed = work["URL"].apply(parse_brand_name_from_url)
-    work["brand"] = [p[0] if p and p[0] else None for p in parsed]
-    work["name"] = [p[1] if p and p[1] else None for p in parsed]
+    work["brand"], work["name"] = brand_names_from_urls(work["URL"])
 
     missing_mask = work["brand"].isna() | work["name"].isna()
     if missing_mask.any():
         fb = work.loc[missing_mask, "Name"].apply(fallback_brand_name)
-        fb_brand = [x[0] for x in fb]
-        fb_name = [x[1] for x in fb]
-        work.loc[missing_mask, "brand"] = fb_brand
-        work.loc[missing_mask, "name"] = fb_name
+        work.loc[missing_mask, "brand"] = [x[0] for x in fb]
+        work.loc[missing_mask, "name"] = [x[1] for x in fb]
     # Standardize gender using provided Gender + Description + Name
-    work["gender"] = [
-        infer_gender(g, name_hint=n, desc_hint=d)
-        for g, n, d in zip(work["Gender"], work["Name"], work["Description"])
-    ]
+    work["gender"] = infer_genders(work["Gender"], work["Name"], work["Description"])
 
     # Normalize accords and description
-    work["main_accords"] = work["MainAccords"].astype(str).apply(normalize_accords)
-    work["description"] = work["Description"].apply(one_liner)
+    work["main_accords"] = normalize_accords_col(work["MainAccords"].astype(str))
+    work["description"] = one_liners(work["Description"])
 
     # Convert ratings (clip and fill)
     work["rating_value"] = pd.to_numeric(work["rating_value_raw"], errors="coerce").clip(0, 5).fillna(0.0)
     work["rating_count"] = pd.to_numeric(work["rating_count_raw"], errors="coerce").clip(lower=0).fillna(0).astype(int)
+    return work[["brand", "name", "gender", "main_accords", "description", "rating_value", "rating_count", "URL"]]
+
+def _cleaned_chunks(chunks, workers: int):
+    """clean_chunk over `chunks`, in order; at most 2 * workers chunks in flight."""
+    if workers <= 1:
+        for chunk in chunks:
+            yield clean_chunk(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(clean_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+# ---------- main ----------
+
+def clean(raw_path: Path, out_path: Path, chunksize: int = 20_000, workers: int = 0,
+          binary: bool = True) -> pd.DataFrame:
+    if not raw_path.exists():
+        raise FileNotFoundError(f"Raw file not found: {raw_path}")
+
+    # Tolerant column-name handling
+    header = pd.read_csv(raw_path, nrows=0).columns
+    cols = {c.lower(): c for c in header}
+    name_col = cols.get("name")
+    gender_col = cols.get("gender")
+    rating_val_col = cols.get("rating value") or cols.get("rating_value")
+    rating_cnt_col = cols.get("rating count") or cols.get("rating_count")
+    accords_col = cols.get("main accords") or cols.get("main_accords") or cols.get("accords")
+    desc_col = cols.get("description")
+    url_col = cols.get("url")
+
+    # Minimal checks
+    if not name_col or not gender_col or not accords_col:
+        raise ValueError(
+            "CSV must contain at least Name, Gender, Main Accords columns.\n"
+            f"Found columns: {list(header)}"
+        )
 
-    # Generate PLN price ranges (stable RNG, mildly correlated with rating)
+    rename = {name_col: "Name", gender_col: "Gender", accords_col: "MainAccords", desc_col: "Description",
+              url_col: "URL", rating_val_col: "rating_value_raw", rating_cnt_col: "rating_count_raw"}
+    rename.pop(None, None)
+    text_cols = [c for c in (name_col, gender_col, accords_col, desc_col, url_col) if c]
+    # text columns are read as str in every chunk, whatever a single chunk happens to look like
+    reader = pd.read_csv(raw_path, usecols=list(rename), dtype={c: str for c in text_cols}, chunksize=chunksize)
+    chunks = (chunk.rename(columns=rename) for chunk in reader)
+
+    t0 = time.perf_counter()
+    parts = list(_cleaned_chunks(chunks, workers or os.cpu_count() or 1))
+    if not parts:
+        parts = [clean_chunk(pd.DataFrame({c: pd.Series(dtype=object) for c in ("Name", "Gender", "MainAccords")}))]
+    work = pd.concat(parts, ignore_index=True)
+    n_raw = len(work)
+
+    # Generate PLN price ranges (stable RNG, mildly correlated with rating);
+    # drawn over the whole file in one go, so chunking cannot change them
     rng = np.random.default_rng(2025)
     base_min = rng.integers(150, 900, size=len(work))  # 150–900 PLN
     # higher rated → gently higher chance for bigger range
@@ -217,10 +366,25 @@ def main():
     # Deduplicate by (brand, name)
     out = out.drop_duplicates(subset=["brand","name"])
 
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    out.to_csv(OUT_PATH, index=False, encoding="utf-8")
-    print(f"✅ Saved: {OUT_PATH} | rows: {len(out)}")
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out.to_csv(out_path, index=False, encoding="utf-8")
+    elapsed = time.perf_counter() - t0
+    print(f"✅ Saved: {out_path} | rows: {len(out)}")
+    print(f"   {n_raw} raw rows in {elapsed:.2f}s ({n_raw / max(elapsed, 1e-9):,.0f} rows/s)")
+    if binary:
+        load_catalog(out_path)  # writes the binary catalog next to the csv
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Clean a raw Fragrantica csv into perfumes.csv.")
+    ap.add_argument("--raw", default=str(RAW_PATH), help="raw export (default backend/data/raw_fragrantica.csv)")
+    ap.add_argument("--out", default=str(OUT_PATH), help="cleaned catalog (default backend/data/perfumes.csv)")
+    ap.add_argument("--chunksize", type=int, default=20_000, help="raw rows per chunk")
+    ap.add_argument("--workers", type=int, default=0, help="processes (default: all cpus; 1 = no pool)")
+    ap.add_argument("--no-binary", action="store_true", help="only write the csv, no binary catalog")
+    args = ap.parse_args()
+    out = clean(Path(args.raw), Path(args.out), args.chunksize, args.workers, binary=not args.no_binary)
     print(out.head(5).to_string())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,54 @@
+"""
+Local stand-in for the OpenAI chat completions endpoint, for load tests and
+offline development. Answers every request with canned bullets in the JSON
+shape providers.py expects, after an optional artificial delay (plus random
+jitter). `--fail-rate` returns malformed JSON for that share of requests.
+
+    cd backend && python -m utils.llm_stub --port 8099 --delay 1.5
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://127.0.0.1:8099/v1 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+
+from fastapi import FastAPI, Request
+
+CANDIDATE_LINE = re.compile(r"^\d+\. ", re.MULTILINE)
+
+
+def make_app(delay: float = 0.0, jitter: float = 0.0, fail_rate: float = 0.0) -> FastAPI:
+    app = FastAPI(title="LLM stub")
+
+    @app.post("/v1/chat/completions")
+    async def chat(request: Request):
+        body = await request.json()
+        prompt = (body.get("messages") or [{}])[-1].get("content", "")
+        n = len(CANDIDATE_LINE.findall(prompt))
+        wait = delay + random.uniform(0, jitter)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        if fail_rate and random.random() < fail_rate:
+            return {"choices": [{"message": {"role": "assistant", "content": "{not json"}}]}
+        content = {"list": [{"bullets": [f"Stub reason {i + 1}a", f"Stub reason {i + 1}b"]} for i in range(n)]}
+        return {"choices": [{"message": {"role": "assistant", "content": json.dumps(content)}}]}
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8099)
+    ap.add_argument("--delay", type=float, default=0.0, help="seconds to wait before answering")
+    ap.add_argument("--jitter", type=float, default=0.0, help="extra uniform random delay, seconds")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="share of malformed responses (0-1)")
+    args = ap.parse_args()
+    uvicorn.run(make_app(args.delay, args.jitter, args.fail_rate), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()